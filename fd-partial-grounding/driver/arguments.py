@@ -182,10 +182,15 @@ def _check_mutex_args(parser, args, required=False):
             ", ".join(name for name, _ in args))
 
 
+# First bytes of a translator output file in the binary format (see
+# translate/sas_tasks.py).
+SAS_BINARY_MAGIC = b"\0sasbin\n"
+
+
 def _looks_like_search_input(filename):
-    with open(filename) as input_file:
-        first_line = next(input_file, "").rstrip()
-    return first_line == "begin_version"
+    with open(filename, "rb") as input_file:
+        first_line = input_file.readline()
+    return first_line.rstrip() == b"begin_version" or first_line == SAS_BINARY_MAGIC
 
 
 def _set_components_automatically(parser, args):
@@ -269,7 +274,8 @@ def _set_translator_output_options(parser, args):
                     "fast-downward.py script. Pass it directly to fast-downward.py instead.")
 
     args.search_input = args.sas_file
-    args.translate_options += ["--sas-file", args.search_input]
+    args.translate_options += ["--sas-file", args.search_input,
+                               "--sas-file-format", args.sas_file_format]
 
 
 def _get_time_limit_in_seconds(limit, parser):
@@ -375,6 +381,18 @@ def parse_args():
     grounding.add_argument("--incremental-grounding-increment", default=None, type=int, help="increment in number of actions")
     grounding.add_argument("--incremental-grounding-minimum", default=None, type=int, help="minimum number of actions to ground in first iteration")
     grounding.add_argument("--incremental-grounding-increment-percentage", default=None, type=int, help="increment in percentage of actions")
+    grounding.add_argument("--incremental-grounding-adaptive", action="store_true",
+                           help="choose the increment and the search time limit of every "
+                                "iteration from the output of the last search: whether it "
+                                "exhausted the state space, the progress of the heuristic "
+                                "values, the dead ends and the time of the iteration")
+    grounding.add_argument("--incremental-grounding-resume", action="store_true",
+                           help="continue grounding from the state of the previous iteration "
+                                "instead of starting from scratch in every iteration")
+    grounding.add_argument("--incremental-grounding-keep-checkpoint", action="store_true",
+                           help="keep the grounding state of the last iteration (see "
+                                "--incremental-grounding-resume) in <sas-file>.grounding, so that "
+                                "a later translator run with --grounding-checkpoint can continue it")
 
     # HACK to support how plans should be saved for IPC23
     grounding.add_argument("--keep-first-plan-file", action="store_true",
@@ -419,6 +437,12 @@ def parse_args():
         "--sas-file", metavar="FILE",
         help="intermediate file for storing the translator output "
             "(implies --keep-sas-file, default: {})".format(DEFAULT_SAS_FILE))
+    driver_other.add_argument(
+        "--sas-file-format", choices=["text", "binary"], default="text",
+        help="format of the translator output file. The search and "
+            "preprocess-h2 read the binary format without parsing text; "
+            "preprocess-h2 writes its output in the format of its input "
+            "(default: %(default)s)")
     driver_other.add_argument(
         "--keep-sas-file", action="store_true",
         help="keep translator output file (implied by --sas-file, default: "
@@ -59,6 +59,31 @@ def check_call(nick, cmd, stdin=None, time_limit=None, memory_limit=None):
         return subprocess.check_call(cmd, **kwargs)
 
 
+def check_call_and_handle_output(nick, cmd, handle_line, stdin=None, time_limit=None, memory_limit=None):
+    """Like check_call, but also pass every line that the command prints
+    to handle_line after printing it."""
+    print_call_settings(nick, cmd, stdin, time_limit, memory_limit)
+
+    preexec_fn = _get_preexec_function(time_limit, memory_limit)
+
+    sys.stdout.flush()
+    stdin_file = open(stdin) if stdin else None
+    try:
+        p = subprocess.Popen(cmd, stdin=stdin_file, stdout=subprocess.PIPE,
+                             preexec_fn=preexec_fn, text=True, errors="replace")
+        for line in p.stdout:
+            sys.stdout.write(line)
+            handle_line(line)
+        returncode = p.wait()
+    finally:
+        if stdin_file:
+            stdin_file.close()
+    sys.stdout.flush()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd)
+    return returncode
+
+
 def get_error_output_and_returncode(nick, cmd, time_limit=None, memory_limit=None):
     print_call_settings(nick, cmd, None, time_limit, memory_limit)
 
@@ -1,5 +1,8 @@
 import logging
+import os
+import re
 import sys
+import time
 
 from . import returncodes as rc
 from . import run_components
@@ -22,22 +25,229 @@ def get_new_limit(num_grounded_actions, increment, args):
     return new_limit
 
 
+def get_checkpoint_file(args):
+    return args.sas_file + ".grounding"
+
+
+def remove_checkpoint(args):
+    checkpoint = get_checkpoint_file(args)
+    # The translator stores the reusable translation results next to the
+    # grounding state.
+    for filename in [checkpoint, checkpoint + ".translation"]:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+
+def log_iteration_times(args, iteration, times, total_times):
+    """Log the wall-clock times of the components in one iteration, so
+    that runs with different --sas-file-format values can be compared,
+    and add them to total_times."""
+    for component, seconds in times.items():
+        total_times[component] = total_times.get(component, 0) + seconds
+    try:
+        sas_file_size = "%d bytes" % os.path.getsize(args.search_input)
+    except OSError:
+        sas_file_size = "no file"
+    logging.info(
+        "Iteration %d wall-clock times: %s (total %.2fs; %s SAS file, %s)" % (
+            iteration,
+            ", ".join("%s %.2fs" % (component, seconds)
+                      for component, seconds in times.items()),
+            sum(times.values()), args.sas_file_format, sas_file_size))
+
+
+class SearchFeedback:
+    """Collect what the search prints about its progress: the heuristic
+    values of the initial state and the best values reached, whether the
+    state space was explored completely, and the number of evaluated and
+    dead-end states."""
+    INITIAL_VALUE = re.compile(r"Initial heuristic value for (.+): (\d+|infinity)$")
+    NEW_BEST_VALUE = re.compile(r"New best heuristic value for (.+): (\d+)$")
+    EVALUATED = re.compile(r"(?:^|\] )Evaluated (\d+) state\(s\)\.$")
+    DEAD_ENDS = re.compile(r"(?:^|\] )Dead ends: (\d+) state\(s\)\.$")
+    EXHAUSTED = "Completely explored state space -- no solution!"
+
+    def __init__(self):
+        self.initial_values = {}
+        self.best_values = {}
+        self.evaluated = None
+        self.dead_ends = None
+        self.exhausted = False
+
+    def parse_line(self, line):
+        line = line.rstrip()
+        match = self.NEW_BEST_VALUE.search(line)
+        if match:
+            self.best_values[match.group(1)] = int(match.group(2))
+            return
+        match = self.INITIAL_VALUE.search(line)
+        if match:
+            value = match.group(2)
+            self.initial_values[match.group(1)] = None if value == "infinity" else int(value)
+            return
+        match = self.EVALUATED.search(line)
+        if match:
+            self.evaluated = int(match.group(1))
+            return
+        match = self.DEAD_ENDS.search(line)
+        if match:
+            self.dead_ends = int(match.group(1))
+            return
+        if line.endswith(self.EXHAUSTED):
+            self.exhausted = True
+
+    def get_progress(self):
+        """Return the largest relative decrease from the initial heuristic
+        value to the best value over all reported heuristics, or None if
+        no heuristic had a positive finite initial value."""
+        progress = [(initial - self.best_values.get(name, initial)) / initial
+                    for name, initial in self.initial_values.items()
+                    if initial]
+        return max(progress) if progress else None
+
+    def get_dead_end_ratio(self):
+        if not self.evaluated or self.dead_ends is None:
+            return None
+        return self.dead_ends / self.evaluated
+
+
+class AdaptiveStepSize:
+    """Choose the increment and the search time limit of the next iteration
+    of incremental grounding from the outcome of the last search
+    (--incremental-grounding-adaptive).
+
+    If the search explored the state space of the partial task completely,
+    actions that a plan needs are missing. When the heuristic values got
+    close to zero, few actions are probably missing and the increment is
+    halved. When they barely decreased, most dead ends were hit or the
+    search took only a small part of the iteration (which was spent
+    grounding), the increment is doubled. If the search stopped without
+    exploring the state space, the task may be solvable and the search
+    time limit is doubled instead, unless the search made little progress,
+    in which case the increment is doubled. Nothing changes if it ran out
+    of memory. The absolute increment and the percentage increment (if
+    used) are scaled by the same factor, which stays between MIN_SCALE and
+    MAX_SCALE. The search time limit is at most MAX_SEARCH_TIME_FACTOR
+    times the initial one; the overall time limit still bounds every
+    component."""
+    MIN_SCALE = 0.25
+    MAX_SCALE = 16
+    MAX_SEARCH_TIME_FACTOR = 8
+    NEARLY_SOLVED_PROGRESS = 0.8
+    LITTLE_PROGRESS = 0.5
+    MANY_DEAD_ENDS = 0.5
+    SHORT_SEARCH = 0.25
+
+    def __init__(self, increment, percentage, search_time_limit):
+        """increment is the absolute increment in number of actions and
+        percentage the increment in percent of the grounded actions; either
+        is None if it is not used."""
+        self.initial_increment = increment
+        self.initial_percentage = percentage
+        self.scale = 1
+        self.initial_search_time_limit = search_time_limit
+        self.search_time_limit = search_time_limit
+
+    @property
+    def increment(self):
+        if self.initial_increment is None:
+            return None
+        return max(1, int(self.initial_increment * self.scale))
+
+    @property
+    def percentage(self):
+        if self.initial_percentage is None:
+            return None
+        return self.initial_percentage * self.scale
+
+    def format_increment(self):
+        steps = []
+        if self.increment is not None:
+            steps.append("%d actions" % self.increment)
+        if self.percentage is not None:
+            steps.append("%.4g%%" % self.percentage)
+        return " or ".join(steps)
+
+    def update(self, iteration, exitcode, feedback, times):
+        progress = feedback.get_progress()
+        dead_end_ratio = feedback.get_dead_end_ratio()
+        search_time = times.get("search", 0)
+        iteration_time = sum(times.values())
+        increment_factor = 1
+        search_time_factor = 1
+        if exitcode == rc.SEARCH_UNSOLVABLE or feedback.exhausted:
+            if progress is not None and progress >= self.NEARLY_SOLVED_PROGRESS:
+                increment_factor = 0.5
+                reason = "state space exhausted close to the goal"
+            elif progress is None or progress < self.LITTLE_PROGRESS:
+                increment_factor = 2
+                reason = "state space exhausted far from the goal"
+            elif dead_end_ratio is not None and dead_end_ratio >= self.MANY_DEAD_ENDS:
+                increment_factor = 2
+                reason = "state space exhausted with many dead ends"
+            elif search_time < self.SHORT_SEARCH * iteration_time:
+                increment_factor = 2
+                reason = "state space exhausted quickly, grounding dominates"
+            else:
+                reason = "state space exhausted"
+        elif exitcode == rc.SEARCH_OUT_OF_MEMORY:
+            reason = "search ran out of memory"
+        elif progress is not None and progress >= self.LITTLE_PROGRESS:
+            search_time_factor = 2
+            reason = "search stopped while making progress"
+        else:
+            increment_factor = 2
+            reason = "search stopped without making progress"
+
+        self.scale = min(max(self.scale * increment_factor, self.MIN_SCALE), self.MAX_SCALE)
+        self.search_time_limit = min(
+            int(self.search_time_limit * search_time_factor),
+            self.initial_search_time_limit * self.MAX_SEARCH_TIME_FACTOR)
+
+        def format_optional(value):
+            return "n/a" if value is None else "%.2f" % value
+        logging.info(
+            "Iteration %d adaptive step: %s (search exit code %d, h progress %s, "
+            "dead-end ratio %s, search %.2fs of %.2fs) -> increment %s, "
+            "search time limit %ds" % (
+                iteration, reason, exitcode, format_optional(progress),
+                format_optional(dead_end_ratio), search_time, iteration_time,
+                self.format_increment(), self.search_time_limit))
+
+
 def do_incremental_grounding(args):
     if "translate" not in args.components or "search" not in args.components:
         sys.exit("ERROR: need to execute translator and search to do incremental grounding.")
 
     first_iteration = True
+    iteration = 0
+    total_times = {}
 
     num_grounded_actions = -1
     num_grounded_actions_last_iteration = -1
     args.search_time_limit = args.incremental_grounding_search_time_limit if args.incremental_grounding_search_time_limit else 10 * 60
     increment = args.incremental_grounding_increment if args.incremental_grounding_increment else 10000
     new_limit = increment
+    if args.incremental_grounding_adaptive:
+        # get_new_limit ignores the absolute increment if only a percentage
+        # is given.
+        uses_increment = (args.incremental_grounding_increment or
+                          not args.incremental_grounding_increment_percentage)
+        step_size = AdaptiveStepSize(increment if uses_increment else None,
+                                     args.incremental_grounding_increment_percentage,
+                                     args.search_time_limit)
     old_translate_options = list(args.translate_options)
     old_search_options = list(args.search_options)
     
     if args.incremental_grounding_increment_percentage:
         args.incremental_grounding_increment_percentage = args.incremental_grounding_increment_percentage / 100 + 1
+
+    if args.incremental_grounding_keep_checkpoint and not args.incremental_grounding_resume:
+        sys.exit("ERROR: --incremental-grounding-keep-checkpoint needs --incremental-grounding-resume.")
+    if args.incremental_grounding_resume:
+        # Never continue from the grounding state of an earlier planner run.
+        remove_checkpoint(args)
+        old_translate_options += ["--grounding-checkpoint", get_checkpoint_file(args)]
         
     while True:
         if args.overall_time_limit and args.overall_time_limit - util.get_elapsed_time() <= 0:
@@ -68,10 +278,15 @@ def do_incremental_grounding(args):
         first_iteration = False
 
         args.translate_options = old_translate_options + termination_condition
-        
+
+        iteration += 1
+        times = {}
+        start = time.perf_counter()
         (exitcode, _, num_grounded_actions) = run_components.run_translate(args, True)
+        times["translate"] = time.perf_counter() - start
 
         if num_grounded_actions == num_grounded_actions_last_iteration:
+            log_iteration_times(args, iteration, times, total_times)
             print("No progress, the same number of actions was grounded in the last iteration. Stopping.")
             break
 
@@ -83,18 +298,26 @@ def do_incremental_grounding(args):
             print("Driver aborting after translator")
             sys.exit(exitcode)
         elif exitcode == rc.TRANSLATE_UNSOLVABLE:
+            log_iteration_times(args, iteration, times, total_times)
             num_grounded_actions = get_new_limit(num_grounded_actions, increment, args)
             print("Task proved unsolvable in translator, increasing minimum number of grounded actions.")
             continue
 
         if args.transform_task:
             print()
+            start = time.perf_counter()
             run_components.transform_task(args)
-        
+            times["transform"] = time.perf_counter() - start
+
         args.search_options = list(old_search_options)
-        
-        (exitcode, _) = run_components.run_search(args)
-        
+
+        feedback = SearchFeedback()
+        start = time.perf_counter()
+        (exitcode, _) = run_components.run_search(
+            args, feedback.parse_line if args.incremental_grounding_adaptive else None)
+        times["search"] = time.perf_counter() - start
+        log_iteration_times(args, iteration, times, total_times)
+
         print()
         print("search exit code: {exitcode}".format(**locals()))
         if exitcode in [rc.SUCCESS, rc.SEARCH_PLAN_FOUND_AND_OUT_OF_MEMORY,
@@ -104,6 +327,20 @@ def do_incremental_grounding(args):
         elif exitcode in [rc.SEARCH_INPUT_ERROR, rc.SEARCH_UNSUPPORTED]:
             print("Driver aborting after search")
             sys.exit(exitcode)
+        elif args.incremental_grounding_adaptive:
+            step_size.update(iteration, exitcode, feedback, times)
+            if step_size.increment is not None:
+                increment = step_size.increment
+            if step_size.percentage is not None:
+                args.incremental_grounding_increment_percentage = step_size.percentage / 100 + 1
+            args.search_time_limit = step_size.search_time_limit
+    if args.incremental_grounding_resume and not args.incremental_grounding_keep_checkpoint:
+        remove_checkpoint(args)
+    if total_times:
+        logging.info("Wall-clock times of %d iterations: %s" % (
+            iteration, ", ".join("%s %.2fs" % (component, seconds)
+                                 for component, seconds in total_times.items())))
+
     if "validate" in args.components:
         (exitcode, _) = run_components.run_validate(args)
         print()
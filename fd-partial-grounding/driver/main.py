@@ -37,7 +37,9 @@ def main():
     
     if (args.incremental_grounding):
         incremental_grounding.do_incremental_grounding(args) # function never returns
-    elif (args.incremental_grounding_search_time_limit or args.incremental_grounding_increment):
+    elif (args.incremental_grounding_search_time_limit or args.incremental_grounding_increment or
+          args.incremental_grounding_resume or args.incremental_grounding_keep_checkpoint or
+          args.incremental_grounding_adaptive):
         sys.exit("ERROR: need to specify --incremental-grounding to use its special options.")
 
     limits.print_limits("planner", args.overall_time_limit, args.overall_memory_limit)
@@ -157,7 +157,9 @@ def transform_task(args):
                 f"Task transformation returned exit status {err.returncode}")
 
 
-def run_search(args):
+def run_search(args, handle_output_line=None):
+    """Run the search. If handle_output_line is given, it is called with
+    every line of the output of the search (not supported for portfolios)."""
     logging.info("Running search (%s)." % args.build)
     time_limit = limits.get_time_limit(
         args.search_time_limit, args.overall_time_limit)
@@ -184,12 +186,21 @@ def run_search(args):
         if "--help" not in args.search_options:
             args.search_options.extend(["--internal-plan-file", args.plan_file])
         try:
-            call.check_call(
-                "search",
-                [executable] + args.search_options,
-                stdin=args.search_input,
-                time_limit=time_limit,
-                memory_limit=memory_limit)
+            if handle_output_line is None:
+                call.check_call(
+                    "search",
+                    [executable] + args.search_options,
+                    stdin=args.search_input,
+                    time_limit=time_limit,
+                    memory_limit=memory_limit)
+            else:
+                call.check_call_and_handle_output(
+                    "search",
+                    [executable] + args.search_options,
+                    handle_output_line,
+                    stdin=args.search_input,
+                    time_limit=time_limit,
+                    memory_limit=memory_limit)
         except subprocess.CalledProcessError as err:
             # TODO: if we ever add support for SEARCH_PLAN_FOUND_AND_* directly
             # in the planner, this assertion no longer holds. Furthermore, we
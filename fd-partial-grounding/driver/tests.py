@@ -12,6 +12,7 @@ import pytest
 
 from .aliases import ALIASES, PORTFOLIOS
 from .arguments import EXAMPLES
+from . import incremental_grounding
 from . import limits
 from . import returncodes
 from .util import REPO_ROOT_DIR, find_domain_filename
@@ -84,3 +85,84 @@ def test_automatic_domain_file_name_computation():
         for filename in filenames:
             if "domain" not in filename:
                 assert find_domain_filename(os.path.join(dirpath, filename))
+
+
+# Output of a lama-first search on a partial task whose state space was
+# explored completely (shortened).
+EXHAUSTED_SEARCH_OUTPUT = """\
+[t=0.004s, 9924 KB] Initial heuristic value for lmcount(lm_reasonable_orders_hps(lm_rhw()), pref = true): 9
+[t=0.004s, 9924 KB] Initial heuristic value for ff: 10
+[t=0.004s, 9924 KB] New best heuristic value for ff: 9
+[t=0.004s, 9924 KB] New best heuristic value for lmcount(lm_reasonable_orders_hps(lm_rhw()), pref = true): 8
+[t=0.005s, 9924 KB] New best heuristic value for ff: 1
+[t=0.006s, 9924 KB] Completely explored state space -- no solution!
+[t=0.006s, 9924 KB] Actual search time: 0.002s
+[t=0.006s, 9924 KB] Expanded 120 state(s).
+[t=0.006s, 9924 KB] Reopened 0 state(s).
+[t=0.006s, 9924 KB] Evaluated 200 state(s).
+[t=0.006s, 9924 KB] Evaluations: 400
+[t=0.006s, 9924 KB] Generated 480 state(s).
+[t=0.006s, 9924 KB] Dead ends: 30 state(s).
+[t=0.006s, 9924 KB] Expanded until last jump: 0 state(s).
+[t=0.006s, 9924 KB] Evaluated until last jump: 1 state(s).
+"""
+
+
+def parse_search_output(output):
+    feedback = incremental_grounding.SearchFeedback()
+    for line in output.splitlines(keepends=True):
+        feedback.parse_line(line)
+    return feedback
+
+
+def test_search_feedback():
+    feedback = parse_search_output(EXHAUSTED_SEARCH_OUTPUT)
+    assert feedback.exhausted
+    assert feedback.initial_values == {
+        "lmcount(lm_reasonable_orders_hps(lm_rhw()), pref = true)": 9, "ff": 10}
+    assert feedback.best_values == {
+        "lmcount(lm_reasonable_orders_hps(lm_rhw()), pref = true)": 8, "ff": 1}
+    assert feedback.evaluated == 200
+    assert feedback.dead_ends == 30
+    assert feedback.get_progress() == pytest.approx(0.9)
+    assert feedback.get_dead_end_ratio() == pytest.approx(0.15)
+
+    feedback = parse_search_output(
+        "[t=0.004s, 9924 KB] Initial heuristic value for ff: infinity\n")
+    assert feedback.get_progress() is None
+    assert feedback.get_dead_end_ratio() is None
+    assert not feedback.exhausted
+
+
+def test_adaptive_step_size():
+    exhausted = parse_search_output(EXHAUSTED_SEARCH_OUTPUT)
+    step_size = incremental_grounding.AdaptiveStepSize(10000, None, 300)
+    step_size.update(1, returncodes.SEARCH_UNSOLVABLE, exhausted, {"translate": 5, "search": 5})
+    assert (step_size.increment, step_size.search_time_limit) == (5000, 300)
+    step_size.update(2, returncodes.SEARCH_UNSOLVABLE, exhausted, {"translate": 5, "search": 5})
+    step_size.update(3, returncodes.SEARCH_UNSOLVABLE, exhausted, {"translate": 5, "search": 5})
+    assert step_size.increment == 2500
+
+    stuck = parse_search_output("Initial heuristic value for ff: 10\n")
+    for iteration in range(4, 14):
+        step_size.update(iteration, returncodes.SEARCH_UNSOLVABLE, stuck,
+                         {"translate": 5, "search": 5})
+    assert step_size.increment == 160000
+
+    progressing = parse_search_output(
+        "Initial heuristic value for ff: 10\nNew best heuristic value for ff: 4\n")
+    for iteration in range(14, 20):
+        step_size.update(iteration, returncodes.SEARCH_OUT_OF_TIME, progressing,
+                         {"translate": 5, "search": 300})
+    assert (step_size.increment, step_size.search_time_limit) == (160000, 2400)
+    step_size.update(20, returncodes.SEARCH_OUT_OF_MEMORY, stuck, {"search": 10})
+    assert (step_size.increment, step_size.search_time_limit) == (160000, 2400)
+
+
+def test_adaptive_step_size_scales_percentage():
+    step_size = incremental_grounding.AdaptiveStepSize(None, 20, 300)
+    stuck = parse_search_output("Initial heuristic value for ff: 10\n")
+    step_size.update(1, returncodes.SEARCH_OUT_OF_TIME, stuck, {"translate": 5, "search": 300})
+    assert step_size.increment is None
+    assert step_size.percentage == 40
+    assert step_size.search_time_limit == 300
@@ -0,0 +1,125 @@
+#! /usr/bin/env python3
+
+
+HELP = """\
+Compare the backends of the translator's model computation (build_model).
+Every task is translated once per backend and join ordering. The script
+reports the time spent in "Computing model" and the peak memory of the
+translator, and checks that all backends produce the same output file. The
+seminaive backend grounds the operators in a different order, so for it only
+the sizes of the translated tasks are compared.
+"""
+
+import argparse
+import os
+from pathlib import Path
+import re
+import subprocess
+import sys
+import tempfile
+
+
+DIR = Path(__file__).resolve().parent
+REPO = DIR.parents[1]
+TRANSLATE = REPO / "src" / "translate" / "translate.py"
+BACKENDS = ["default", "interned", "seminaive"]
+# Backends that process atoms in the same order as the default backend.
+ORDER_PRESERVING_BACKENDS = ["default", "interned"]
+JOIN_ORDERINGS = ["greedy", "cost"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=HELP)
+    parser.add_argument(
+        "benchmarks_dir",
+        help="path to benchmark directory")
+    parser.add_argument(
+        "suite", nargs="*", default=["first"],
+        help='Use "all" to test all benchmarks, '
+             '"first" to test the first task of each domain (default), '
+             'or "<domain>:<problem>" to test individual tasks')
+    parser.add_argument(
+        "--backends", nargs="+", default=ORDER_PRESERVING_BACKENDS, choices=BACKENDS,
+        help="backends to compare (default: %(default)s)")
+    parser.add_argument(
+        "--join-orderings", nargs="+", default=["greedy"], choices=JOIN_ORDERINGS,
+        help="orders of the joins of the Datalog rules to compare (see "
+             "--join-ordering of the translator; default: %(default)s)")
+    parser.add_argument(
+        "--translator-options", nargs=argparse.REMAINDER, default=[],
+        help="additional options passed to every translator call, e.g. "
+             "--grounding-action-queue-ordering or --termination-condition")
+    args = parser.parse_args()
+    args.benchmarks_dir = Path(args.benchmarks_dir).resolve()
+    return args
+
+
+def get_tasks(args):
+    domains = sorted(
+        d for d in args.benchmarks_dir.iterdir()
+        if d.is_dir() and not d.name.startswith((".", "_")))
+    suite = []
+    for task in args.suite:
+        if task in ["first", "all"]:
+            for domain in domains:
+                problems = sorted(
+                    f for f in domain.iterdir()
+                    if f.suffix == ".pddl" and "domain" not in f.name)
+                suite.extend(problems[:1] if task == "first" else problems)
+        else:
+            suite.append(args.benchmarks_dir / task.replace(":", "/"))
+    return suite
+
+
+def find_domain(task_file):
+    for name in ["domain.pddl", "domain_" + task_file.name,
+                 task_file.stem + "-domain.pddl"]:
+        domain_file = task_file.parent / name
+        if domain_file.exists():
+            return domain_file
+    sys.exit(f"Error: no domain file found for {task_file}")
+
+
+def translate(task_file, backend, join_ordering, sas_file, translator_options):
+    cmd = [sys.executable, str(TRANSLATE), str(find_domain(task_file)),
+           str(task_file), "--sas-file", sas_file,
+           "--compute-model-backend", backend,
+           "--join-ordering", join_ordering] + translator_options
+    try:
+        output = subprocess.check_output(cmd, encoding=sys.getfilesystemencoding())
+    except (OSError, subprocess.CalledProcessError) as err:
+        sys.exit(f"Call failed: {' '.join(cmd)}\n{err}")
+    time = re.search(r"Computing model\.\.\. \[(.+)s CPU, .+s wall-clock\]", output)
+    memory = re.search(r"Translator peak memory: (\d+) KB", output)
+    sizes = re.findall(r"Translator (?:variables|operators|axioms): (\d+)", output)
+    return float(time.group(1)), int(memory.group(1)), sizes
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        print("{:40} {:>10} {:>8} {:>12} {:>12}".format(
+            "task", "backend", "joins", "time (s)", "memory (KB)"))
+        for task in get_tasks(args):
+            name = "-".join(str(task).split("/")[-2:])
+            outputs = []
+            task_sizes = []
+            for backend in args.backends:
+                for join_ordering in args.join_orderings:
+                    sas_file = f"{backend}-{join_ordering}.sas"
+                    time, memory, sizes = translate(
+                        task, backend, join_ordering, sas_file, args.translator_options)
+                    print(f"{name:40} {backend:>10} {join_ordering:>8} {time:12.3f} "
+                          f"{memory:12d}", flush=True)
+                    task_sizes.append(sizes)
+                    if backend in ORDER_PRESERVING_BACKENDS:
+                        with open(sas_file) as output:
+                            outputs.append(output.read())
+            if (any(output != outputs[0] for output in outputs) or
+                    any(sizes != task_sizes[0] for sizes in task_sizes)):
+                sys.exit(f"Error: backends produce different outputs for {task}.")
+
+
+if __name__ == "__main__":
+    main()
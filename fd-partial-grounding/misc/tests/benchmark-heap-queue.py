@@ -0,0 +1,186 @@
+#! /usr/bin/env python3
+
+
+HELP = """\
+Micro-benchmark for the SortedHeapQueue of the grounding action queues.
+The translator is run on a task while all calls to SortedHeapQueue are
+recorded. The recorded stream of pushes, pops and hard action lookups is then
+replayed on the current SortedHeapQueue and on a reference implementation
+that pushes every action with heappush and rebuilds the heap after every
+removal (the previous implementation). Both must return the same actions.
+
+The action queue ordering must be one that uses SortedHeapQueue, e.g.
+"random", "noveltyfifo" or one of the trained queues (pass the model with
+--translator-options).
+"""
+
+import argparse
+import heapq
+import os
+from pathlib import Path
+import pickle
+import sys
+import tempfile
+import time
+
+
+DIR = Path(__file__).resolve().parent
+REPO = DIR.parents[1]
+TRANSLATE_DIR = REPO / "src" / "translate"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=HELP)
+    parser.add_argument("domain", nargs="?", help="path to domain file")
+    parser.add_argument("problem", nargs="?", help="path to problem file")
+    parser.add_argument(
+        "--queue", default="random",
+        help="action queue ordering used when recording (default: %(default)s)")
+    parser.add_argument(
+        "--stream",
+        help="file for the recorded stream. If the file exists and no task is "
+             "given, the stream is loaded from it instead of being recorded.")
+    parser.add_argument(
+        "--repetitions", type=int, default=5,
+        help="number of replays per implementation (default: %(default)d)")
+    parser.add_argument(
+        "--translator-options", nargs=argparse.REMAINDER, default=[],
+        help="additional options passed to the translator")
+    args = parser.parse_args()
+    if not args.problem and not (args.stream and os.path.exists(args.stream)):
+        parser.error("need a task or an existing stream file")
+    return args
+
+
+def record(args):
+    """Run the translator in this process and return the list of
+    (queue id, method, arguments) calls to SortedHeapQueue and the min_wins
+    flag of each queue. Actions are replaced by numbers."""
+    sys.argv = ["translate.py", args.domain, args.problem,
+                "--sas-file", os.path.join(tempfile.gettempdir(), "heap-queue.sas"),
+                "--grounding-action-queue-ordering", args.queue] + args.translator_options
+    sys.path.insert(0, str(TRANSLATE_DIR))
+    import translate
+    from subdominization.priority_queue import SortedHeapQueue
+
+    stream = []
+    min_wins = {}
+    queue_ids = {}
+    action_ids = {}
+    original_methods = {}
+
+    def get_queue_id(queue):
+        queue_id = queue_ids.setdefault(id(queue), len(queue_ids))
+        min_wins[queue_id] = queue.min_wins
+        return queue_id
+
+    def get_action_id(action):
+        return action_ids.setdefault(id(action), len(action_ids))
+
+    def wrap(name, convert_args):
+        method = original_methods[name] = getattr(SortedHeapQueue, name)
+        def wrapper(queue, *method_args):
+            result = method(queue, *method_args)
+            stream.append((get_queue_id(queue), name, convert_args(method_args, result)))
+            return result
+        setattr(SortedHeapQueue, name, wrapper)
+
+    wrap("push", lambda a, _: (get_action_id(a[0]), a[1]))
+    wrap("push_list", lambda a, _: ([get_action_id(x) for x in a[0]], list(a[1])))
+    wrap("pop", lambda a, _: ())
+    wrap("pop_entry", lambda a, _: ())
+    wrap("notify_new_hard_actions", lambda a, _: ())
+    # Remember the action that was found, so that the replay can find the
+    # same one with both implementations.
+    wrap("get_hard_action_if_exists",
+         lambda a, result: (get_action_id(result[0]) if result else None,))
+    try:
+        translate.main()
+    finally:
+        for name, method in original_methods.items():
+            setattr(SortedHeapQueue, name, method)
+    return stream, min_wins
+
+
+class ReferenceHeapQueue:
+    def __init__(self, min_wins):
+        self.queue = []
+        self.count = 0
+        self.min_wins = min_wins
+    def get_hard_action_if_exists(self, is_hard_action):
+        for i in range(len(self.queue)):
+            action = self.queue[i][2]
+            if is_hard_action(action):
+                del self.queue[i]
+                heapq.heapify(self.queue)
+                return [action]
+        return []
+    def notify_new_hard_actions(self):
+        pass
+    def push(self, action, estimate):
+        heapq.heappush(self.queue, (estimate if self.min_wins else -estimate,
+                                    self.count, action))
+        self.count += 1
+    def push_list(self, actions, estimates):
+        for action, estimate in zip(actions, estimates):
+            self.push(action, estimate)
+    def pop(self):
+        return heapq.heappop(self.queue)[2]
+    def pop_entry(self):
+        entry = heapq.heappop(self.queue)
+        return entry[0] if self.min_wins else -entry[0], entry[2]
+
+
+def replay(stream, queue_class, min_wins):
+    queues = {}
+    popped = []
+    start = time.perf_counter()
+    for queue_id, name, call_args in stream:
+        queue = queues.get(queue_id)
+        if queue is None:
+            queue = queues[queue_id] = queue_class(min_wins[queue_id])
+        if name == "get_hard_action_if_exists":
+            target = call_args[0]
+            popped.append(queue.get_hard_action_if_exists(lambda action: action == target))
+        elif name in ["pop", "pop_entry"]:
+            popped.append(getattr(queue, name)())
+        else:
+            getattr(queue, name)(*call_args)
+    return time.perf_counter() - start, popped
+
+
+def main():
+    args = parse_args()
+    if args.problem:
+        stream, min_wins = record(args)
+        if args.stream:
+            with open(args.stream, "wb") as stream_file:
+                pickle.dump((stream, min_wins), stream_file)
+    else:
+        with open(args.stream, "rb") as stream_file:
+            stream, min_wins = pickle.load(stream_file)
+        # The translator options are parsed when the options module is
+        # imported and need a domain and a problem.
+        sys.argv = ["translate.py", "domain.pddl", "problem.pddl"]
+    sys.path.insert(0, str(TRANSLATE_DIR))
+    from subdominization.priority_queue import SortedHeapQueue
+
+    num_pushes = sum(len(call_args[0]) if name == "push_list" else 1
+                     for _, name, call_args in stream if name.startswith("push"))
+    num_pops = sum(1 for _, name, _ in stream if name.startswith("pop"))
+    print(f"Recorded {len(stream)} calls: {num_pushes} pushed actions, {num_pops} pops.")
+    results = {}
+    for queue_class in [ReferenceHeapQueue, SortedHeapQueue]:
+        times = []
+        for _ in range(args.repetitions):
+            duration, popped = replay(stream, queue_class, min_wins)
+            times.append(duration)
+        results[queue_class.__name__] = popped
+        print(f"{queue_class.__name__:20} min {min(times):.3f}s "
+              f"median {sorted(times)[len(times) // 2]:.3f}s")
+    if results["ReferenceHeapQueue"] != results["SortedHeapQueue"]:
+        sys.exit("Error: implementations pop different actions.")
+
+
+if __name__ == "__main__":
+    main()
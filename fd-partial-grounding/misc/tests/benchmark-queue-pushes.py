@@ -0,0 +1,144 @@
+#! /usr/bin/env python3
+
+
+HELP = """\
+Time the model computation of one or more translators on generated tasks
+with many duplicate pushes to the atom queue.
+
+"fanout" has an action with three parameters and eight effects over
+subsets of them, so every effect atom is pushed once per action that adds
+it. "reach" derives reachability in a dense random graph through an
+auxiliary join predicate. For every translator, the script prints the
+number of queue pushes, the final queue length and the minimum and median
+CPU time of "Computing model" over the repetitions. Pass the translate.py
+files of two checkouts to compare revisions; their SAS files must be equal.
+"""
+
+import argparse
+import filecmp
+from pathlib import Path
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+DIR = Path(__file__).resolve().parent
+REPO = DIR.parents[1]
+TRANSLATE = REPO / "src" / "translate" / "translate.py"
+
+FANOUT_DOMAIN = """\
+(define (domain fanout)
+  (:requirements :strips)
+  (:predicates (p ?x) (e1 ?x) (e2 ?x) (e3 ?x) (e4 ?x) (e5 ?x) (e6 ?x)
+               (f1 ?x ?y) (f2 ?x ?y))
+  (:action act
+    :parameters (?a ?b ?c)
+    :precondition (and (p ?a) (p ?b) (p ?c))
+    :effect (and (e1 ?a) (e2 ?b) (e3 ?c) (e4 ?a) (e5 ?b) (e6 ?c)
+                 (f1 ?a ?b) (f2 ?b ?c))))
+"""
+
+REACH_DOMAIN = """\
+(define (domain reach)
+  (:requirements :strips :derived-predicates)
+  (:predicates (edge ?x ?y) (start ?x) (reachable ?x) (visited ?x))
+  (:derived (reachable ?y) (start ?y))
+  (:derived (reachable ?y) (exists (?x) (and (reachable ?x) (edge ?x ?y))))
+  (:action visit
+    :parameters (?x)
+    :precondition (reachable ?x)
+    :effect (visited ?x)))
+"""
+
+
+def write_fanout_task(directory, size):
+    objects = ["o%d" % i for i in range(size)]
+    init = " ".join("(p %s)" % obj for obj in objects)
+    problem = ("(define (problem fanout-%d) (:domain fanout) (:objects %s) "
+               "(:init %s) (:goal (and (e1 o1) (f2 o1 o2))))" % (size, " ".join(objects), init))
+    return _write_task(directory, "fanout", FANOUT_DOMAIN, problem)
+
+
+def write_reach_task(directory, size):
+    rng = random.Random(size)
+    objects = ["n%d" % i for i in range(size)]
+    edges = sorted({(i, j) for i in range(size) for j in rng.sample(range(size), size // 3)})
+    init = " ".join("(edge n%d n%d)" % edge for edge in edges)
+    goal = " ".join("(visited n%d)" % i for i in range(0, size, 7))
+    problem = ("(define (problem reach-%d) (:domain reach) (:objects %s) "
+               "(:init (start n0) %s) (:goal (and %s)))" % (size, " ".join(objects), init, goal))
+    return _write_task(directory, "reach", REACH_DOMAIN, problem)
+
+
+def _write_task(directory, name, domain, problem):
+    domain_file = directory / ("%s-domain.pddl" % name)
+    problem_file = directory / ("%s-problem.pddl" % name)
+    domain_file.write_text(domain)
+    problem_file.write_text(problem)
+    return name, domain_file, problem_file
+
+
+def run_translator(translate, domain_file, problem_file, sas_file):
+    output = subprocess.check_output(
+        [sys.executable, str(translate), str(domain_file), str(problem_file),
+         "--sas-file", str(sas_file)], encoding="utf-8")
+    time = float(re.search(r"^Computing model\.\.\. \[([\d.]+)s CPU", output, re.M).group(1))
+    pushes = int(re.search(r"^(\d+) total queue pushes", output, re.M).group(1))
+    final = int(re.search(r"^(\d+) final queue length", output, re.M).group(1))
+    return time, pushes, final
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=HELP)
+    parser.add_argument(
+        "translators", nargs="*", default=[str(TRANSLATE)],
+        help="translate.py files to compare (default: the one of this checkout)")
+    parser.add_argument(
+        "--fanout-size", type=int, default=45,
+        help="number of objects of the fanout task (default: %(default)s)")
+    parser.add_argument(
+        "--reach-size", type=int, default=600,
+        help="number of nodes of the reach task (default: %(default)s)")
+    parser.add_argument(
+        "--repetitions", type=int, default=5,
+        help="number of runs per translator and task (default: %(default)s)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        tasks = [write_fanout_task(directory, args.fanout_size),
+                 write_reach_task(directory, args.reach_size)]
+        print("{:8} {:>10} {:>10} {:>9} {:>9}  {}".format(
+            "task", "pushes", "final", "min (s)", "med (s)", "translator"))
+        for name, domain_file, problem_file in tasks:
+            sas_files = []
+            times = [[] for _ in args.translators]
+            counts = [None for _ in args.translators]
+            # Alternate the translators so that load changes affect all of them.
+            for _ in range(args.repetitions):
+                for index, translate in enumerate(args.translators):
+                    sas_file = directory / ("%s-%d.sas" % (name, index))
+                    time, pushes, final = run_translator(
+                        translate, domain_file, problem_file, sas_file)
+                    times[index].append(time)
+                    counts[index] = (pushes, final)
+                    if sas_file not in sas_files:
+                        sas_files.append(sas_file)
+            for translate, translator_times, (pushes, final) in zip(
+                    args.translators, times, counts):
+                print("{:8} {:10d} {:10d} {:9.3f} {:9.3f}  {}".format(
+                    name, pushes, final, min(translator_times),
+                    statistics.median(translator_times), translate))
+            if not all(filecmp.cmp(sas_files[0], other, shallow=False)
+                       for other in sas_files[1:]):
+                print("WARNING: the translators wrote different SAS files for %s." % name)
+
+
+if __name__ == "__main__":
+    main()
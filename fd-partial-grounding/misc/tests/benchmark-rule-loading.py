@@ -0,0 +1,80 @@
+#! /usr/bin/env python3
+
+
+HELP = """\
+Measure the time needed to load a file of partial grounding rules (e.g. the
+output of generate-exhaustive-feature-rules.py) for a task, once with the
+rule evaluator of the translator and once with the rule evaluator of the
+learning scripts. The time spent computing the facts that match the body
+atoms of the rules is reported separately.
+"""
+
+import argparse
+import cProfile
+from pathlib import Path
+import pstats
+import sys
+import time
+
+
+DIR = Path(__file__).resolve().parent
+REPO = DIR.parents[1]
+TRANSLATE_DIR = REPO / "src" / "translate"
+LEARNING_DIR = REPO.parent / "learning"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=HELP)
+    parser.add_argument("domain", help="path to domain file")
+    parser.add_argument("problem", help="path to problem file")
+    parser.add_argument("rules", help="path to rules file")
+    parser.add_argument(
+        "--evaluator", choices=["translate", "learning"], default="translate",
+        help="rule evaluator to use (default: %(default)s)")
+    return parser.parse_args()
+
+
+def load_translate(args, rules):
+    # The translator options are parsed when the options module is imported.
+    sys.argv = ["translate.py", args.domain, args.problem]
+    sys.path.insert(0, str(TRANSLATE_DIR))
+    import pddl_parser
+    from subdominization import rule_evaluator
+    task = pddl_parser.open(args.domain, args.problem)
+    return rule_evaluator, lambda: rule_evaluator.RulesEvaluator(rules, task)
+
+
+def load_learning(args, rules):
+    sys.path.insert(0, str(LEARNING_DIR / "translate"))
+    sys.path.insert(0, str(LEARNING_DIR / "learning-sklearn"))
+    from pddl_parser import lisp_parser, parsing_functions
+    from rule_evaluator import rule_evaluator
+    with open(args.domain) as domain_file, open(args.problem) as problem_file:
+        task = parsing_functions.parse_task(lisp_parser.parse_nested_list(domain_file),
+                                            lisp_parser.parse_nested_list(problem_file))
+    return rule_evaluator, lambda: rule_evaluator.RulesEvaluator(rules, task)
+
+
+def main():
+    args = parse_args()
+    with open(args.rules) as rules_file:
+        rules = rules_file.readlines()
+    if args.evaluator == "translate":
+        module, load = load_translate(args, rules)
+    else:
+        module, load = load_learning(args, rules)
+
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    profile.runcall(load)
+    total = time.perf_counter() - start
+    stats = pstats.Stats(profile)
+    code = module.evaluate_inigoal_rule.__code__
+    inigoal = stats.stats.get((code.co_filename, code.co_firstlineno, code.co_name),
+                              (0, 0, 0, 0))[3]
+    print(f"Loaded {len(rules)} rules in {total:.2f}s (with profiling), "
+          f"{inigoal:.2f}s in evaluate_inigoal_rule.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#! /usr/bin/env python3
+
+
+HELP = """\
+Measure the passes that the translator applies to the SAS task after
+translating it: detecting unreachable propositions (simplify) and reordering
+and filtering variables (variable_order).
+
+"record" translates a task with these passes disabled and pickles the
+resulting SAS task. "run" loads such pickles and times the passes on them.
+It prints a hash of the resulting task, so the results of different
+revisions of the translator can be compared on the same recorded tasks.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+from pathlib import Path
+import pickle
+import sys
+import time
+
+
+DIR = Path(__file__).resolve().parent
+REPO = DIR.parents[1]
+TRANSLATE_DIR = REPO / "src" / "translate"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=HELP)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record = subparsers.add_parser("record", help="record the SAS task of a PDDL task")
+    record.add_argument("domain", help="path to domain file")
+    record.add_argument("problem", help="path to problem file")
+    record.add_argument("pickle", help="path of the pickle to write")
+    record.add_argument(
+        "--translator-options", nargs=argparse.REMAINDER, default=[],
+        help="additional translator options, e.g. --grounding-action-queue-ordering")
+    run = subparsers.add_parser("run", help="time the passes on recorded SAS tasks")
+    run.add_argument("pickles", nargs="+", help="paths of recorded SAS tasks")
+    run.add_argument(
+        "--repetitions", type=int, default=3,
+        help="number of runs per task; the minimum time is reported (default: %(default)s)")
+    return parser.parse_args()
+
+
+def record(args):
+    # The translator options are parsed when the options module is imported.
+    sys.argv = (["translate.py", args.domain, args.problem, "--keep-unreachable-facts",
+                 "--skip-variable-reordering", "--keep-unimportant-variables"] +
+                args.translator_options)
+    sys.path.insert(0, str(TRANSLATE_DIR))
+    import translate
+    task = translate.parse_and_normalize_task()
+    sas_task = translate.pddl_to_sas(task)
+    with open(args.pickle, "wb") as pickle_file:
+        pickle.dump(sas_task, pickle_file, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f"Recorded {len(sas_task.operators)} operators and "
+          f"{len(sas_task.variables.ranges)} variables in {args.pickle}.")
+
+
+def run(args):
+    sys.argv = ["translate.py", "domain.pddl", "problem.pddl"]
+    sys.path.insert(0, str(TRANSLATE_DIR))
+    import simplify
+    import variable_order
+
+    print("{:40} {:>10} {:>12} {:>12}  {}".format(
+        "task", "operators", "simplify (s)", "order (s)", "result"))
+    for filename in args.pickles:
+        simplify_times = []
+        order_times = []
+        for _ in range(args.repetitions):
+            with open(filename, "rb") as pickle_file:
+                sas_task = pickle.load(pickle_file)
+            num_operators = len(sas_task.operators)
+            # The passes print statistics that we are not interested in.
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.process_time()
+                try:
+                    simplify.filter_unreachable_propositions(sas_task)
+                except (simplify.Impossible, simplify.TriviallySolvable) as err:
+                    result = type(err).__name__
+                    simplify_times.append(time.process_time() - start)
+                    order_times.append(0)
+                    continue
+                simplify_times.append(time.process_time() - start)
+                start = time.process_time()
+                variable_order.find_and_apply_variable_order(sas_task)
+                order_times.append(time.process_time() - start)
+            output = io.StringIO()
+            sas_task.output(output)
+            result = hashlib.sha256(output.getvalue().encode()).hexdigest()[:16]
+        print(f"{Path(filename).name:40} {num_operators:10d} {min(simplify_times):12.3f} "
+              f"{min(order_times):12.3f}  {result}")
+
+
+def main():
+    args = parse_args()
+    if args.command == "record":
+        record(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(os.path.dirname(DIR))
+BENCHMARKS_DIR = os.path.join(REPO, "misc", "tests", "benchmarks")
+FAST_DOWNWARD = os.path.join(REPO, "fast-downward.py")
+SEARCH = os.path.join(REPO, "builds", "release", "bin", "downward")
+
+# The first bytes of a translator output file in the binary format.
+SAS_BINARY_MAGIC = b"\0sasbin\n"
+
+TASKS = {
+    "strips": "miconic/s1-0.pddl",
+    "axioms": "philosophers/p01-phil2.pddl",
+    "cond-eff": "miconic-simpleadl/s1-0.pddl",
+}
+
+
+def run_planner(tmp_path, task, sas_file_format):
+    sas_file = str(tmp_path / f"{sas_file_format}.sas")
+    plan_file = str(tmp_path / f"{sas_file_format}.plan")
+    subprocess.check_call([
+        sys.executable, FAST_DOWNWARD,
+        "--sas-file", sas_file, "--sas-file-format", sas_file_format,
+        "--plan-file", plan_file,
+        os.path.join(BENCHMARKS_DIR, task), "--search", "astar(blind())"], cwd=tmp_path)
+    with open(sas_file, "rb") as sas:
+        is_binary = sas.read(len(SAS_BINARY_MAGIC)) == SAS_BINARY_MAGIC
+    assert is_binary == (sas_file_format == "binary")
+    with open(plan_file) as plan:
+        return plan.read()
+
+
+@pytest.mark.skipif(not os.path.exists(SEARCH), reason="the search component is not built")
+@pytest.mark.parametrize("task", sorted(TASKS.values()))
+def test_binary_sas_file_gives_same_plan(tmp_path, task):
+    binary_plan = run_planner(tmp_path, task, "binary")
+    assert binary_plan == run_planner(tmp_path, task, "text")
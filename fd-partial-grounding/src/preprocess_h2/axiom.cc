@@ -7,20 +7,17 @@
 #include <cassert>
 using namespace std;
 
-Axiom::Axiom(istream &in, const vector<Variable *> &variables) {
+Axiom::Axiom(SASReader &in, const vector<Variable *> &variables) {
     check_magic(in, "begin_rule");
-    int count; // number of conditions
-    in >> count;
+    int count = in.read_int(); // number of conditions
     for (int i = 0; i < count; i++) {
-        int varNo, val;
-        in >> varNo >> val;
+        int varNo = in.read_int();
+        int val = in.read_int();
         conditions.push_back(Condition(variables[varNo], val));
     }
-    int varNo, oldVal, newVal;
-    in >> varNo >> oldVal >> newVal;
-    effect_var = variables[varNo];
-    old_val = oldVal;
-    effect_val = newVal;
+    effect_var = variables[in.read_int()];
+    old_val = in.read_int();
+    effect_val = in.read_int();
     check_magic(in, "end_rule");
 }
 
@@ -53,14 +50,20 @@ int Axiom::get_encoding_size() const {
     return 1 + conditions.size();
 }
 
-void Axiom::generate_cpp_input(ofstream &outfile) const {
+void Axiom::generate_cpp_input(SASWriter &out) const {
     assert(effect_var->get_level() != -1);
-    outfile << "begin_rule" << endl;
-    outfile << conditions.size() << endl;
+    out.write_line("begin_rule");
+    out.write_int(conditions.size());
+    out.end_line();
     for (const Condition &condition : conditions) {
         assert(condition.var->get_level() != -1);
-        outfile << condition.var->get_level() << " " << condition.cond << endl;
+        out.write_int(condition.var->get_level());
+        out.write_int(condition.cond);
+        out.end_line();
     }
-    outfile << effect_var->get_level() << " " << old_val << " " << effect_val << endl;
-    outfile << "end_rule" << endl;
+    out.write_int(effect_var->get_level());
+    out.write_int(old_val);
+    out.write_int(effect_val);
+    out.end_line();
+    out.write_line("end_rule");
 }
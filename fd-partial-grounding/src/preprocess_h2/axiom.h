@@ -5,6 +5,8 @@
 #include <fstream>
 #include <string>
 #include <vector>
+
+#include "sas_io.h"
 using namespace std;
 
 class Variable;
@@ -22,12 +24,12 @@ private:
     int effect_val;
     vector<Condition> conditions;    // var, val
 public:
-    Axiom(istream &in, const vector<Variable *> &variables);
+    Axiom(SASReader &in, const vector<Variable *> &variables);
 
     bool is_redundant() const;
     void dump() const;
     int get_encoding_size() const;
-    void generate_cpp_input(ofstream &outfile) const;
+    void generate_cpp_input(SASWriter &out) const;
     const vector<Condition> &get_conditions() const {return conditions; }
     Variable *get_effect_var() const {return effect_var; }
     int get_old_val() const {return old_val; }
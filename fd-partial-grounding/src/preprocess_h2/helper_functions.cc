@@ -19,9 +19,8 @@ static const int SAS_FILE_VERSION = 3;
 static const int PRE_FILE_VERSION = SAS_FILE_VERSION;
 
 
-void check_magic(istream &in, string magic) {
-    string word;
-    in >> word;
+void check_magic(SASReader &in, string magic) {
+    string word = in.read_word();
     if (word != magic) {
         cerr << "Failed to match magic word '" << magic << "'." << endl;
         cerr << "Got '" << word << "'." << endl;
@@ -34,10 +33,9 @@ void check_magic(istream &in, string magic) {
     }
 }
 
-void read_and_verify_version(istream &in) {
-    int version;
+void read_and_verify_version(SASReader &in) {
     check_magic(in, "begin_version");
-    in >> version;
+    int version = in.read_int();
     check_magic(in, "end_version");
     if (version != SAS_FILE_VERSION) {
         cerr << "Expected translator file version " << SAS_FILE_VERSION
@@ -47,16 +45,15 @@ void read_and_verify_version(istream &in) {
     }
 }
 
-void read_metric(istream &in, bool &metric) {
+void read_metric(SASReader &in, bool &metric) {
     check_magic(in, "begin_metric");
-    in >> metric;
+    metric = in.read_int();
     check_magic(in, "end_metric");
 }
 
-void read_variables(istream &in, vector<Variable> &internal_variables,
+void read_variables(SASReader &in, vector<Variable> &internal_variables,
                     vector<Variable *> &variables) {
-    int count;
-    in >> count;
+    int count = in.read_int();
     internal_variables.reserve(count);
     // Important so that the iterators stored in variables are valid.
     for (int i = 0; i < count; i++) {
@@ -65,22 +62,20 @@ void read_variables(istream &in, vector<Variable> &internal_variables,
     }
 }
 
-void read_mutexes(istream &in, vector<MutexGroup> &mutexes,
+void read_mutexes(SASReader &in, vector<MutexGroup> &mutexes,
                   const vector<Variable *> &variables) {
-    size_t count;
-    in >> count;
+    size_t count = in.read_int();
     for (size_t i = 0; i < count; ++i)
         mutexes.push_back(MutexGroup(in, variables));
 }
 
-void read_goal(istream &in, const vector<Variable *> &variables,
+void read_goal(SASReader &in, const vector<Variable *> &variables,
                vector<pair<Variable *, int>> &goals) {
     check_magic(in, "begin_goal");
-    int count;
-    in >> count;
+    int count = in.read_int();
     for (int i = 0; i < count; i++) {
-        int varNo, val;
-        in >> varNo >> val;
+        int varNo = in.read_int();
+        int val = in.read_int();
         goals.push_back(make_pair(variables[varNo], val));
     }
     check_magic(in, "end_goal");
@@ -93,23 +88,21 @@ void dump_goal(const vector<pair<Variable *, int>> &goals) {
              << goal.second << endl;
 }
 
-void read_operators(istream &in, const vector<Variable *> &variables,
+void read_operators(SASReader &in, const vector<Variable *> &variables,
                     vector<Operator> &operators) {
-    int count;
-    in >> count;
+    int count = in.read_int();
     for (int i = 0; i < count; i++)
         operators.push_back(Operator(in, variables));
 }
 
-void read_axioms(istream &in, const vector<Variable *> &variables,
+void read_axioms(SASReader &in, const vector<Variable *> &variables,
                  vector<Axiom> &axioms) {
-    int count;
-    in >> count;
+    int count = in.read_int();
     for (int i = 0; i < count; i++)
         axioms.push_back(Axiom(in, variables));
 }
 
-void read_preprocessed_problem_description(istream &in,
+void read_preprocessed_problem_description(SASReader &in,
                                            bool &metric,
                                            vector<Variable> &internal_variables,
                                            vector<Variable *> &variables,
@@ -147,37 +140,49 @@ void dump_preprocessed_problem_description(const vector<Variable *> &variables,
         axiom.dump();
 }
 
+static void write_version_and_metric(SASWriter &out, bool metric) {
+    out.write_line("begin_version");
+    out.write_int(PRE_FILE_VERSION);
+    out.end_line();
+    out.write_line("end_version");
+
+    out.write_line("begin_metric");
+    out.write_int(metric);
+    out.end_line();
+    out.write_line("end_metric");
+}
+
 void generate_cpp_input(const vector<Variable *> &ordered_vars,
                         const bool &metric,
                         const vector<MutexGroup> &mutexes,
                         const State &initial_state,
                         const vector<pair<Variable *, int>> &goals,
                         const vector<Operator> &operators,
-                        const vector<Axiom> &axioms) {
+                        const vector<Axiom> &axioms,
+                        bool binary) {
     ofstream outfile;
-    outfile.open("output.sas", ios::out);
+    outfile.open("output.sas", binary ? ios::out | ios::binary : ios::out);
+    SASWriter out(outfile, binary);
 
-    outfile << "begin_version" << endl;
-    outfile << PRE_FILE_VERSION << endl;
-    outfile << "end_version" << endl;
-
-    outfile << "begin_metric" << endl;
-    outfile << metric << endl;
-    outfile << "end_metric" << endl;
+    write_version_and_metric(out, metric);
 
     int num_vars = ordered_vars.size();
-    outfile << num_vars << endl;
+    out.write_int(num_vars);
+    out.end_line();
     for (Variable *var : ordered_vars)
-        var->generate_cpp_input(outfile);
+        var->generate_cpp_input(out);
 
-    outfile << mutexes.size() << endl;
+    out.write_int(mutexes.size());
+    out.end_line();
     for (const MutexGroup &mutex : mutexes)
-        mutex.generate_cpp_input(outfile);
+        mutex.generate_cpp_input(out);
 
-    outfile << "begin_state" << endl;
-    for (Variable *var : ordered_vars)
-        outfile << initial_state[var] << endl;  // for axioms default value
-    outfile << "end_state" << endl;
+    out.write_line("begin_state");
+    for (Variable *var : ordered_vars) {
+        out.write_int(initial_state[var]);  // for axioms default value
+        out.end_line();
+    }
+    out.write_line("end_state");
 
     vector<int> ordered_goal_values;
     ordered_goal_values.resize(num_vars, -1);
@@ -185,53 +190,75 @@ void generate_cpp_input(const vector<Variable *> &ordered_vars,
         int var_index = goal.first->get_level();
         ordered_goal_values[var_index] = goal.second;
     }
-    outfile << "begin_goal" << endl;
-    outfile << goals.size() << endl;
-    for (int i = 0; i < num_vars; i++)
-        if (ordered_goal_values[i] != -1)
-            outfile << i << " " << ordered_goal_values[i] << endl;
-    outfile << "end_goal" << endl;
-
-    outfile << operators.size() << endl;
+    out.write_line("begin_goal");
+    out.write_int(goals.size());
+    out.end_line();
+    for (int i = 0; i < num_vars; i++) {
+        if (ordered_goal_values[i] != -1) {
+            out.write_int(i);
+            out.write_int(ordered_goal_values[i]);
+            out.end_line();
+        }
+    }
+    out.write_line("end_goal");
+
+    out.write_int(operators.size());
+    out.end_line();
     for (const Operator &op : operators)
-        op.generate_cpp_input(outfile);
+        op.generate_cpp_input(out);
 
-    outfile << axioms.size() << endl;
+    out.write_int(axioms.size());
+    out.end_line();
     for (const Axiom &axiom : axioms)
-        axiom.generate_cpp_input(outfile);
+        axiom.generate_cpp_input(out);
 
     outfile.close();
 }
-void generate_unsolvable_cpp_input() {
+
+void generate_unsolvable_cpp_input(bool binary) {
     ofstream outfile;
-    outfile.open("output.sas", ios::out);
-    outfile << "begin_version" << endl;
-    outfile << PRE_FILE_VERSION << endl;
-    outfile << "end_version" << endl;
+    outfile.open("output.sas", binary ? ios::out | ios::binary : ios::out);
+    SASWriter out(outfile, binary);
 
-    outfile << "begin_metric" << endl << "1" << endl << "end_metric" << endl;
+    write_version_and_metric(out, true);
 
     //variables
-    outfile << "1" << endl << "begin_variable" << endl
-            << "var0" << endl
-            << "-1" << endl
-            << "2" << endl
-            << "Atom dummy(val1)" << endl
-            << "Atom dummy(val2)" << endl
-            << "end_variable" << endl;
+    out.write_int(1);
+    out.end_line();
+    out.write_line("begin_variable");
+    out.write_line("var0");
+    out.write_int(-1);
+    out.end_line();
+    out.write_int(2);
+    out.end_line();
+    out.write_line("Atom dummy(val1)");
+    out.write_line("Atom dummy(val2)");
+    out.write_line("end_variable");
 
     //Mutexes
-    outfile << "0" << endl;
+    out.write_int(0);
+    out.end_line();
 
     //Initial state and goal
-    outfile << "begin_state" << endl << "0" << endl << "end_state" << endl;
-    outfile << "begin_goal" << endl << "1" << endl << "0 1" << endl << "end_goal" << endl;
+    out.write_line("begin_state");
+    out.write_int(0);
+    out.end_line();
+    out.write_line("end_state");
+    out.write_line("begin_goal");
+    out.write_int(1);
+    out.end_line();
+    out.write_int(0);
+    out.write_int(1);
+    out.end_line();
+    out.write_line("end_goal");
 
     //Operators
-    outfile << "0" << endl;
+    out.write_int(0);
+    out.end_line();
 
     //Axioms
-    outfile << "0" << endl;
+    out.write_int(0);
+    out.end_line();
 
     outfile.close();
 }
@@ -1,6 +1,7 @@
 #ifndef HELPER_FUNCTIONS_H
 #define HELPER_FUNCTIONS_H
 
+#include "sas_io.h"
 #include "state.h"
 #include "variable.h"
 
@@ -16,7 +17,7 @@ class Operator;
 class Axiom;
 
 //void read_everything
-void read_preprocessed_problem_description(istream & in,
+void read_preprocessed_problem_description(SASReader &in,
                                            bool &metric,
                                            vector<Variable> &internal_variables,
                                            vector<Variable *> &variables,
@@ -33,14 +34,16 @@ void dump_preprocessed_problem_description(const vector<Variable *> &variables,
                                            const vector<Operator> &operators,
                                            const vector<Axiom> &axioms);
 
-void generate_unsolvable_cpp_input();
+// Write output.sas in the binary SAS format if binary is set.
+void generate_unsolvable_cpp_input(bool binary);
 void generate_cpp_input(const vector<Variable *> &ordered_var,
                         const bool &metric,
                         const vector<MutexGroup> &mutexes,
                         const State &initial_state,
                         const vector<pair<Variable *, int>> &goals,
                         const vector<Operator> &operators,
-                        const vector<Axiom> &axioms);
-void check_magic(istream & in, string magic);
+                        const vector<Axiom> &axioms,
+                        bool binary);
+void check_magic(SASReader &in, string magic);
 
 #endif
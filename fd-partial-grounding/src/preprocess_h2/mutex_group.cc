@@ -6,14 +6,13 @@
 #include <fstream>
 #include <iostream>
 
-MutexGroup::MutexGroup(istream &in, const vector<Variable *> &variables) : dir(FW) {
+MutexGroup::MutexGroup(SASReader &in, const vector<Variable *> &variables) : dir(FW) {
     //Mutex groups detected in the translator are "fw" mutexes
-    int size;
     check_magic(in, "begin_mutex_group");
-    in >> size;
+    int size = in.read_int();
     for (int i = 0; i < size; ++i) {
-        int var_no, value;
-        in >> var_no >> value;
+        int var_no = in.read_int();
+        int value = in.read_int();
         facts.push_back(make_pair(variables[var_no], value));
     }
     check_magic(in, "end_mutex_group");
@@ -53,14 +52,16 @@ void MutexGroup::dump() const {
     }
 }
 
-void MutexGroup::generate_cpp_input(ofstream &outfile) const {
-    outfile << "begin_mutex_group" << endl
-            << facts.size() << endl;
+void MutexGroup::generate_cpp_input(SASWriter &out) const {
+    out.write_line("begin_mutex_group");
+    out.write_int(facts.size());
+    out.end_line();
     for (const auto &fact : facts) {
-        outfile << fact.first->get_level()
-                << " " << fact.second << endl;
+        out.write_int(fact.first->get_level());
+        out.write_int(fact.second);
+        out.end_line();
     }
-    outfile << "end_mutex_group" << endl;
+    out.write_line("end_mutex_group");
 }
 
 void MutexGroup::strip_unimportant_facts() {
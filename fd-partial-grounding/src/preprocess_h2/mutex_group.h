@@ -4,6 +4,7 @@
 #include <iostream>
 #include <vector>
 #include "operator.h"
+#include "sas_io.h"
 #include "state.h"
 using namespace std;
 
@@ -18,7 +19,7 @@ class MutexGroup {
     Dir dir;
     vector<pair<const Variable *, int>> facts;
 public:
-    MutexGroup(istream &in, const vector<Variable *> &variables);
+    MutexGroup(SASReader &in, const vector<Variable *> &variables);
 
     MutexGroup(const vector<pair<int, int>> &f,
                const vector<Variable *> &variables,
@@ -35,7 +36,7 @@ public:
     int num_facts() const {
         return facts.size();
     }
-    void generate_cpp_input(ofstream &outfile) const;
+    void generate_cpp_input(SASWriter &out) const;
     void dump() const;
     void get_mutex_group(vector<pair<int, int>> &invariant_group) const;
 
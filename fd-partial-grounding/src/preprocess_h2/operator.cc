@@ -8,35 +8,33 @@
 #include <fstream>
 using namespace std;
 
-Operator::Operator(istream &in, const vector<Variable *> &variables) : spurious(false) {
+Operator::Operator(SASReader &in, const vector<Variable *> &variables) : spurious(false) {
     check_magic(in, "begin_operator");
-    in >> ws;
-    getline(in, name);
-    int count; // number of prevail conditions
-    in >> count;
+    name = in.read_line();
+    int count = in.read_int(); // number of prevail conditions
     for (int i = 0; i < count; i++) {
-        int varNo, val;
-        in >> varNo >> val;
+        int varNo = in.read_int();
+        int val = in.read_int();
         prevail.push_back(Prevail(variables[varNo], val));
     }
-    in >> count; // number of pre_post conditions
+    count = in.read_int(); // number of pre_post conditions
     for (int i = 0; i < count; i++) {
-        int eff_conds;
         vector<EffCond> ecs;
-        in >> eff_conds;
+        int eff_conds = in.read_int();
         for (int j = 0; j < eff_conds; j++) {
-            int var, value;
-            in >> var >> value;
+            int var = in.read_int();
+            int value = in.read_int();
             ecs.push_back(EffCond(variables[var], value));
         }
-        int varNo, val, newVal;
-        in >> varNo >> val >> newVal;
+        int varNo = in.read_int();
+        int val = in.read_int();
+        int newVal = in.read_int();
         if (eff_conds)
             pre_post.push_back(PrePost(variables[varNo], ecs, val, newVal));
         else
             pre_post.push_back(PrePost(variables[varNo], val, newVal));
     }
-    in >> cost;
+    cost = in.read_int();
     check_magic(in, "end_operator");
     // TODO: Evtl. effektiver: conditions schon sortiert einlesen?
 }
@@ -96,31 +94,39 @@ void strip_operators(vector<Operator> &operators) {
     cout << operators.size() << " of " << old_count << " operators necessary." << endl;
 }
 
-void Operator::generate_cpp_input(ofstream &outfile) const {
+void Operator::generate_cpp_input(SASWriter &out) const {
     //TODO: beim Einlesen in search feststellen, ob leerer Operator
-    outfile << "begin_operator" << endl;
-    outfile << name << endl;
+    out.write_line("begin_operator");
+    out.write_line(name);
 
-    outfile << prevail.size() << endl;
+    out.write_int(prevail.size());
+    out.end_line();
     for (const auto &prev : prevail) {
         assert(prev.var->get_level() != -1);
-        if (prev.var->get_level() != -1)
-            outfile << prev.var->get_level() << " " << prev.prev << endl;
+        if (prev.var->get_level() != -1) {
+            out.write_int(prev.var->get_level());
+            out.write_int(prev.prev);
+            out.end_line();
+        }
     }
 
-    outfile << pre_post.size() << endl;
+    out.write_int(pre_post.size());
+    out.end_line();
     for (const auto &eff : pre_post) {
         assert(eff.var->get_level() != -1);
-        outfile << eff.effect_conds.size();
-        for (const auto &cond : eff.effect_conds)
-            outfile << " " << cond.var->get_level()
-                    << " " << cond.cond;
-        outfile << " " << eff.var->get_level()
-                << " " << eff.pre
-                << " " << eff.post << endl;
+        out.write_int(eff.effect_conds.size());
+        for (const auto &cond : eff.effect_conds) {
+            out.write_int(cond.var->get_level());
+            out.write_int(cond.cond);
+        }
+        out.write_int(eff.var->get_level());
+        out.write_int(eff.pre);
+        out.write_int(eff.post);
+        out.end_line();
     }
-    outfile << cost << endl;
-    outfile << "end_operator" << endl;
+    out.write_int(cost);
+    out.end_line();
+    out.write_line("end_operator");
 }
 
 // Removes ambiguity in the preconditions,
@@ -7,6 +7,7 @@
 #include <vector>
 #include <list>
 #include <set>
+#include "sas_io.h"
 #include "variable.h"
 using namespace std;
 
@@ -85,14 +86,14 @@ private:
     std::vector<std::pair<Variable *, int>> augmented_preconditions_var;
     std::vector<std::pair<Variable *, int>> potential_preconditions_var;
 public:
-    Operator(istream &in, const vector<Variable *> &variables);
+    Operator(SASReader &in, const vector<Variable *> &variables);
 
     void strip_unimportant_effects();
     bool is_redundant() const;
 
     void dump() const;
     int get_encoding_size() const;
-    void generate_cpp_input(ofstream &outfile) const;
+    void generate_cpp_input(SASWriter &out) const;
     int get_cost() const {return cost; }
     string get_name() const {return name; }
     bool has_conditional_effects() const {
@@ -64,8 +64,10 @@ int main(int argc, const char **argv) {
         }
     }
 
+    // The output is written in the format of the input.
+    SASReader reader(cin);
     read_preprocessed_problem_description
-        (cin, metric, internal_variables, variables, mutexes, initial_state, goals, operators, axioms);
+        (reader, metric, internal_variables, variables, mutexes, initial_state, goals, operators, axioms);
     //dump_preprocessed_problem_description
     //  (variables, initial_state, goals, operators, axioms);
 
@@ -98,7 +100,7 @@ int main(int argc, const char **argv) {
                                 h2_mutex_time, disable_bw_h2)) {
             // TODO: don't duplicate the code to return an unsolvable task, log and exit here
             cout << "Unsolvable task in preprocessor" << endl;
-            generate_unsolvable_cpp_input();
+            generate_unsolvable_cpp_input(reader.is_binary());
             cout << "done" << endl;
             return 0;
         }
@@ -135,7 +137,7 @@ int main(int argc, const char **argv) {
         if (initial_state.remove_unreachable_facts()) {
             // TODO: don't duplicate the code to return an unsolvable task, log and exit here
             cout << "Unsolvable task in preprocessor" << endl;
-            generate_unsolvable_cpp_input();
+            generate_unsolvable_cpp_input(reader.is_binary());
             cout << "done" << endl;
             return 0;
         }
@@ -240,10 +242,11 @@ int main(int argc, const char **argv) {
     cout << "Writing output..." << endl;
     if (ordering.empty()) {
         cout << "Unsolvable task in preprocessor" << endl;
-        generate_unsolvable_cpp_input();
+        generate_unsolvable_cpp_input(reader.is_binary());
     } else {
         generate_cpp_input(
-            ordering, metric, mutexes, initial_state, goals, operators, axioms);
+            ordering, metric, mutexes, initial_state, goals, operators, axioms,
+            reader.is_binary());
     }
     cout << "done" << endl;
 }
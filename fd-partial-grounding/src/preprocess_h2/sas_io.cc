@@ -0,0 +1,94 @@
+#include "sas_io.h"
+
+#include <cstdlib>
+
+using namespace std;
+
+// A file in the text format cannot start with a null byte.
+const string SAS_BINARY_MAGIC("\0sasbin\n", 8);
+
+SASReader::SASReader(istream &in)
+    : in(in), binary(in.peek() == SAS_BINARY_MAGIC[0]) {
+    if (binary) {
+        string magic(SAS_BINARY_MAGIC.size(), '\0');
+        read_bytes(&magic[0], magic.size());
+        if (magic != SAS_BINARY_MAGIC) {
+            cerr << "Invalid binary translator output file." << endl;
+            exit(1);
+        }
+    }
+}
+
+void SASReader::read_bytes(char *buffer, size_t size) {
+    in.read(buffer, size);
+    if (!in) {
+        cerr << "Unexpected end of binary translator output file." << endl;
+        exit(1);
+    }
+}
+
+string SASReader::read_string() {
+    string result(read_int(), '\0');
+    read_bytes(&result[0], result.size());
+    return result;
+}
+
+int SASReader::read_int() {
+    int value;
+    if (binary) {
+        read_bytes(reinterpret_cast<char *>(&value), sizeof(value));
+    } else {
+        in >> value;
+    }
+    return value;
+}
+
+string SASReader::read_word() {
+    if (binary)
+        return read_string();
+    string word;
+    in >> word;
+    return word;
+}
+
+string SASReader::read_line() {
+    if (binary)
+        return read_string();
+    string line;
+    in >> ws;
+    getline(in, line);
+    return line;
+}
+
+SASWriter::SASWriter(ostream &out, bool binary)
+    : out(out), binary(binary), at_line_start(true) {
+    if (binary)
+        out.write(SAS_BINARY_MAGIC.data(), SAS_BINARY_MAGIC.size());
+}
+
+void SASWriter::write_int(int value) {
+    if (binary) {
+        out.write(reinterpret_cast<const char *>(&value), sizeof(value));
+    } else {
+        if (!at_line_start)
+            out << ' ';
+        out << value;
+        at_line_start = false;
+    }
+}
+
+void SASWriter::write_line(const string &line) {
+    if (binary) {
+        write_int(line.size());
+        out.write(line.data(), line.size());
+    } else {
+        out << line << '\n';
+    }
+}
+
+void SASWriter::end_line() {
+    if (!binary) {
+        out << '\n';
+        at_line_start = true;
+    }
+}
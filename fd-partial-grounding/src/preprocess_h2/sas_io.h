@@ -0,0 +1,45 @@
+#ifndef SAS_IO_H
+#define SAS_IO_H
+
+#include <iostream>
+#include <string>
+using namespace std;
+
+/*
+  Reading and writing of SAS files in the text format and in the binary
+  format of the translator (see SASBinaryWriter in translate/sas_tasks.py).
+  In the binary format, numbers are 32-bit integers in the byte order of
+  the machine and strings are their length followed by their bytes. Numbers
+  and strings come in the same order as in the text format, so the same
+  code reads and writes both formats.
+*/
+extern const string SAS_BINARY_MAGIC;
+
+class SASReader {
+    istream &in;
+    bool binary;
+
+    void read_bytes(char *buffer, size_t size);
+    string read_string();
+public:
+    explicit SASReader(istream &in);
+    bool is_binary() const {return binary; }
+    int read_int();
+    string read_word();
+    // Read the next line, skipping leading whitespace in the text format.
+    string read_line();
+};
+
+class SASWriter {
+    ostream &out;
+    bool binary;
+    bool at_line_start;
+public:
+    SASWriter(ostream &out, bool binary);
+    // Numbers on the same line are separated by spaces in the text format.
+    void write_int(int value);
+    void write_line(const string &line);
+    void end_line();
+};
+
+#endif
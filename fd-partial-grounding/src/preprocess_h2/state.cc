@@ -3,11 +3,10 @@
 
 class Variable;
 
-State::State(istream &in, const vector<Variable *> &variables) {
+State::State(SASReader &in, const vector<Variable *> &variables) {
     check_magic(in, "begin_state");
     for (Variable *var : variables) {
-        int value;
-        in >> value; //for axioms, this is default value
+        int value = in.read_int(); //for axioms, this is default value
         values[var] = value;
     }
     check_magic(in, "end_state");
@@ -4,6 +4,8 @@
 #include <iostream>
 #include <map>
 #include <vector>
+
+#include "sas_io.h"
 using namespace std;
 
 class Variable;
@@ -12,7 +14,7 @@ class State {
     map<Variable *, int> values;
 public:
     State() {} // TODO: Entfernen (erfordert kleines Redesign)
-    State(istream &in, const vector<Variable *> &variables);
+    State(SASReader &in, const vector<Variable *> &variables);
 
     int operator[](Variable *var) const;
     void dump() const;
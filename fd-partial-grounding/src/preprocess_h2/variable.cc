@@ -8,13 +8,14 @@
 
 using namespace std;
 
-Variable::Variable(istream &in) {
-    int range;
+Variable::Variable(SASReader &in) {
     check_magic(in, "begin_variable");
-    in >> ws >> name >> layer >> range >> ws;
+    name = in.read_word();
+    layer = in.read_int();
+    int range = in.read_int();
     values.resize(range);
     for (int i = 0; i < range; ++i)
-        getline(in, values[i]);
+        values[i] = in.read_line();
     check_magic(in, "end_variable");
     level = -1;
     necessary = false;
@@ -60,15 +61,17 @@ void Variable::dump() const {
     cout << "]" << endl;
 }
 
-void Variable::generate_cpp_input(ofstream &outfile) const {
-    outfile << "begin_variable" << endl
-            << name << endl
-            << layer << endl
-            << reachable_values << endl;
+void Variable::generate_cpp_input(SASWriter &out) const {
+    out.write_line("begin_variable");
+    out.write_line(name);
+    out.write_int(layer);
+    out.end_line();
+    out.write_int(reachable_values);
+    out.end_line();
     for (size_t i = 0; i < values.size(); ++i)
         if (reachable[i])
-            outfile << values[i] << endl;
-    outfile << "end_variable" << endl;
+            out.write_line(values[i]);
+    out.write_line("end_variable");
 }
 
 void Variable::remove_unreachable_facts() {
@@ -3,6 +3,8 @@
 
 #include <iostream>
 #include <vector>
+
+#include "sas_io.h"
 using namespace std;
 
 class Variable {
@@ -14,7 +16,7 @@ class Variable {
     vector<bool> reachable; //atorralba: added to prune unreachable values
     int reachable_values;
 public:
-    Variable(istream &in);
+    Variable(SASReader &in);
     void set_level(int level);
     void set_necessary();
     void reset_necessary(){necessary= false;}
@@ -24,7 +26,7 @@ public:
     string get_name() const;
     int get_layer() const {return layer; }
     bool is_derived() const {return layer != -1; }
-    void generate_cpp_input(ofstream &outfile) const;
+    void generate_cpp_input(SASWriter &out) const;
     void dump() const;
 
     string get_fact_name(int value) const {
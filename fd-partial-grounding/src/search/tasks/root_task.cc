@@ -22,6 +22,79 @@ namespace tasks {
 static const int PRE_FILE_VERSION = 3;
 shared_ptr<AbstractTask> g_root_task = nullptr;
 
+/*
+  First bytes of a translator output file in the binary format (see
+  SASBinaryWriter in translate/sas_tasks.py). A file in the text format
+  cannot start with a null byte.
+*/
+static const string SAS_BINARY_MAGIC("\0sasbin\n", 8);
+
+/*
+  Reads the numbers and strings of a translator output file in the text or
+  the binary format. In the binary format, numbers are 32-bit integers in
+  the byte order of the machine and strings are their length followed by
+  their bytes.
+*/
+class SASReader {
+    istream &in;
+    bool binary;
+
+    void read_bytes(char *buffer, size_t size) {
+        in.read(buffer, size);
+        if (!in) {
+            cerr << "Unexpected end of binary translator output file." << endl;
+            utils::exit_with(ExitCode::SEARCH_INPUT_ERROR);
+        }
+    }
+
+    string read_string() {
+        string result(read_int(), '\0');
+        read_bytes(&result[0], result.size());
+        return result;
+    }
+
+public:
+    explicit SASReader(istream &in)
+        : in(in), binary(in.peek() == SAS_BINARY_MAGIC[0]) {
+        if (binary) {
+            string magic(SAS_BINARY_MAGIC.size(), '\0');
+            read_bytes(&magic[0], magic.size());
+            if (magic != SAS_BINARY_MAGIC) {
+                cerr << "Invalid binary translator output file." << endl;
+                utils::exit_with(ExitCode::SEARCH_INPUT_ERROR);
+            }
+        }
+    }
+
+    int read_int() {
+        int value;
+        if (binary) {
+            read_bytes(reinterpret_cast<char *>(&value), sizeof(value));
+        } else {
+            in >> value;
+        }
+        return value;
+    }
+
+    string read_word() {
+        if (binary)
+            return read_string();
+        string word;
+        in >> word;
+        return word;
+    }
+
+    // Read the next line, skipping leading whitespace in the text format.
+    string read_line() {
+        if (binary)
+            return read_string();
+        string line;
+        in >> ws;
+        getline(in, line);
+        return line;
+    }
+};
+
 struct ExplicitVariable {
     int domain_size;
     string name;
@@ -29,7 +102,7 @@ struct ExplicitVariable {
     int axiom_layer;
     int axiom_default_value;
 
-    explicit ExplicitVariable(istream &in);
+    explicit ExplicitVariable(SASReader &in);
 };
 
 
@@ -48,8 +121,8 @@ struct ExplicitOperator {
     string name;
     bool is_an_axiom;
 
-    void read_pre_post(istream &in);
-    ExplicitOperator(istream &in, bool is_an_axiom, bool use_metric);
+    void read_pre_post(SASReader &in);
+    ExplicitOperator(SASReader &in, bool is_an_axiom, bool use_metric);
 };
 
 
@@ -67,7 +140,7 @@ class RootTask : public AbstractTask {
     const ExplicitOperator &get_operator_or_axiom(int index, bool is_axiom) const;
 
 public:
-    explicit RootTask(istream &in);
+    explicit RootTask(SASReader &in);
 
     virtual int get_num_variables() const override;
     virtual string get_variable_name(int var) const override;
@@ -134,9 +207,8 @@ static void check_facts(const ExplicitOperator &action, const vector<ExplicitVar
     }
 }
 
-void check_magic(istream &in, const string &magic) {
-    string word;
-    in >> word;
+void check_magic(SASReader &in, const string &magic) {
+    string word = in.read_word();
     if (word != magic) {
         cerr << "Failed to match magic word '" << magic << "'." << endl
              << "Got '" << word << "'." << endl;
@@ -149,28 +221,27 @@ void check_magic(istream &in, const string &magic) {
     }
 }
 
-vector<FactPair> read_facts(istream &in) {
-    int count;
-    in >> count;
+vector<FactPair> read_facts(SASReader &in) {
+    int count = in.read_int();
     vector<FactPair> conditions;
     conditions.reserve(count);
     for (int i = 0; i < count; ++i) {
         FactPair condition = FactPair::no_fact;
-        in >> condition.var >> condition.value;
+        condition.var = in.read_int();
+        condition.value = in.read_int();
         conditions.push_back(condition);
     }
     return conditions;
 }
 
-ExplicitVariable::ExplicitVariable(istream &in) {
+ExplicitVariable::ExplicitVariable(SASReader &in) {
     check_magic(in, "begin_variable");
-    in >> name;
-    in >> axiom_layer;
-    in >> domain_size;
-    in >> ws;
+    name = in.read_word();
+    axiom_layer = in.read_int();
+    domain_size = in.read_int();
     fact_names.resize(domain_size);
     for (int i = 0; i < domain_size; ++i)
-        getline(in, fact_names[i]);
+        fact_names[i] = in.read_line();
     check_magic(in, "end_variable");
 }
 
@@ -181,32 +252,30 @@ ExplicitEffect::ExplicitEffect(
 }
 
 
-void ExplicitOperator::read_pre_post(istream &in) {
+void ExplicitOperator::read_pre_post(SASReader &in) {
     vector<FactPair> conditions = read_facts(in);
-    int var, value_pre, value_post;
-    in >> var >> value_pre >> value_post;
+    int var = in.read_int();
+    int value_pre = in.read_int();
+    int value_post = in.read_int();
     if (value_pre != -1) {
         preconditions.emplace_back(var, value_pre);
     }
     effects.emplace_back(var, value_post, move(conditions));
 }
 
-ExplicitOperator::ExplicitOperator(istream &in, bool is_an_axiom, bool use_metric)
+ExplicitOperator::ExplicitOperator(SASReader &in, bool is_an_axiom, bool use_metric)
     : is_an_axiom(is_an_axiom) {
     if (!is_an_axiom) {
         check_magic(in, "begin_operator");
-        in >> ws;
-        getline(in, name);
+        name = in.read_line();
         preconditions = read_facts(in);
-        int count;
-        in >> count;
+        int count = in.read_int();
         effects.reserve(count);
         for (int i = 0; i < count; ++i) {
             read_pre_post(in);
         }
 
-        int op_cost;
-        in >> op_cost;
+        int op_cost = in.read_int();
         cost = use_metric ? op_cost : 1;
         check_magic(in, "end_operator");
     } else {
@@ -219,10 +288,9 @@ ExplicitOperator::ExplicitOperator(istream &in, bool is_an_axiom, bool use_metri
     assert(cost >= 0);
 }
 
-void read_and_verify_version(istream &in) {
-    int version;
+void read_and_verify_version(SASReader &in) {
     check_magic(in, "begin_version");
-    in >> version;
+    int version = in.read_int();
     check_magic(in, "end_version");
     if (version != PRE_FILE_VERSION) {
         cerr << "Expected translator output file version " << PRE_FILE_VERSION
@@ -232,17 +300,15 @@ void read_and_verify_version(istream &in) {
     }
 }
 
-bool read_metric(istream &in) {
-    bool use_metric;
+bool read_metric(SASReader &in) {
     check_magic(in, "begin_metric");
-    in >> use_metric;
+    bool use_metric = in.read_int() != 0;
     check_magic(in, "end_metric");
     return use_metric;
 }
 
-vector<ExplicitVariable> read_variables(istream &in) {
-    int count;
-    in >> count;
+vector<ExplicitVariable> read_variables(SASReader &in) {
+    int count = in.read_int();
     vector<ExplicitVariable> variables;
     variables.reserve(count);
     for (int i = 0; i < count; ++i) {
@@ -251,13 +317,12 @@ vector<ExplicitVariable> read_variables(istream &in) {
     return variables;
 }
 
-vector<vector<set<FactPair>>> read_mutexes(istream &in, const vector<ExplicitVariable> &variables) {
+vector<vector<set<FactPair>>> read_mutexes(SASReader &in, const vector<ExplicitVariable> &variables) {
     vector<vector<set<FactPair>>> inconsistent_facts(variables.size());
     for (size_t i = 0; i < variables.size(); ++i)
         inconsistent_facts[i].resize(variables[i].domain_size);
 
-    int num_mutex_groups;
-    in >> num_mutex_groups;
+    int num_mutex_groups = in.read_int();
 
     /*
       NOTE: Mutex groups can overlap, in which case the same mutex
@@ -268,14 +333,12 @@ vector<vector<set<FactPair>>> read_mutexes(istream &in, const vector<ExplicitVar
     */
     for (int i = 0; i < num_mutex_groups; ++i) {
         check_magic(in, "begin_mutex_group");
-        int num_facts;
-        in >> num_facts;
+        int num_facts = in.read_int();
         vector<FactPair> invariant_group;
         invariant_group.reserve(num_facts);
         for (int j = 0; j < num_facts; ++j) {
-            int var;
-            int value;
-            in >> var >> value;
+            int var = in.read_int();
+            int value = in.read_int();
             invariant_group.emplace_back(var, value);
         }
         check_magic(in, "end_mutex_group");
@@ -300,7 +363,7 @@ vector<vector<set<FactPair>>> read_mutexes(istream &in, const vector<ExplicitVar
     return inconsistent_facts;
 }
 
-vector<FactPair> read_goal(istream &in) {
+vector<FactPair> read_goal(SASReader &in) {
     check_magic(in, "begin_goal");
     vector<FactPair> goals = read_facts(in);
     check_magic(in, "end_goal");
@@ -312,10 +375,9 @@ vector<FactPair> read_goal(istream &in) {
 }
 
 vector<ExplicitOperator> read_actions(
-    istream &in, bool is_axiom, bool use_metric,
+    SASReader &in, bool is_axiom, bool use_metric,
     const vector<ExplicitVariable> &variables) {
-    int count;
-    in >> count;
+    int count = in.read_int();
     vector<ExplicitOperator> actions;
     actions.reserve(count);
     for (int i = 0; i < count; ++i) {
@@ -325,7 +387,7 @@ vector<ExplicitOperator> read_actions(
     return actions;
 }
 
-RootTask::RootTask(istream &in) {
+RootTask::RootTask(SASReader &in) {
     read_and_verify_version(in);
     bool use_metric = read_metric(in);
     variables = read_variables(in);
@@ -336,7 +398,7 @@ RootTask::RootTask(istream &in) {
     initial_state_values.resize(num_variables);
     check_magic(in, "begin_state");
     for (int i = 0; i < num_variables; ++i) {
-        in >> initial_state_values[i];
+        initial_state_values[i] = in.read_int();
     }
     check_magic(in, "end_state");
 
@@ -495,7 +557,8 @@ void RootTask::convert_ancestor_state_values(
 
 void read_root_task(istream &in) {
     assert(!g_root_task);
-    g_root_task = make_shared<RootTask>(in);
+    SASReader reader(in);
+    g_root_task = make_shared<RootTask>(reader);
 }
 
 static shared_ptr<AbstractTask> _parse(OptionParser &parser) {
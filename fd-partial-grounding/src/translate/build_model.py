@@ -1,12 +1,16 @@
 #! /usr/bin/env python3
 
 
+import array
 import sys
 import itertools
 
+import grounding_checkpoint
 import options
 import pddl
+import profiler
 import timers
+import tools
 from functools import reduce
 
 import subdominization.hard_rules as hr
@@ -55,11 +59,50 @@ def variables_to_numbers(effect, conditions):
         new_conditions.append(pddl.Atom(cond.predicate, new_cond_args))
     return new_effect, new_conditions
 
+# The rules, the unifier and the queue work on the argument tuples of atoms
+# instead of pddl.Atom objects. pddl.Atom objects are only created for atoms
+# that are part of the final model (see Queue).
+#
+# If the memory usage gets close to the memory limit, the indexes of the join
+# and product rules are compacted: instead of argument tuples, they store the
+# numbers of the objects bound to effect variables in arrays (see
+# GroundingState.compact_rule_indexes).
+
+class ObjectTable:
+    def __init__(self):
+        self.objects = []
+        self.object_ids = {}
+    def get_ids(self, objects):
+        object_ids = self.object_ids
+        result = []
+        for obj in objects:
+            obj_id = object_ids.get(obj)
+            if obj_id is None:
+                obj_id = len(self.objects)
+                object_ids[obj] = obj_id
+                self.objects.append(obj)
+            result.append(obj_id)
+        return result
+
+def _get_size(obj):
+    # Approximate size in bytes of an index, without the objects themselves.
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += sys.getsizeof(key) + _get_size(value)
+    elif isinstance(obj, (list, tuple)):
+        for entry in obj:
+            if isinstance(entry, (dict, list, tuple, array.array)):
+                size += _get_size(entry)
+    return size
+
 class BuildRule:
-    def prepare_effect(self, new_atom, cond_index):
+    # Set by compact_index.
+    object_table = None
+    def prepare_effect(self, new_args, cond_index):
         effect_args = list(self.effect.args)
         cond = self.conditions[cond_index]
-        for var_no, obj in zip(cond.args, new_atom.args):
+        for var_no, obj in zip(cond.args, new_args):
             if isinstance(var_no, int):
                 effect_args[var_no] = obj
         return effect_args
@@ -81,6 +124,35 @@ class JoinRule(BuildRule):
             [args.index(var) for var in common_vars]
             for args in (list(left_args), list(right_args))]
         self.atoms_by_key = ({}, {})
+    def compact_index(self, object_table):
+        # Only the arguments bound to effect variables that are not part of
+        # the key are needed in fire.
+        self.stored_positions = []
+        self.stored_var_nos = []
+        for cond, key_positions in zip(self.conditions,
+                                       self.common_var_positions):
+            positions = [pos for pos, var_no in enumerate(cond.args)
+                         if isinstance(var_no, int) and
+                         pos not in key_positions]
+            self.stored_positions.append(positions)
+            self.stored_var_nos.append([cond.args[pos] for pos in positions])
+        self.object_table = object_table
+        for cond_index, atoms_by_key in enumerate(self.atoms_by_key):
+            for key, atoms in atoms_by_key.items():
+                compact_atoms = array.array("i")
+                for args in atoms:
+                    self._append_compact(compact_atoms, args, cond_index)
+                atoms_by_key[key] = compact_atoms
+    def _append_compact(self, compact_atoms, args, cond_index):
+        positions = self.stored_positions[cond_index]
+        if positions:
+            compact_atoms.extend(self.object_table.get_ids(
+                [args[pos] for pos in positions]))
+        else:
+            # Keep one entry per atom, fire enqueues the effect once for each.
+            compact_atoms.append(0)
+    def get_index_size(self):
+        return _get_size(self.atoms_by_key)
     def validate(self):
         assert len(self.conditions) == 2, self
         left_args = self.conditions[0].args
@@ -94,25 +166,46 @@ class JoinRule(BuildRule):
                     if isinstance(v, int) or v[0] == "?"}
         assert left_vars & right_vars, self
         assert (left_vars | right_vars) == (left_vars & right_vars) | eff_vars, self
-    def update_index(self, new_atom, cond_index):
+    def update_index(self, new_args, cond_index):
         ordered_common_args = [
-            new_atom.args[position]
+            new_args[position]
             for position in self.common_var_positions[cond_index]]
         key = tuple(ordered_common_args)
-        self.atoms_by_key[cond_index].setdefault(key, []).append(new_atom)
-    def fire(self, new_atom, cond_index, enqueue_func):
-        effect_args = self.prepare_effect(new_atom, cond_index)
+        if self.object_table is None:
+            self.atoms_by_key[cond_index].setdefault(key, []).append(new_args)
+        else:
+            compact_atoms = self.atoms_by_key[cond_index].get(key)
+            if compact_atoms is None:
+                compact_atoms = array.array("i")
+                self.atoms_by_key[cond_index][key] = compact_atoms
+            self._append_compact(compact_atoms, new_args, cond_index)
+    def fire(self, new_args, cond_index, enqueue_func):
+        effect_args = self.prepare_effect(new_args, cond_index)
         ordered_common_args = [
-            new_atom.args[position]
+            new_args[position]
             for position in self.common_var_positions[cond_index]]
         key = tuple(ordered_common_args)
         other_cond_index = 1 - cond_index
         other_cond = self.conditions[other_cond_index]
-        for atom in self.atoms_by_key[other_cond_index].get(key, []):
-            for var_no, obj in zip(other_cond.args, atom.args):
+        if self.object_table is not None:
+            self._fire_compact(key, other_cond_index, effect_args, enqueue_func)
+            return
+        for args in self.atoms_by_key[other_cond_index].get(key, []):
+            for var_no, obj in zip(other_cond.args, args):
                 if isinstance(var_no, int):
                     effect_args[var_no] = obj
             enqueue_func(self.effect.predicate, effect_args)
+    def _fire_compact(self, key, other_cond_index, effect_args, enqueue_func):
+        compact_atoms = self.atoms_by_key[other_cond_index].get(key)
+        if compact_atoms is None:
+            return
+        objects = self.object_table.objects
+        var_nos = self.stored_var_nos[other_cond_index]
+        width = max(len(var_nos), 1)
+        for start in range(0, len(compact_atoms), width):
+            for offset, var_no in enumerate(var_nos):
+                effect_args[var_no] = objects[compact_atoms[start + offset]]
+            enqueue_func(self.effect.predicate, effect_args)
 
 class ProductRule(BuildRule):
     def __init__(self, effect, conditions):
@@ -120,6 +213,26 @@ class ProductRule(BuildRule):
         self.conditions = conditions
         self.atoms_by_index = [[] for c in self.conditions]
         self.empty_atom_list_no = len(self.conditions)
+    def compact_index(self, object_table):
+        self.stored_var_nos = [
+            [var_no for var_no in cond.args if isinstance(var_no, int)]
+            for cond in self.conditions]
+        self.object_table = object_table
+        for cond_index, atoms in enumerate(self.atoms_by_index):
+            compact_atoms = array.array("i")
+            for args in atoms:
+                self._append_compact(compact_atoms, args, cond_index)
+            self.atoms_by_index[cond_index] = compact_atoms
+    def _append_compact(self, compact_atoms, args, cond_index):
+        cond = self.conditions[cond_index]
+        if self.stored_var_nos[cond_index]:
+            compact_atoms.extend(self.object_table.get_ids(
+                [obj for var_no, obj in zip(cond.args, args)
+                 if isinstance(var_no, int)]))
+        else:
+            compact_atoms.append(0)
+    def get_index_size(self):
+        return _get_size(self.atoms_by_index)
     def validate(self):
         assert len(self.conditions) >= 2, self
         cond_vars = [{v for v in cond.args
@@ -130,17 +243,29 @@ class ProductRule(BuildRule):
                     if isinstance(v, int) or v[0] == "?"}
         assert len(all_cond_vars) == len(eff_vars), self
         assert len(all_cond_vars) == sum([len(c) for c in cond_vars])
-    def update_index(self, new_atom, cond_index):
+    def update_index(self, new_args, cond_index):
         atom_list = self.atoms_by_index[cond_index]
         if not atom_list:
             self.empty_atom_list_no -= 1
-        atom_list.append(new_atom)
+        if self.object_table is None:
+            atom_list.append(new_args)
+        else:
+            self._append_compact(atom_list, new_args, cond_index)
 
-    def _get_bindings(self, atom, cond):
-        return [(var_no, obj) for var_no, obj in zip(cond.args, atom.args)
+    def _get_bindings(self, args, cond):
+        return [(var_no, obj) for var_no, obj in zip(cond.args, args)
                 if isinstance(var_no, int)]
 
-    def fire(self, new_atom, cond_index, enqueue_func):
+    def _get_compact_bindings_factor(self, cond_index):
+        compact_atoms = self.atoms_by_index[cond_index]
+        objects = self.object_table.objects
+        var_nos = self.stored_var_nos[cond_index]
+        width = max(len(var_nos), 1)
+        return [[(var_no, objects[compact_atoms[start + offset]])
+                 for offset, var_no in enumerate(var_nos)]
+                for start in range(0, len(compact_atoms), width)]
+
+    def fire(self, new_args, cond_index, enqueue_func):
         if self.empty_atom_list_no:
             return
 
@@ -154,10 +279,13 @@ class ProductRule(BuildRule):
                 continue
             atoms = self.atoms_by_index[pos]
             assert atoms, "if we have no atoms, this should never be called"
-            factor = [self._get_bindings(atom, cond) for atom in atoms]
+            if self.object_table is None:
+                factor = [self._get_bindings(args, cond) for args in atoms]
+            else:
+                factor = self._get_compact_bindings_factor(pos)
             bindings_factors.append(factor)
 
-        eff_args = self.prepare_effect(new_atom, cond_index)
+        eff_args = self.prepare_effect(new_args, cond_index)
 
         for bindings_list in itertools.product(*bindings_factors):
             bindings = itertools.chain(*bindings_list)
@@ -172,10 +300,14 @@ class ProjectRule(BuildRule):
         self.conditions = conditions
     def validate(self):
         assert len(self.conditions) == 1
-    def update_index(self, new_atom, cond_index):
+    def compact_index(self, object_table):
+        pass
+    def get_index_size(self):
+        return 0
+    def update_index(self, new_args, cond_index):
         pass
-    def fire(self, new_atom, cond_index, enqueue_func):
-        effect_args = self.prepare_effect(new_atom, cond_index)
+    def fire(self, new_args, cond_index, enqueue_func):
+        effect_args = self.prepare_effect(new_args, cond_index)
         enqueue_func(self.effect.predicate, effect_args)
 
 class Unifier:
@@ -184,11 +316,11 @@ class Unifier:
         for rule in rules:
             for i, cond in enumerate(rule.conditions):
                 self._insert_condition(rule, i)
-    def unify(self, atom):
+    def unify(self, predicate, args):
         result = []
-        generator = self.predicate_to_rule_generator.get(atom.predicate)
+        generator = self.predicate_to_rule_generator.get(predicate)
         if generator:
-            generator.generate(atom, result)
+            generator.generate(args, result)
         return result
     def _insert_condition(self, rule, cond_index):
         condition = rule.conditions[cond_index]
@@ -215,7 +347,7 @@ class LeafGenerator:
         self.matches = []
     def empty(self):
         return not self.matches
-    def generate(self, atom, result):
+    def generate(self, args, result):
         result += self.matches
     def _insert(self, args, value):
         if not args:
@@ -242,12 +374,12 @@ class MatchGenerator:
         self.next = next
     def empty(self):
         return False
-    def generate(self, atom, result):
+    def generate(self, args, result):
         result += self.matches
-        generator = self.match_generator.get(atom.args[self.index])
+        generator = self.match_generator.get(args[self.index])
         if generator:
-            generator.generate(atom, result)
-        self.next.generate(atom, result)
+            generator.generate(args, result)
+        self.next.generate(args, result)
     def _insert(self, args, value):
         if not args:
             self.matches.append(value)
@@ -281,11 +413,16 @@ class MatchGenerator:
             self.next.dump(indent + "    ")
 
 class Queue:
+    """Derived atoms are queued as the (predicate, args) tuples that are
+    also stored in the enqueued set. When a relevant atom is popped, it is
+    replaced by a pddl.Atom, which the final model and the termination
+    condition need. Auxiliary atoms are only turned into pddl.Atom objects
+    in get_final_queue. Actions are passed to the action queue as pddl.Atom
+    objects."""
     def __init__(self, atoms, task):
         self.queue = atoms
         self.queue_pos = 0
-        self.enqueued = {(atom.predicate,) + tuple(atom.args)
-                         for atom in self.queue}
+        self.enqueued = {(atom.predicate, atom.args) for atom in atoms}
         self.num_pushes = len(atoms)
         if (options.hard_rules):
             self.action_queue = hr.get_hard_rules_from_options(qf.get_action_queue_from_options(task))
@@ -297,69 +434,187 @@ class Queue:
     __nonzero__ = __bool__
     def push(self, predicate, args):
         self.num_pushes += 1
-        eff_tuple = (predicate,) + tuple(args)
-        if eff_tuple not in self.enqueued:
-            self.enqueued.add(eff_tuple)
-            atom = pddl.Atom(predicate, list(args))
+        key = (predicate, tuple(args))
+        if key not in self.enqueued:
+            self.enqueued.add(key)
             if isinstance(predicate, pddl.Action):
-                self.action_queue.push(atom)
+                self.action_queue.push(pddl.Atom(predicate, key[1]))
             else:
-                self.queue.append(atom)
+                self.queue.append(key)
     def has_actions(self):
         return bool(self.action_queue)
     def get_number_popped_actions(self):
         return self.popped_actions
+    def get_num_enqueued(self):
+        return len(self.enqueued)
     def print_info(self):
         self.action_queue.print_info()
     def print_stats(self):
         self.action_queue.print_stats()
     def get_final_queue(self):
-        return self.queue + self.action_queue.get_final_queue()
-    def pop(self):
-        if (self.queue_pos < len(self.queue)):
-            result = self.queue[self.queue_pos]
-            self.queue_pos += 1
-            return result
-        else:
-            action = self.action_queue.pop()
-            self.popped_actions += 1
-            return action
+        queue = self.queue
+        for pos, atom in enumerate(queue):
+            if not isinstance(atom, pddl.Atom):
+                queue[pos] = pddl.Atom(*atom)
+        return queue + self.action_queue.get_final_queue()
+    def pop_action(self):
+        self.popped_actions += 1
+        return self.action_queue.pop()
 
-def compute_model(prog, task = None):
-    with timers.timing("Preparing model"):
-        rules = convert_rules(prog)
-        unifier = Unifier(rules)
-        # unifier.dump()
+# Number of popped atoms between two checks of the memory usage.
+MEMORY_CHECK_INTERVAL = 10000
+
+def get_memory_threshold_in_kb():
+    if options.grounding_memory_threshold is None:
+        return None
+    memory_limit = tools.get_memory_limit_in_kb()
+    if memory_limit is None:
+        print("No memory limit set: rule indexes will not be compacted.")
+        return None
+    return int(memory_limit * options.grounding_memory_threshold)
+
+class GroundingState:
+    """The data compute_model works on: the rule indexes, the unifier and
+    the atom and action queues. Keeping it in one object allows to store
+    it after one grounding run and to continue the fixpoint computation
+    later on (see grounding_checkpoint.py)."""
+    def __init__(self, prog, task):
+        self.rules = convert_rules(prog)
+        self.unifier = Unifier(self.rules)
+        # self.unifier.dump()
         fact_atoms = sorted(fact.atom for fact in prog.facts)
-        queue = Queue(fact_atoms, task)
+        self.queue = Queue(fact_atoms, task)
+        self.relevant_atoms = 0
+        self.auxiliary_atoms = 0
+        # Atoms passed to the termination condition so far, in order. Only
+        # recorded if the state may be resumed, because a resumed run uses a
+        # fresh termination condition that needs to be brought up to date.
+        self.notified_atoms = [] if grounding_checkpoint.is_written() else None
+        self.resumed = False
+        self.object_table = None
 
-    print("Generated %d rules." % len(rules))
-        
-    queue.print_info()
-    termination_condition = tc.get_termination_condition_from_options()
-    termination_condition.print_info()
+    def compact_rule_indexes(self):
+        self.object_table = ObjectTable()
+        for rule in self.rules:
+            rule.compact_index(self.object_table)
 
-    with timers.timing("Computing model"):
-        relevant_atoms = 0
-        auxiliary_atoms = 0
+    def print_rule_index_sizes(self):
+        print("Rule index sizes%s:" % (
+            " (compacted)" if self.object_table is not None else ""))
+        for rule in self.rules:
+            size = rule.get_index_size()
+            if size:
+                print("%d KB: %s" % (size // 1024, rule))
+
+    def run(self, termination_condition):
+        queue = self.queue
+        atoms = queue.queue
+        unifier = self.unifier
+        notified_atoms = self.notified_atoms
+        relevant_atoms = self.relevant_atoms
+        auxiliary_atoms = self.auxiliary_atoms
+        memory_threshold = None
+        if self.object_table is None:
+            memory_threshold = get_memory_threshold_in_kb()
         while queue or (queue.has_actions() and not termination_condition.terminate()):
-            next_atom = queue.pop()
-            pred = next_atom.predicate
-            if isinstance(pred, str) and "$" in pred:
-                auxiliary_atoms += 1
+            if queue.queue_pos < len(atoms):
+                next_atom = atoms[queue.queue_pos]
+                if isinstance(next_atom, tuple):
+                    pred, args = next_atom
+                else:
+                    # Facts of the initial state are pddl.Atom objects.
+                    pred, args = next_atom.predicate, next_atom.args
+                if isinstance(pred, str) and "$" in pred:
+                    auxiliary_atoms += 1
+                    next_atom = None
+                elif isinstance(next_atom, tuple):
+                    next_atom = pddl.Atom(pred, args)
+                    atoms[queue.queue_pos] = next_atom
+                queue.queue_pos += 1
             else:
+                next_atom = queue.pop_action()
+                pred, args = next_atom.predicate, next_atom.args
+            if next_atom is not None:
                 relevant_atoms += 1
                 termination_condition.notify_atom(next_atom)
-            matches = unifier.unify(next_atom)
+                if notified_atoms is not None:
+                    notified_atoms.append(next_atom)
+            matches = unifier.unify(pred, args)
             for rule, cond_index in matches:
-                rule.update_index(next_atom, cond_index)
-                rule.fire(next_atom, cond_index, queue.push)
+                rule.update_index(args, cond_index)
+                rule.fire(args, cond_index, queue.push)
+            if (memory_threshold is not None and
+                    not (relevant_atoms + auxiliary_atoms) % MEMORY_CHECK_INTERVAL):
+                memory = tools.get_memory_in_kb()
+                if memory > memory_threshold:
+                    print("Memory usage of %d KB exceeds threshold of %d KB." %
+                          (memory, memory_threshold))
+                    with timers.timing("Compacting rule indexes"):
+                        self.compact_rule_indexes()
+                    memory_threshold = None
+        self.relevant_atoms = relevant_atoms
+        self.auxiliary_atoms = auxiliary_atoms
+        if options.grounding_memory_threshold is not None:
+            self.print_rule_index_sizes()
+
+def prepare_model(prog, task = None):
+    backend = options.compute_model_backend
+    if backend == "seminaive":
+        import build_model_seminaive
+        if not build_model_seminaive.is_applicable():
+            print("Semi-naive model computation requires full grounding "
+                  "without checkpoint; using default backend.")
+            backend = "default"
+    if options.grounding_memory_threshold is not None and backend != "default":
+        print("Compacting rule indexes is only supported by the default "
+              "backend; ignoring --grounding-memory-threshold.")
+    with timers.timing("Preparing model"):
+        if backend == "interned":
+            import build_model_interned
+            state = build_model_interned.InternedGroundingState(prog, task)
+        elif backend == "seminaive":
+            state = build_model_seminaive.SemiNaiveGroundingState(prog, task)
+        else:
+            state = GroundingState(prog, task)
+    print("Generated %d rules." % len(state.rules))
+    return state
+
+def compute_model(prog, task = None, state = None):
+    if state is None:
+        state = prepare_model(prog, task)
+    elif state.resumed:
+        print("Resuming grounding with %d rules, %d atoms and %d actions "
+              "already processed." % (len(state.rules),
+                                      state.relevant_atoms + state.auxiliary_atoms,
+                                      state.queue.get_number_popped_actions()))
+    queue = state.queue
+
+    queue.print_info()
+    termination_condition = tc.get_termination_condition_from_options()
+    termination_condition.print_info()
+    if state.resumed:
+        for atom in state.notified_atoms:
+            termination_condition.notify_atom(atom)
+        if not grounding_checkpoint.is_written():
+            state.notified_atoms = None
+
+    # Compacting the rule indexes prints messages while the model is computed.
+    with timers.timing("Computing model",
+                       block=options.grounding_memory_threshold is not None):
+        with profiler.profile_grounding(state):
+            state.run(termination_condition)
     queue.print_stats()
-    print("%d relevant atoms" % relevant_atoms)
-    print("%d auxiliary atoms" % auxiliary_atoms)
+    print("%d relevant atoms" % state.relevant_atoms)
+    print("%d auxiliary atoms" % state.auxiliary_atoms)
     print("%d actions instantiated" % queue.get_number_popped_actions())
-    print("%d final queue length" % len(queue.enqueued))
+    print("%d final queue length" % queue.get_num_enqueued())
     print("%d total queue pushes" % queue.num_pushes)
+    profiler.record_counters(
+        relevant_atoms=state.relevant_atoms,
+        auxiliary_atoms=state.auxiliary_atoms,
+        actions_instantiated=queue.get_number_popped_actions(),
+        final_queue_length=queue.get_num_enqueued(),
+        total_queue_pushes=queue.num_pushes)
     return queue.get_final_queue()
 
 if __name__ == "__main__":
@@ -0,0 +1,375 @@
+#! /usr/bin/env python3
+
+# Alternative implementation of the fixpoint computation in build_model that
+# works on integers instead of strings. Objects and predicates are interned
+# once, atoms are flat tuples (predicate id, object id, ...), and every rule
+# is compiled into key extractors and effect builders for its conditions.
+# Atoms are processed in exactly the same order as in build_model, so both
+# implementations compute identical models. Only relevant atoms and actions
+# are turned into pddl.Atom objects while grounding; auxiliary atoms are
+# materialized when the final model is requested.
+
+from itertools import product
+from operator import itemgetter
+
+import grounding_checkpoint
+import options
+import pddl
+
+import build_model
+import subdominization.hard_rules as hr
+import subdominization.queue_factory as qf
+
+
+class Interner:
+    def __init__(self):
+        self.objects = []
+        self.object_ids = {}
+        self.predicates = []
+        self.predicate_ids = {}
+        self.is_action = []
+        self.is_auxiliary = []
+
+    def object_id(self, obj):
+        obj_id = self.object_ids.get(obj)
+        if obj_id is None:
+            obj_id = len(self.objects)
+            self.object_ids[obj] = obj_id
+            self.objects.append(obj)
+        return obj_id
+
+    def predicate_id(self, predicate):
+        pred_id = self.predicate_ids.get(predicate)
+        if pred_id is None:
+            pred_id = len(self.predicates)
+            self.predicate_ids[predicate] = pred_id
+            self.predicates.append(predicate)
+            self.is_action.append(isinstance(predicate, pddl.Action))
+            self.is_auxiliary.append(
+                isinstance(predicate, str) and "$" in predicate)
+        return pred_id
+
+    def intern_atom(self, atom):
+        object_id = self.object_id
+        return (self.predicate_id(atom.predicate),) + tuple(
+            object_id(arg) for arg in atom.args)
+
+    def materialize(self, atom_tuple):
+        objects = self.objects
+        return pddl.Atom(self.predicates[atom_tuple[0]],
+                         [objects[obj_id] for obj_id in atom_tuple[1:]])
+
+
+def _is_variable(arg):
+    return isinstance(arg, int)
+
+
+def _compile_builder(param_names, value_code):
+    # The builders are the innermost operation of the fixpoint loop.
+    # Generating a lambda with a fixed tuple display avoids building and
+    # copying temporary argument lists for every effect.
+    code = "lambda %s: (%s,)" % (", ".join(param_names), ", ".join(value_code))
+    return eval(code)
+
+
+def _empty_key(atom):
+    return ()
+
+
+class CompiledRule:
+    """Common part of compiled rules. The generated builder functions cannot
+    be pickled, so only their source is stored in a checkpoint."""
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("builders")
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compile()
+
+    def _compile(self):
+        self.builders = [_compile_builder(params, values)
+                         for params, values in self.builder_code]
+
+    def _effect_code(self, interner, sources):
+        # sources maps effect variable numbers to code for their value.
+        effect = self.rule.effect
+        code = [str(interner.predicate_id(effect.predicate))]
+        for pos, arg in enumerate(effect.args):
+            if _is_variable(arg):
+                code.append(sources[arg])
+            else:
+                code.append(str(interner.object_id(arg)))
+        return code
+
+    @staticmethod
+    def _variable_sources(cond, code):
+        # "code" is the name of the tuple holding an atom of this condition.
+        # Position 0 of atom tuples is the predicate id.
+        return {var_no: "%s[%d]" % (code, pos + 1)
+                for pos, var_no in enumerate(cond.args)
+                if _is_variable(var_no)}
+
+
+class CompiledJoinRule(CompiledRule):
+    def __init__(self, rule, interner):
+        self.rule = rule
+        self.key_getters = [
+            self._key_getter(positions) for positions in rule.common_var_positions]
+        self.atoms_by_key = ({}, {})
+        self.builder_code = []
+        for cond_index in range(2):
+            sources = self._variable_sources(
+                rule.conditions[1 - cond_index], "other")
+            sources.update(self._variable_sources(
+                rule.conditions[cond_index], "new"))
+            self.builder_code.append(
+                (["new", "other"], self._effect_code(interner, sources)))
+        self._compile()
+
+    @staticmethod
+    def _key_getter(positions):
+        if not positions:
+            # Conditions without common variables join with everything.
+            return _empty_key
+        return itemgetter(*[pos + 1 for pos in positions])
+
+    def process(self, atom, cond_index, push):
+        key = self.key_getters[cond_index](atom)
+        own_index = self.atoms_by_key[cond_index]
+        atoms = own_index.get(key)
+        if atoms is None:
+            own_index[key] = [atom]
+        else:
+            atoms.append(atom)
+        others = self.atoms_by_key[1 - cond_index].get(key)
+        if others:
+            build = self.builders[cond_index]
+            for other in others:
+                push(build(atom, other))
+
+
+class CompiledProductRule(CompiledRule):
+    def __init__(self, rule, interner):
+        self.rule = rule
+        num_conditions = len(rule.conditions)
+        self.atoms_by_index = [[] for _ in range(num_conditions)]
+        self.empty_atom_list_no = num_conditions
+        self.builder_code = []
+        for cond_index in range(num_conditions):
+            sources = {}
+            other_indices = [i for i in range(num_conditions) if i != cond_index]
+            for factor, other_index in enumerate(other_indices):
+                sources.update(self._variable_sources(
+                    rule.conditions[other_index], "others[%d]" % factor))
+            sources.update(self._variable_sources(
+                rule.conditions[cond_index], "new"))
+            self.builder_code.append(
+                (["new", "others"], self._effect_code(interner, sources)))
+        self._compile()
+
+    def process(self, atom, cond_index, push):
+        atom_list = self.atoms_by_index[cond_index]
+        if not atom_list:
+            self.empty_atom_list_no -= 1
+        atom_list.append(atom)
+        if self.empty_atom_list_no:
+            return
+        factors = [atoms for pos, atoms in enumerate(self.atoms_by_index)
+                   if pos != cond_index]
+        build = self.builders[cond_index]
+        for others in product(*factors):
+            push(build(atom, others))
+
+
+class CompiledProjectRule(CompiledRule):
+    def __init__(self, rule, interner):
+        self.rule = rule
+        self.builder_code = [
+            (["new"], self._effect_code(
+                interner, self._variable_sources(rule.conditions[0], "new")))]
+        self._compile()
+
+    def process(self, atom, cond_index, push):
+        push(self.builders[0](atom))
+
+
+COMPILED_RULE_TYPES = {
+    build_model.JoinRule: CompiledJoinRule,
+    build_model.ProductRule: CompiledProductRule,
+    build_model.ProjectRule: CompiledProjectRule,
+}
+
+
+class IntLeafGenerator:
+    def __init__(self, matches):
+        self.matches = matches
+    def generate(self, atom, result):
+        result += self.matches
+
+
+class IntMatchGenerator:
+    def __init__(self, index, matches, match_generator, next):
+        # Shifted by one because position 0 holds the predicate id.
+        self.index = index + 1
+        self.matches = matches
+        self.match_generator = match_generator
+        self.next = next
+    def generate(self, atom, result):
+        result += self.matches
+        generator = self.match_generator.get(atom[self.index])
+        if generator:
+            generator.generate(atom, result)
+        self.next.generate(atom, result)
+
+
+class IntUnifier:
+    """Int-keyed copy of build_model.Unifier. The generator trees are
+    converted node by node, so matches are reported in the same order."""
+    def __init__(self, unifier, compiled_rules, interner):
+        self._compiled_rules = compiled_rules
+        self._interner = interner
+        # For predicates without constant arguments in any condition, the
+        # list of matches does not depend on the atom and is stored directly.
+        self.fixed_matches = {}
+        self.generators = {}
+        for predicate, generator in unifier.predicate_to_rule_generator.items():
+            pred_id = interner.predicate_id(predicate)
+            converted = self._convert(generator)
+            if isinstance(converted, IntLeafGenerator):
+                self.fixed_matches[pred_id] = converted.matches
+            else:
+                self.generators[pred_id] = converted
+        # The rules are only needed for the conversion and are identified
+        # by their id, which does not survive pickling.
+        del self._compiled_rules
+        del self._interner
+
+    def _convert_matches(self, matches):
+        return [(self._compiled_rules[id(rule)], cond_index)
+                for rule, cond_index in matches]
+
+    def _convert(self, generator):
+        matches = self._convert_matches(generator.matches)
+        if isinstance(generator, build_model.LeafGenerator):
+            return IntLeafGenerator(matches)
+        match_generator = {
+            self._interner.object_id(obj): self._convert(child)
+            for obj, child in generator.match_generator.items()}
+        return IntMatchGenerator(generator.index, matches, match_generator,
+                                 self._convert(generator.next))
+
+    def unify(self, atom):
+        pred_id = atom[0]
+        matches = self.fixed_matches.get(pred_id)
+        if matches is not None:
+            return matches
+        generator = self.generators.get(pred_id)
+        if generator is None:
+            return ()
+        result = []
+        generator.generate(atom, result)
+        return result
+
+
+class InternedQueue:
+    def __init__(self, atoms, task, interner):
+        self.interner = interner
+        # Holds interned tuples until an atom is popped. Popped relevant
+        # atoms are replaced by their pddl.Atom, which the final model needs.
+        self.queue = atoms
+        self.queue_pos = 0
+        self.enqueued = set(atoms)
+        self.num_pushes = len(atoms)
+        if (options.hard_rules):
+            self.action_queue = hr.get_hard_rules_from_options(qf.get_action_queue_from_options(task))
+        else:
+            self.action_queue = qf.get_action_queue_from_options(task)
+        self.popped_actions = 0
+    def __bool__(self):
+        return self.queue_pos < len(self.queue) or self.action_queue.has_good_actions()
+    __nonzero__ = __bool__
+    def push(self, atom):
+        self.num_pushes += 1
+        if atom not in self.enqueued:
+            self.enqueued.add(atom)
+            if self.interner.is_action[atom[0]]:
+                self.action_queue.push(self.interner.materialize(atom))
+            else:
+                self.queue.append(atom)
+    def has_actions(self):
+        return bool(self.action_queue)
+    def get_number_popped_actions(self):
+        return self.popped_actions
+    def get_num_enqueued(self):
+        return len(self.enqueued)
+    def print_info(self):
+        self.action_queue.print_info()
+    def print_stats(self):
+        self.action_queue.print_stats()
+    def get_final_queue(self):
+        materialize = self.interner.materialize
+        return [atom if isinstance(atom, pddl.Atom) else materialize(atom)
+                for atom in self.queue] + self.action_queue.get_final_queue()
+
+
+class InternedGroundingState:
+    def __init__(self, prog, task):
+        self.interner = Interner()
+        rules = build_model.convert_rules(prog)
+        self.rules = [COMPILED_RULE_TYPES[type(rule)](rule, self.interner)
+                      for rule in rules]
+        self.unifier = IntUnifier(
+            build_model.Unifier(rules),
+            {id(rule): compiled for rule, compiled in zip(rules, self.rules)},
+            self.interner)
+        fact_atoms = sorted(fact.atom for fact in prog.facts)
+        self.queue = InternedQueue(
+            [self.interner.intern_atom(atom) for atom in fact_atoms],
+            task, self.interner)
+        self.relevant_atoms = 0
+        self.auxiliary_atoms = 0
+        self.notified_atoms = [] if grounding_checkpoint.is_written() else None
+        self.resumed = False
+
+    def run(self, termination_condition):
+        interner = self.interner
+        is_auxiliary = interner.is_auxiliary
+        materialize = interner.materialize
+        predicate_id = interner.predicate_id
+        object_id = interner.object_id
+        queue = self.queue
+        atoms = queue.queue
+        action_queue = queue.action_queue
+        push = queue.push
+        unify = self.unifier.unify
+        notified_atoms = self.notified_atoms
+        relevant_atoms = self.relevant_atoms
+        auxiliary_atoms = self.auxiliary_atoms
+        while queue or (queue.has_actions() and not termination_condition.terminate()):
+            if queue.queue_pos < len(atoms):
+                atom = atoms[queue.queue_pos]
+                if is_auxiliary[atom[0]]:
+                    auxiliary_atoms += 1
+                else:
+                    relevant_atoms += 1
+                    pddl_atom = materialize(atom)
+                    atoms[queue.queue_pos] = pddl_atom
+                    termination_condition.notify_atom(pddl_atom)
+                    if notified_atoms is not None:
+                        notified_atoms.append(pddl_atom)
+                queue.queue_pos += 1
+            else:
+                pddl_atom = action_queue.pop()
+                queue.popped_actions += 1
+                relevant_atoms += 1
+                termination_condition.notify_atom(pddl_atom)
+                if notified_atoms is not None:
+                    notified_atoms.append(pddl_atom)
+                atom = (predicate_id(pddl_atom.predicate),) + tuple(
+                    object_id(arg) for arg in pddl_atom.args)
+            for rule, cond_index in unify(atom):
+                rule.process(atom, cond_index, push)
+        self.relevant_atoms = relevant_atoms
+        self.auxiliary_atoms = auxiliary_atoms
@@ -0,0 +1,324 @@
+#! /usr/bin/env python3
+
+# Alternative implementation of the fixpoint computation in build_model for
+# full grounding. Instead of processing one atom at a time, the program is
+# evaluated semi-naively: in every round, each rule is evaluated once per
+# condition against the atoms that are new since the previous round (the
+# delta), and the joins are computed on NumPy arrays of integer-encoded
+# atoms. The computed model contains the same atoms as the one of build_model,
+# but in a different order.
+#
+# Actions are still passed through the action queue, so that queues which
+# drop actions (e.g. with --ignore-bad-actions) are respected. Since the
+# order in which actions are popped does not matter for full grounding, all
+# actions derived in a round are pushed and then popped at once.
+
+from collections import defaultdict
+
+import numpy as np
+
+import options
+import pddl
+
+import build_model
+import subdominization.hard_rules as hr
+import subdominization.queue_factory as qf
+
+
+def is_applicable():
+    """The semi-naive evaluation computes the complete model in one go. It
+    can neither stop early nor be continued from a checkpoint."""
+    return (options.termination_condition == ["default"] and
+            not options.grounding_checkpoint)
+
+
+class Encoder:
+    """Maps objects and predicates to consecutive integers. Rows of objects
+    are encoded into single keys that can be sorted and compared: an int64
+    number in base len(objects) if that fits, otherwise the raw bytes of
+    the row."""
+    def __init__(self):
+        self.objects = []
+        self.object_ids = {}
+        self.predicates = []
+        self.predicate_ids = {}
+
+    def object_id(self, obj):
+        obj_id = self.object_ids.get(obj)
+        if obj_id is None:
+            obj_id = len(self.objects)
+            self.object_ids[obj] = obj_id
+            self.objects.append(obj)
+        return obj_id
+
+    def predicate_id(self, predicate):
+        pred_id = self.predicate_ids.get(predicate)
+        if pred_id is None:
+            pred_id = len(self.predicates)
+            self.predicate_ids[predicate] = pred_id
+            self.predicates.append(predicate)
+        return pred_id
+
+    def encode_rows(self, rows):
+        return self.encode_columns([rows[:, pos] for pos in range(rows.shape[1])],
+                                   len(rows))
+
+    def encode_columns(self, columns, num_rows):
+        base = max(len(self.objects), 1)
+        if base ** len(columns) < 2 ** 63:
+            keys = np.zeros(num_rows, dtype=np.int64)
+            for column in columns:
+                keys *= base
+                keys += column
+            return keys
+        rows = np.ascontiguousarray(np.stack(columns, axis=1))
+        return rows.view(np.dtype((np.void, rows.itemsize * len(columns)))).ravel()
+
+    def materialize(self, pred_id, row):
+        objects = self.objects
+        return pddl.Atom(self.predicates[pred_id], [objects[obj_id] for obj_id in row])
+
+
+class Relation:
+    """The atoms of one predicate found so far. rows[:delta_start] were
+    already known in the previous round, rows[delta_start:] are new. The
+    sorted keys of all atoms ever derived for the predicate are kept
+    separately, because actions dropped by the action queue are derived but
+    never added to the rows."""
+    def __init__(self, arity):
+        self.rows = np.empty((0, arity), dtype=np.int64)
+        self.delta_start = 0
+        self.keys = None
+
+    def old(self):
+        return self.rows[:self.delta_start]
+
+    def delta(self):
+        return self.rows[self.delta_start:]
+
+    def has_delta(self):
+        return self.delta_start < len(self.rows)
+
+    def filter_new(self, rows, encoder):
+        """Return the rows that have not been derived before and mark them
+        as derived."""
+        keys, first = np.unique(encoder.encode_rows(rows), return_index=True)
+        if self.keys is not None and len(self.keys):
+            positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+            unseen = self.keys[positions] != keys
+            keys = keys[unseen]
+            first = first[unseen]
+            self.keys = np.sort(np.concatenate([self.keys, keys]))
+        else:
+            self.keys = keys
+        return rows[np.sort(first)]
+
+    def append(self, rows):
+        if len(rows):
+            self.rows = np.concatenate([self.rows, rows])
+
+
+class Bindings:
+    """A table of variable bindings: one column of object ids per variable."""
+    def __init__(self, columns, size):
+        self.columns = columns
+        self.size = size
+
+    def take(self, indices):
+        return {var: column[indices] for var, column in self.columns.items()}
+
+    def join(self, other, key_vars, encoder):
+        if not key_vars:
+            left = np.repeat(np.arange(self.size), other.size)
+            right = np.tile(np.arange(other.size), self.size)
+        else:
+            left_keys = encoder.encode_columns(
+                [self.columns[var] for var in key_vars], self.size)
+            right_keys = encoder.encode_columns(
+                [other.columns[var] for var in key_vars], other.size)
+            order = np.argsort(right_keys, kind="stable")
+            right_keys = right_keys[order]
+            lower = np.searchsorted(right_keys, left_keys, side="left")
+            counts = np.searchsorted(right_keys, left_keys, side="right") - lower
+            left = np.repeat(np.arange(self.size), counts)
+            # For every pair, the position in right_keys is the lower bound
+            # of its left row plus its offset among the pairs of that row.
+            offsets = np.arange(len(left)) - np.repeat(np.cumsum(counts) - counts, counts)
+            right = order[np.repeat(lower, counts) + offsets]
+        columns = self.take(left)
+        columns.update(other.take(right))
+        return Bindings(columns, len(left))
+
+
+class CompiledRule:
+    def __init__(self, rule, encoder):
+        self.rule = rule
+        self.effect_pred = encoder.predicate_id(rule.effect.predicate)
+        self.cond_preds = [encoder.predicate_id(cond.predicate)
+                           for cond in rule.conditions]
+        # As in Unifier, arguments that are neither constants nor variables
+        # of the effect match any object.
+        self.constants = []
+        self.variables = []
+        for cond in rule.conditions:
+            self.constants.append(
+                [(pos, encoder.object_id(arg)) for pos, arg in enumerate(cond.args)
+                 if not isinstance(arg, int) and arg[0] != "?"])
+            self.variables.append(
+                [(pos, arg) for pos, arg in enumerate(cond.args)
+                 if isinstance(arg, int)])
+        self.effect_args = [arg if isinstance(arg, int) else encoder.object_id(arg)
+                            for arg in rule.effect.args]
+        self.effect_is_var = [isinstance(arg, int) for arg in rule.effect.args]
+        if isinstance(rule, build_model.JoinRule):
+            left, right = self.variables
+            self.key_vars = sorted({var for _, var in left} & {var for _, var in right})
+        else:
+            self.key_vars = []
+
+    def _bindings(self, cond_index, rows):
+        mask = None
+        for pos, obj_id in self.constants[cond_index]:
+            matches = rows[:, pos] == obj_id
+            mask = matches if mask is None else mask & matches
+        if mask is not None:
+            rows = rows[mask]
+        return Bindings({var: rows[:, pos] for pos, var in self.variables[cond_index]},
+                        len(rows))
+
+    def evaluate(self, relations, encoder):
+        """Yield arrays of effect atoms derived from at least one atom in the
+        delta of a condition. For the i-th condition, conditions before it
+        use all atoms and conditions after it only the old ones, so that no
+        combination is considered twice."""
+        for cond_index, pred in enumerate(self.cond_preds):
+            if not relations[pred].has_delta():
+                continue
+            tables = []
+            for other_index, other_pred in enumerate(self.cond_preds):
+                relation = relations[other_pred]
+                if other_index < cond_index:
+                    rows = relation.rows
+                elif other_index == cond_index:
+                    rows = relation.delta()
+                else:
+                    rows = relation.old()
+                bindings = self._bindings(other_index, rows)
+                if not bindings.size:
+                    break
+                tables.append(bindings)
+            else:
+                result = tables[0]
+                for table in tables[1:]:
+                    result = result.join(table, self.key_vars, encoder)
+                if result.size:
+                    yield self._effects(result)
+
+    def _effects(self, bindings):
+        columns = [bindings.columns[arg] if is_var else np.full(bindings.size, arg, dtype=np.int64)
+                   for arg, is_var in zip(self.effect_args, self.effect_is_var)]
+        if not columns:
+            return np.empty((bindings.size, 0), dtype=np.int64)
+        return np.stack(columns, axis=1)
+
+
+class SemiNaiveQueue:
+    """Counterpart of build_model.Queue for reporting: the semi-naive
+    evaluation has no atom queue, only the action queue."""
+    def __init__(self, task):
+        if (options.hard_rules):
+            self.action_queue = hr.get_hard_rules_from_options(qf.get_action_queue_from_options(task))
+        else:
+            self.action_queue = qf.get_action_queue_from_options(task)
+        self.atoms = []
+        self.num_enqueued = 0
+        self.num_pushes = 0
+        self.popped_actions = 0
+    def get_number_popped_actions(self):
+        return self.popped_actions
+    def get_num_enqueued(self):
+        return self.num_enqueued
+    def print_info(self):
+        self.action_queue.print_info()
+    def print_stats(self):
+        self.action_queue.print_stats()
+    def get_final_queue(self):
+        return self.atoms + self.action_queue.get_final_queue()
+
+
+class SemiNaiveGroundingState:
+    def __init__(self, prog, task):
+        self.encoder = Encoder()
+        fact_atoms = sorted(fact.atom for fact in prog.facts)
+        for atom in fact_atoms:
+            for arg in atom.args:
+                self.encoder.object_id(arg)
+        rules = build_model.convert_rules(prog)
+        self.rules = [CompiledRule(rule, self.encoder) for rule in rules]
+        self.arities = {}
+        for rule in rules:
+            for atom in [rule.effect] + rule.conditions:
+                self.arities[self.encoder.predicate_id(atom.predicate)] = len(atom.args)
+        self.facts = defaultdict(list)
+        for atom in fact_atoms:
+            pred_id = self.encoder.predicate_id(atom.predicate)
+            self.arities[pred_id] = len(atom.args)
+            self.facts[pred_id].append([self.encoder.object_id(arg) for arg in atom.args])
+        self.relations = {pred_id: Relation(arity) for pred_id, arity in self.arities.items()}
+        self.queue = SemiNaiveQueue(task)
+        self.queue.num_pushes = len(fact_atoms)
+        self.relevant_atoms = 0
+        self.auxiliary_atoms = 0
+        self.notified_atoms = None
+        self.resumed = False
+
+    def _as_rows(self, pred_id, rows):
+        return np.array(rows, dtype=np.int64).reshape(len(rows), self.arities[pred_id])
+
+    def _add_atoms(self, pred_id, rows):
+        relation = self.relations[pred_id]
+        rows = relation.filter_new(rows, self.encoder)
+        self.queue.num_enqueued += len(rows)
+        predicate = self.encoder.predicates[pred_id]
+        if isinstance(predicate, pddl.Action):
+            action_queue = self.queue.action_queue
+            for row in rows.tolist():
+                action_queue.push(self.encoder.materialize(pred_id, row))
+            return
+        relation.append(rows)
+        if isinstance(predicate, str) and "$" in predicate:
+            self.auxiliary_atoms += len(rows)
+        else:
+            self.relevant_atoms += len(rows)
+        materialize = self.encoder.materialize
+        self.queue.atoms += [materialize(pred_id, row) for row in rows.tolist()]
+
+    def _pop_actions(self):
+        action_queue = self.queue.action_queue
+        encoder = self.encoder
+        popped = defaultdict(list)
+        while action_queue:
+            action = action_queue.pop()
+            popped[encoder.predicate_ids[action.predicate]].append(
+                [encoder.object_ids[arg] for arg in action.args])
+            self.queue.popped_actions += 1
+            self.relevant_atoms += 1
+        for pred_id, rows in popped.items():
+            self.relations[pred_id].append(self._as_rows(pred_id, rows))
+
+    def run(self, termination_condition):
+        for pred_id, rows in self.facts.items():
+            self._add_atoms(pred_id, self._as_rows(pred_id, rows))
+        self._pop_actions()
+        while any(relation.has_delta() for relation in self.relations.values()):
+            derived = defaultdict(list)
+            for rule in self.rules:
+                for rows in rule.evaluate(self.relations, self.encoder):
+                    derived[rule.effect_pred].append(rows)
+            for relation in self.relations.values():
+                relation.delta_start = len(relation.rows)
+            for pred_id, chunks in derived.items():
+                rows = np.concatenate(chunks)
+                self.queue.num_pushes += len(rows)
+                self._add_atoms(pred_id, rows)
+            self._pop_actions()
@@ -104,8 +104,24 @@ def collect_all_mutex_groups(groups, atoms):
 def sort_groups(groups):
     return sorted(sorted(group) for group in groups)
 
-def compute_groups(task, atoms, reachable_action_params):
-    groups = invariant_finder.get_groups(task, reachable_action_params)
+def compute_groups(task, atoms, reachable_action_params, translation_state=None):
+    """Compute the fact groups for the given reachable atoms. With a
+    translation state (see incremental_translation.py), reuse the groups
+    or the invariants of the last incremental grounding iteration if they
+    are still valid, and store them for the next one."""
+    if translation_state is None:
+        groups = invariant_finder.get_groups(task, reachable_action_params)
+    elif translation_state.groups is not None:
+        return translation_state.groups
+    else:
+        if translation_state.invariants is None:
+            translation_state.invariants = invariant_finder.get_invariants(
+                task, reachable_action_params)
+        else:
+            print("Reusing %d invariants of the last iteration" %
+                  len(translation_state.invariants))
+        groups = invariant_finder.get_groups(
+            task, invariants=translation_state.invariants)
 
     with timers.timing("Instantiating groups"):
         groups = instantiate_groups(groups, task, atoms)
@@ -128,4 +144,6 @@ def compute_groups(task, atoms, reachable_action_params):
             if len(group) >= 2:
                 print("{%s}" % ", ".join(map(str, group)))
 
+    if translation_state is not None:
+        translation_state.groups = groups, mutex_groups, translation_key
     return groups, mutex_groups, translation_key
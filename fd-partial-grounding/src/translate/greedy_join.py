@@ -81,6 +81,26 @@ class ResultList:
         self.result.append(rule)
         return rule.effect
 
+def add_join(left, right, occurrences, result):
+    """Add the rules that join the conditions left and right (projecting
+    away variables that are not needed later) to result and return the
+    joint condition."""
+    joinees = [left, right]
+    for joinee in joinees:
+        occurrences.update(joinee, -1)
+
+    common_vars = set(joinees[0].args) & set(joinees[1].args)
+    condition_vars = set(joinees[0].args) | set(joinees[1].args)
+    effect_vars = occurrences.variables() & condition_vars
+    for i, joinee in enumerate(joinees):
+        joinee_vars = set(joinee.args)
+        retained_vars = joinee_vars & (effect_vars | common_vars)
+        if retained_vars != joinee_vars:
+            joinees[i] = result.add_rule("project", [joinee], sorted(retained_vars))
+    joint_condition = result.add_rule("join", joinees, sorted(effect_vars))
+    occurrences.update(joint_condition, +1)
+    return joint_condition
+
 def greedy_join(rule, name_generator):
     assert len(rule.conditions) >= 2
     cost_matrix = CostMatrix(rule.conditions)
@@ -88,21 +108,9 @@ def greedy_join(rule, name_generator):
     result = ResultList(rule, name_generator)
 
     while cost_matrix.can_join():
-        joinees = list(cost_matrix.remove_min_pair())
-        for joinee in joinees:
-            occurrences.update(joinee, -1)
-
-        common_vars = set(joinees[0].args) & set(joinees[1].args)
-        condition_vars = set(joinees[0].args) | set(joinees[1].args)
-        effect_vars = occurrences.variables() & condition_vars
-        for i, joinee in enumerate(joinees):
-            joinee_vars = set(joinee.args)
-            retained_vars = joinee_vars & (effect_vars | common_vars)
-            if retained_vars != joinee_vars:
-                joinees[i] = result.add_rule("project", [joinee], sorted(retained_vars))
-        joint_condition = result.add_rule("join", joinees, sorted(effect_vars))
+        left, right = cost_matrix.remove_min_pair()
+        joint_condition = add_join(left, right, occurrences, result)
         cost_matrix.add_entry(joint_condition)
-        occurrences.update(joint_condition, +1)
 
     # assert occurrences.variables() == set(rule.effect.args)
     # for var in set(rule.effect.args):
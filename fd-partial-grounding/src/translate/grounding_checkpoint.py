@@ -0,0 +1,104 @@
+"""Store and restore the state of a (partial) grounding run.
+
+Incremental grounding calls the translator several times on the same task,
+each time with a larger minimum number of actions in the termination
+condition. Instead of parsing, normalizing and computing the model from
+scratch in every iteration, the translator can write the normalized task
+together with the grounding state of compute_model (rule indexes, unifier,
+atom queue and action queue) to a checkpoint file. The next call loads the
+checkpoint and continues popping actions where the last call stopped.
+"""
+
+import os
+import pickle
+import sys
+
+import options
+
+
+# Options that influence the normalized task or the grounding process.
+# A checkpoint written with different values for any of them is ignored.
+GROUNDING_OPTIONS = [
+    "generate_relaxed_task",
+    "compute_model_backend",
+    "join_ordering",
+    "restrict_static_domains",
+    "grounding_action_queue_ordering",
+    "trained_model_folder",
+    "aleph_model_file",
+    "hard_rules",
+    "actions_file",
+    "action_schema_ratios",
+    "plan_ratios",
+    "batch_evaluation",
+    "relaxed_plan_file",
+    "policy_file",
+    "fasttext_model",
+    "random_seed",
+    "ignore_bad_actions",
+]
+
+
+class Checkpoint:
+    def __init__(self, task, state):
+        self.key = get_key()
+        self.task = task
+        self.state = state
+
+
+def _file_signature(filename):
+    stat = os.stat(filename)
+    return os.path.abspath(filename), stat.st_size, stat.st_mtime_ns
+
+
+def get_key():
+    return ([_file_signature(options.domain), _file_signature(options.task)] +
+            [(name, getattr(options, name)) for name in GROUNDING_OPTIONS])
+
+
+def is_written():
+    """Return whether this run stores its grounding state."""
+    return bool(options.grounding_checkpoint) and not options.grounding_checkpoint_read_only
+
+
+def load(filename):
+    """Return the checkpoint stored in the given file or None if there is
+    no usable checkpoint."""
+    if not os.path.exists(filename):
+        return None
+    try:
+        with open(filename, "rb") as checkpoint_file:
+            checkpoint = pickle.load(checkpoint_file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as err:
+        print("Could not read grounding checkpoint %s: %s" % (filename, err))
+        return None
+    if checkpoint.key != get_key():
+        print("Ignoring grounding checkpoint %s: it was written for a different "
+              "task or different grounding options." % filename)
+        return None
+    checkpoint.state.resumed = True
+    return checkpoint
+
+
+def save(filename, task, state):
+    # Deeply nested conditions and long chains in the unifier can exceed
+    # the default recursion limit of pickle.
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(old_limit, 10000))
+    tmp_filename = filename + ".tmp"
+    try:
+        with open(tmp_filename, "wb") as checkpoint_file:
+            pickle.dump(Checkpoint(task, state), checkpoint_file,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError) as err:
+        # Some action queues (e.g. the fasttext queues) hold objects that
+        # cannot be pickled. Grounding then simply starts from scratch in
+        # the next iteration.
+        print("Could not write grounding checkpoint: %s" % err)
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        return False
+    finally:
+        sys.setrecursionlimit(old_limit)
+    os.replace(tmp_filename, filename)
+    return True
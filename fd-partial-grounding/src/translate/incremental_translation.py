@@ -0,0 +1,137 @@
+"""Reuse the translation results of earlier incremental grounding iterations.
+
+With a grounding checkpoint (see grounding_checkpoint.py), every
+incremental grounding iteration only adds actions and atoms to the
+model of the previous iteration. The translator stores the following
+results next to the checkpoint and reuses them in the next iteration:
+
+- The invariants. They only depend on the grounded actions through the
+  inequality preconditions that invariant_finder adds for parameters that
+  never have the same value, so they are reused as long as these
+  preconditions are the same.
+- The fact groups and the variable encoding. They are reused if the
+  invariants and the reachable atoms are the same as in the last
+  iteration.
+- The SAS operators of all actions translated with this encoding. Only
+  newly grounded actions have to be translated.
+
+The operators are stored before filtering unreachable propositions and
+reordering variables, which are repeated in every iteration.
+"""
+
+import os
+import pickle
+import sys
+
+import grounding_checkpoint
+import invariant_finder
+import options
+import tools
+
+
+# Options that influence the invariants, the encoding or the translation
+# of the operators (in addition to the grounding options).
+TRANSLATION_OPTIONS = [
+    "invariant_generation_max_candidates",
+    "use_partial_encoding",
+    "add_implied_preconditions",
+]
+
+
+def get_key():
+    return (grounding_checkpoint.get_key() +
+            [(name, getattr(options, name)) for name in TRANSLATION_OPTIONS])
+
+
+def get_filename():
+    return options.grounding_checkpoint + ".translation"
+
+
+class TranslationState:
+    def __init__(self):
+        self.key = get_key()
+        self.inequality_key = None
+        self.invariants = None
+        # Maps (predicate, args) of the reachable atoms to their index in
+        # sorted order. Operator keys refer to atoms by index, which makes
+        # them much cheaper to store and load than atoms.
+        self.atom_ids = None
+        self.groups = None
+        self.operators = {}
+
+    def update(self, task, atoms, reachable_action_params):
+        """Forget the results that are not valid for the given atoms and
+        reachable action parameters."""
+        inequality_key = invariant_finder.get_inequality_key(
+            task, reachable_action_params)
+        if inequality_key != self.inequality_key:
+            self.inequality_key = inequality_key
+            self.invariants = None
+            self.groups = None
+        atom_ids = {(atom.predicate, atom.args): atom_id
+                    for atom_id, atom in enumerate(sorted(atoms))}
+        if atom_ids != self.atom_ids:
+            self.atom_ids = atom_ids
+            self.groups = None
+        if self.groups is None:
+            self.operators = {}
+        else:
+            print("Reusing fact groups and %d translated actions of the last "
+                  "iteration" % len(self.operators))
+
+    def _get_literal_key(self, literal):
+        atom_id = self.atom_ids.get((literal.predicate, literal.args))
+        if atom_id is None:
+            return literal
+        return ~atom_id if literal.negated else atom_id
+
+    def _get_effects_key(self, effects):
+        get_key = self._get_literal_key
+        return tuple((tuple(map(get_key, cond)), get_key(atom))
+                     for cond, atom in effects)
+
+    def get_operator_key(self, action):
+        """Return a key that identifies a propositional action. Different
+        actions can have the same name after normalization."""
+        return (action.name, tuple(map(self._get_literal_key, action.precondition)),
+                self._get_effects_key(action.add_effects),
+                self._get_effects_key(action.del_effects), action.cost)
+
+
+def load():
+    """Return the translation state stored with the grounding checkpoint,
+    or a new state if there is no usable one."""
+    filename = get_filename()
+    if os.path.exists(filename):
+        # The state consists of many small objects. Collecting garbage
+        # while loading them would take longer than loading itself.
+        try:
+            with open(filename, "rb") as state_file, tools.garbage_collection_disabled():
+                state = pickle.load(state_file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as err:
+            print("Could not read translation state %s: %s" % (filename, err))
+        else:
+            if state.key == get_key():
+                return state
+            print("Ignoring translation state %s: it was written for a different "
+                  "task or different options." % filename)
+    return TranslationState()
+
+
+def save(state):
+    filename = get_filename()
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(old_limit, 10000))
+    tmp_filename = filename + ".tmp"
+    try:
+        with open(tmp_filename, "wb") as state_file:
+            pickle.dump(state, state_file, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError, RecursionError) as err:
+        print("Could not write translation state: %s" % err)
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        return False
+    finally:
+        sys.setrecursionlimit(old_limit)
+    os.replace(tmp_filename, filename)
+    return True
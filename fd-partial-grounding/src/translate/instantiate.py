@@ -4,6 +4,8 @@
 from collections import defaultdict
 
 import build_model
+import grounding_checkpoint
+import options
 import pddl_to_prolog
 import pddl
 import timers
@@ -102,9 +104,17 @@ def instantiate(task, model):
             sorted(instantiated_axioms), reachable_action_parameters)
 
 
-def explore(task):
-    prog = pddl_to_prolog.translate(task)
-    model = build_model.compute_model(prog, task)
+def explore(task, grounding_state=None, prog=None):
+    if grounding_state is None:
+        if prog is None:
+            prog = pddl_to_prolog.translate(
+                task, options.join_ordering, options.restrict_static_domains)
+        grounding_state = build_model.prepare_model(prog, task)
+    model = build_model.compute_model(None, task, grounding_state)
+    if grounding_checkpoint.is_written():
+        with timers.timing("Writing grounding checkpoint"):
+            grounding_checkpoint.save(
+                options.grounding_checkpoint, task, grounding_state)
     with timers.timing("Completing instantiation"):
         return instantiate(task, model)
 
@@ -3,6 +3,7 @@
 
 from collections import deque, defaultdict
 import itertools
+import multiprocessing
 import time
 
 import invariants
@@ -43,17 +44,7 @@ class BalanceChecker:
         return self.action_to_heavy_action[action]
 
     def add_inequality_preconds(self, action, reachable_action_params):
-        if reachable_action_params is None or len(action.parameters) < 2:
-            return action
-        inequal_params = []
-        combs = itertools.combinations(range(len(action.parameters)), 2)
-        for pos1, pos2 in combs:
-            for params in reachable_action_params[action]:
-                if params[pos1] == params[pos2]:
-                    break
-            else:
-                inequal_params.append((pos1, pos2))
-
+        inequal_params = get_inequal_params(action, reachable_action_params)
         if inequal_params:
             precond_parts = [action.precondition]
             for pos1, pos2 in inequal_params:
@@ -68,6 +59,28 @@ class BalanceChecker:
         else:
             return action
 
+def get_inequal_params(action, reachable_action_params):
+    """Return the pairs of parameter positions of the action that differ
+    in all reachable instantiations of the action."""
+    if reachable_action_params is None or len(action.parameters) < 2:
+        return []
+    inequal_params = []
+    combs = itertools.combinations(range(len(action.parameters)), 2)
+    for pos1, pos2 in combs:
+        for params in reachable_action_params[action]:
+            if params[pos1] == params[pos2]:
+                break
+        else:
+            inequal_params.append((pos1, pos2))
+    return inequal_params
+
+def get_inequality_key(task, reachable_action_params):
+    """Return a key for the inequality preconditions that find_invariants
+    adds to the actions of the task. The invariants only depend on the
+    reachable action parameters through these preconditions."""
+    return tuple(tuple(get_inequal_params(action, reachable_action_params))
+                 for action in task.actions)
+
 def get_fluents(task):
     fluent_names = set()
     for action in task.actions:
@@ -83,6 +96,45 @@ def get_initial_invariants(task):
             part = invariants.InvariantPart(predicate.name, order, omitted_arg)
             yield invariants.Invariant((part,))
 
+# Balance checker of the worker processes. It is set before the workers
+# are forked, so it does not need to be pickled.
+_worker_balance_checker = None
+
+def _check_balance_in_worker(candidate):
+    new_candidates = []
+    balanced = candidate.check_balance(_worker_balance_checker,
+                                       new_candidates.append)
+    return balanced, new_candidates
+
+def find_invariants_in_parallel(candidates, balance_checker, enqueue_func):
+    """Check the candidates with options.invariant_workers processes.
+
+    The candidates are checked in batches from the front of the queue. The
+    new candidates generated by a check are enqueued in the order of the
+    batch, so the candidates are checked in the same order and the same
+    invariants are found as in the serial loop of find_invariants."""
+    global _worker_balance_checker
+    _worker_balance_checker = balance_checker
+    batch_size = 64 * options.invariant_workers
+    start_time = time.perf_counter()
+    context = multiprocessing.get_context("fork")
+    try:
+        with context.Pool(options.invariant_workers) as pool:
+            while candidates:
+                if time.perf_counter() - start_time > options.invariant_generation_max_time:
+                    print("Time limit reached, aborting invariant generation")
+                    return
+                batch = [candidates.popleft()
+                         for _ in range(min(batch_size, len(candidates)))]
+                results = pool.map(_check_balance_in_worker, batch, chunksize=8)
+                for candidate, (balanced, new_candidates) in zip(batch, results):
+                    for new_candidate in new_candidates:
+                        enqueue_func(new_candidate)
+                    if balanced:
+                        yield candidate
+    finally:
+        _worker_balance_checker = None
+
 def find_invariants(task, reachable_action_params):
     limit = options.invariant_generation_max_candidates
     candidates = deque(itertools.islice(get_initial_invariants(task), 0, limit))
@@ -96,6 +148,14 @@ def find_invariants(task, reachable_action_params):
             candidates.append(invariant)
             seen_candidates.add(invariant)
 
+    if options.invariant_workers > 1:
+        if "fork" in multiprocessing.get_all_start_methods():
+            yield from find_invariants_in_parallel(
+                candidates, balance_checker, enqueue_func)
+            return
+        print("Checking invariants in one process: "
+              "starting processes with fork is not supported.")
+
     start_time = time.process_time()
     while candidates:
         candidate = candidates.popleft()
@@ -126,9 +186,13 @@ def useful_groups(invariants, initial_facts):
     for (invariant, parameters) in useful_groups:
         yield [part.instantiate(parameters) for part in sorted(invariant.parts)]
 
-def get_groups(task, reachable_action_params=None):
+def get_invariants(task, reachable_action_params=None):
     with timers.timing("Finding invariants", block=True):
-        invariants = sorted(find_invariants(task, reachable_action_params))
+        return sorted(find_invariants(task, reachable_action_params))
+
+def get_groups(task, reachable_action_params=None, invariants=None):
+    if invariants is None:
+        invariants = get_invariants(task, reachable_action_params)
     with timers.timing("Checking invariant weight"):
         result = list(useful_groups(invariants, task.init))
     return result
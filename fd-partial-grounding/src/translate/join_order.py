@@ -0,0 +1,279 @@
+"""Cost-based splitting of rules into binary joins (--join-ordering cost).
+
+greedy_join chooses the order in which the conditions of a rule are
+joined by looking at their variables only. This module estimates the
+number of tuples of every intermediate relation from the facts of the
+Datalog program and chooses the join tree with the smallest estimated
+number of intermediate tuples:
+
+- Static predicates (which are not the effect of any rule) have exactly
+  the tuples given by the facts. We count them and the distinct values at
+  every argument position.
+- For all other predicates, the number of distinct values at an argument
+  position is the number of objects of the declared type of the argument,
+  and the number of tuples is the product of these numbers.
+- The size of a join is estimated under the usual independence
+  assumption: every variable that occurs in several conditions divides
+  the product of their sizes by all but the smallest number of distinct
+  values. Since the joins only keep the variables that are needed later,
+  the size is at most the product of the distinct values of these
+  variables.
+
+For rules with at most MAX_EXACT_CONDITIONS conditions, all join trees
+in which the two sides of every join share a variable are considered
+(dynamic programming over the subsets of the conditions). The tree is
+only used if its estimate is smaller than the one of the greedy order,
+so the greedy order is kept whenever the estimates do not distinguish
+the two. The rules for a join tree are generated in the same way as by
+greedy_join, so both compute the same model.
+"""
+
+from collections import defaultdict
+
+import greedy_join
+import pddl_to_prolog
+
+
+MAX_EXACT_CONDITIONS = 10
+
+
+class RelationStatistics:
+    def __init__(self, prog, task):
+        fluent_predicates = {rule.effect.predicate for rule in prog.rules}
+        self.sizes = defaultdict(int)
+        distinct_values = defaultdict(lambda: defaultdict(set))
+        for fact in prog.facts:
+            predicate = fact.atom.predicate
+            if predicate not in fluent_predicates:
+                self.sizes[predicate] += 1
+                for position, arg in enumerate(fact.atom.args):
+                    distinct_values[predicate][position].add(arg)
+        self.distinct_values = {
+            predicate: {position: len(values) for position, values in positions.items()}
+            for predicate, positions in distinct_values.items()}
+
+        type_dict = {type.name: type for type in task.types}
+        type_sizes = defaultdict(int)
+        for obj in task.objects:
+            for type_name in [obj.type_name] + type_dict[obj.type_name].supertype_names:
+                type_sizes[type_name] += 1
+        self.num_objects = max(len(prog.objects), 1)
+        self.argument_sizes = {}
+        for predicate in task.predicates:
+            if predicate.name in fluent_predicates:
+                self.argument_sizes[predicate.name] = [
+                    type_sizes.get(arg.type_name, self.num_objects)
+                    for arg in predicate.arguments]
+
+    def get_size(self, predicate, arity):
+        """Return the (estimated) number of tuples of the predicate."""
+        if predicate in self.sizes:
+            return self.sizes[predicate]
+        size = 1
+        for position in range(arity):
+            size *= self.get_distinct_values(predicate, position)
+        return size
+
+    def get_distinct_values(self, predicate, position):
+        """Return the (estimated) number of distinct values at the given
+        argument position of the predicate."""
+        if predicate in self.sizes:
+            return self.distinct_values.get(predicate, {}).get(position, 0)
+        argument_sizes = self.argument_sizes.get(predicate)
+        if argument_sizes is None or position >= len(argument_sizes):
+            return self.num_objects
+        return argument_sizes[position]
+
+
+class JoinEstimator:
+    """Estimates the sizes of the joins of subsets of the conditions of a
+    rule. Subsets of conditions and sets of variables are represented as
+    bit masks."""
+    def __init__(self, rule, statistics):
+        self.conditions = rule.conditions
+        variables = sorted(pddl_to_prolog.get_variables(self.conditions))
+        var_bits = {var: 1 << index for index, var in enumerate(variables)}
+        self.effect_vars = 0
+        for var in pddl_to_prolog.get_variables([rule.effect]):
+            self.effect_vars |= var_bits.get(var, 0)
+        self.condition_vars = []
+        self.condition_sizes = []
+        # For every variable, the number of distinct values at each of
+        # its occurrences as (condition index, number of values) pairs.
+        self.occurrences = [[] for _ in variables]
+        for index, cond in enumerate(self.conditions):
+            cond_vars = 0
+            size = statistics.get_size(cond.predicate, len(cond.args))
+            for position, arg in enumerate(cond.args):
+                values = statistics.get_distinct_values(cond.predicate, position)
+                if arg[0] == "?":
+                    cond_vars |= var_bits[arg]
+                    self.occurrences[variables.index(arg)].append((index, values))
+                elif values:
+                    size /= values
+            self.condition_vars.append(cond_vars)
+            self.condition_sizes.append(size)
+        self.all_conditions = (1 << len(self.conditions)) - 1
+        self.vars_cache = {}
+
+    def get_vars(self, conditions):
+        result = self.vars_cache.get(conditions)
+        if result is None:
+            result = 0
+            for index, cond_vars in enumerate(self.condition_vars):
+                if conditions & (1 << index):
+                    result |= cond_vars
+            self.vars_cache[conditions] = result
+        return result
+
+    def get_retained_vars(self, conditions):
+        """Return the variables of the join of the conditions that are
+        needed by the other conditions or the effect."""
+        other_vars = self.get_vars(self.all_conditions & ~conditions)
+        return self.get_vars(conditions) & (other_vars | self.effect_vars)
+
+    def estimate(self, conditions):
+        size = 1.0
+        for index, cond_size in enumerate(self.condition_sizes):
+            if conditions & (1 << index):
+                size *= cond_size
+        projection_size = 1.0
+        retained_vars = self.get_retained_vars(conditions)
+        for var, occurrences in enumerate(self.occurrences):
+            values = [num_values for index, num_values in occurrences
+                      if conditions & (1 << index)]
+            if not values:
+                continue
+            min_values = min(values)
+            for num_values in values:
+                if num_values:
+                    size /= num_values
+            size *= min_values
+            if retained_vars & (1 << var):
+                projection_size *= min_values
+        return min(size, projection_size)
+
+
+def _get_greedy_plan(estimator):
+    """Simulate greedy_join on the sets of variables of the joinees and
+    return its joins as a list of (left, right, conditions) triples, where
+    left and right are indices into the list of conditions followed by
+    the results of the previous joins."""
+    joinees = [1 << index for index in range(len(estimator.conditions))]
+    joinee_vars = list(estimator.condition_vars)
+    # Same order as in greedy_join.CostMatrix: joinees that are still
+    # available, in the order in which they were added.
+    available = list(range(len(joinees)))
+    plan = []
+    while len(available) >= 2:
+        min_cost = None
+        for i, left in enumerate(available):
+            for right in available[:i]:
+                left_vars, right_vars = joinee_vars[left], joinee_vars[right]
+                num_left, num_right = bin(left_vars).count("1"), bin(right_vars).count("1")
+                if num_left > num_right:
+                    num_left, num_right = num_right, num_left
+                num_common = bin(left_vars & right_vars).count("1")
+                cost = (num_left - num_common, num_right - num_common, -num_common)
+                if min_cost is None or cost < min_cost:
+                    min_cost = cost
+                    pair = (left, right)
+        left, right = pair
+        available.remove(left)
+        available.remove(right)
+        conditions = joinees[left] | joinees[right]
+        plan.append((left, right, conditions))
+        available.append(len(joinees))
+        joinees.append(conditions)
+        joinee_vars.append(estimator.get_retained_vars(conditions))
+    return plan
+
+
+def _get_optimal_plan(estimator):
+    """Return the join tree with the smallest estimated sum of the sizes
+    of the joins, in the same form as _get_greedy_plan."""
+    num_conditions = len(estimator.conditions)
+    best_cost = {1 << index: 0.0 for index in range(num_conditions)}
+    best_split = {}
+    for conditions in range(1, estimator.all_conditions + 1):
+        if conditions in best_cost:
+            continue
+        lowest = conditions & -conditions
+        rest = conditions & ~lowest
+        min_cost = None
+        # Enumerate the subsets that contain the lowest condition, so
+        # every split is considered once.
+        subset = rest
+        while True:
+            left = subset | lowest
+            right = conditions & ~left
+            if (right and left in best_cost and right in best_cost and
+                    estimator.get_vars(left) & estimator.get_vars(right)):
+                cost = best_cost[left] + best_cost[right]
+                if min_cost is None or cost < min_cost:
+                    min_cost = cost
+                    best_split[conditions] = (left, right)
+            if not subset:
+                break
+            subset = (subset - 1) & rest
+        if min_cost is not None:
+            best_cost[conditions] = min_cost + estimator.estimate(conditions)
+
+    plan = []
+    def add_joins(conditions):
+        if conditions not in best_split:
+            return conditions.bit_length() - 1
+        left, right = best_split[conditions]
+        left_index = add_joins(left)
+        right_index = add_joins(right)
+        plan.append((left_index, right_index, conditions))
+        return num_conditions + len(plan) - 1
+    add_joins(estimator.all_conditions)
+    return plan
+
+
+def get_plan_cost(estimator, plan):
+    return sum(estimator.estimate(conditions) for _, _, conditions in plan)
+
+
+def _format_atom(atom):
+    # Effects of action rules have the action as predicate.
+    predicate = getattr(atom.predicate, "name", atom.predicate)
+    return "%s(%s)" % (predicate, ", ".join(atom.args))
+
+
+def format_plan(rule, plan):
+    joinees = [_format_atom(cond) for cond in rule.conditions]
+    for left, right, _ in plan:
+        joinees.append("(%s %s)" % (joinees[left], joinees[right]))
+    return joinees[-1]
+
+
+def join_rules(rule, name_generator, plan):
+    """Split the rule into binary rules that perform the joins of the plan."""
+    occurrences = greedy_join.OccurrencesTracker(rule)
+    result = greedy_join.ResultList(rule, name_generator)
+    joinees = list(rule.conditions)
+    for left, right, _ in plan:
+        joinees.append(greedy_join.add_join(
+            joinees[left], joinees[right], occurrences, result))
+    return result.get_result()
+
+
+def cost_based_join(rule, name_generator, statistics):
+    assert len(rule.conditions) >= 2
+    if not 2 < len(rule.conditions) <= MAX_EXACT_CONDITIONS:
+        # Rules with two conditions have only one join order.
+        return greedy_join.greedy_join(rule, name_generator)
+    estimator = JoinEstimator(rule, statistics)
+    greedy_plan = _get_greedy_plan(estimator)
+    greedy_cost = get_plan_cost(estimator, greedy_plan)
+    plan = _get_optimal_plan(estimator)
+    cost = get_plan_cost(estimator, plan)
+    if cost < greedy_cost * (1 - 1e-9):
+        print("Join order for %s: %s (estimated %.6g intermediate tuples, greedy: %.6g)" % (
+            _format_atom(rule.effect), format_plan(rule, plan), cost, greedy_cost))
+        return join_rules(rule, name_generator, plan)
+    print("Join order for %s: greedy (estimated %.6g intermediate tuples)" % (
+        _format_atom(rule.effect), greedy_cost))
+    return greedy_join.greedy_join(rule, name_generator)
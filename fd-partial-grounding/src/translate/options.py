@@ -1,4 +1,5 @@
 import argparse
+import os
 import sys
 
 
@@ -28,9 +29,19 @@ def parse_args():
     argparser.add_argument(
         "--sas-file", default="output.sas",
         help="path to the SAS output file (default: %(default)s)")
+    argparser.add_argument(
+        "--sas-file-format", choices=["text", "binary"], default="text",
+        help="format of the SAS output file (default: %(default)s). The binary format "
+             "is read faster by preprocess-h2 and the search component.")
     argparser.add_argument(
         "--invariant-generation-max-time", default=300, type=int,
         help="max time for invariant generation (default: %(default)ds)")
+    argparser.add_argument(
+        "--invariant-workers", default=1, type=int,
+        help="number of processes that check candidate invariants (default: "
+        "%(default)d). The invariants are the same as with one process, except "
+        "when the time limit is reached, which is measured in wall-clock time "
+        "with more than one process.")
     argparser.add_argument(
         "--add-implied-preconditions", action="store_true",
         help="infer additional preconditions. This setting can cause a "
@@ -108,6 +119,56 @@ def parse_args():
     argparser.add_argument(
         "--ignore-bad-actions", action="store_true",
         help="Completely ignore actions evaluated as bad by the GoodBadRuleEvaluator.")
+    argparser.add_argument(
+        "--compute-model-backend", default="default", choices=["default", "interned", "seminaive"],
+        help="implementation of the relaxed reachability fixpoint. 'interned' maps objects "
+             "and predicates to integers and compiles the rules into specialized functions; "
+             "it computes the same model as 'default'. 'seminaive' evaluates the rules "
+             "semi-naively on NumPy arrays; it computes the same atoms as 'default' "
+             "(in a different order), but only for full grounding with the default "
+             "termination condition.")
+    argparser.add_argument(
+        "--join-ordering", default="greedy", choices=["greedy", "cost"],
+        help="how the rules of the Datalog program are split into binary joins. "
+             "'greedy' joins the conditions that share the most variables first. "
+             "'cost' estimates the sizes of the joins from the facts of the initial "
+             "state and uses the join order with the fewest estimated intermediate "
+             "tuples if it is better than the greedy one (see join_order.py).")
+    argparser.add_argument(
+        "--restrict-static-domains", action="store_true",
+        help="before splitting the rules of the Datalog program, replace the unary "
+             "static conditions on each variable of a rule by a single condition "
+             "that also takes the other static conditions of the rule into account "
+             "(see PrologProgram.restrict_static_domains). Computes the same model "
+             "with fewer intermediate atoms.")
+    argparser.add_argument(
+        "--profile", action="store_true",
+        help="record statistics about the rules of the Datalog program, the action "
+             "queue, the rule evaluators and models and the memory usage of each "
+             "phase, and write them as JSON to the SAS file name with the extension "
+             ".profile.json (see profiler.py).")
+    argparser.add_argument(
+        "--grounding-checkpoint", type=str,
+        help="File to store the grounding state in after computing the model. If the "
+             "file exists and was written for the same task and grounding options, "
+             "grounding continues from the stored state instead of starting from scratch.")
+    argparser.add_argument(
+        "--grounding-checkpoint-read-only", action="store_true",
+        help="continue from the --grounding-checkpoint file (and the translation state "
+             "stored with it) if possible, but do not write them. Useful for the last "
+             "grounding run, e.g. with --termination-condition full.")
+    argparser.add_argument(
+        "--task-cache", type=str, default=os.environ.get("PARTIAL_GROUNDING_TASK_CACHE"),
+        help="directory for caching the normalized task and its Datalog program, keyed "
+             "by the contents of the input files. Can be shared by concurrent translator "
+             "runs. Defaults to the environment variable PARTIAL_GROUNDING_TASK_CACHE.")
+    argparser.add_argument(
+        "--grounding-memory-threshold", type=float,
+        help="fraction of the translator's memory limit (as set by the driver) above "
+             "which the indexes of the join and product rules are compacted into "
+             "integer arrays during the model computation. This is slower, but needs "
+             "less memory. Also prints the memory used by the index of each rule. "
+             "Only supported by the default --compute-model-backend.")
 
     return argparser.parse_args()
 
@@ -1,3 +1,6 @@
+import gc
+import re
+
 __all__ = ["ParseError", "parse_nested_list"]
 
 class ParseError(Exception):
@@ -6,16 +9,64 @@ class ParseError(Exception):
     def __str__(self):
         return self.value
 
+COMMENT_RE = re.compile(r";[^\n]*")
+
+
 # Basic functions for parsing PDDL (Lisp) files.
 def parse_nested_list(input_file):
-    tokens = tokenize(input_file)
-    next_token = next(tokens)
+    """Parse a file object or an iterable of lines. The result is the same
+    as that of parse_list_aux(tokenize(input_file)) after the leading "(",
+    but the whole input is tokenized at once and the nested lists are
+    built without recursion, which is much faster on large problem
+    files."""
+    if hasattr(input_file, "read"):
+        text = input_file.read()
+    else:
+        text = "\n".join(input_file)
+    text = COMMENT_RE.sub("", text)
+    try:
+        text.encode("ascii")
+    except UnicodeEncodeError:
+        for line in text.splitlines():
+            try:
+                line.encode("ascii")
+            except UnicodeEncodeError:
+                raise ParseError("Non-ASCII character outside comment: %s" % line)
+    text = text.lower().replace("(", " ( ").replace(")", " ) ").replace("?", " ?")
+    tokens = iter(text.split())
+    next_token = next(tokens, None)
     if next_token != "(":
         raise ParseError("Expected '(', got %s." % next_token)
-    result = list(parse_list_aux(tokens))
-    for tok in tokens:  # Check that generator is exhausted.
-        raise ParseError("Unexpected token: %s." % tok)
-    return result
+    # The lists cannot contain reference cycles. Disabling the garbage
+    # collector avoids that it repeatedly scans them while they are built.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _build_nested_list(tokens)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _build_nested_list(tokens):
+    # Leading "(" has already been swallowed.
+    result = []
+    stack = []
+    current = result
+    for token in tokens:
+        if token == "(":
+            stack.append(current)
+            current.append([])
+            current = current[-1]
+        elif token == ")":
+            if not stack:
+                for tok in tokens:
+                    raise ParseError("Unexpected token: %s." % tok)
+                return result
+            current = stack.pop()
+        else:
+            current.append(token)
+    raise ParseError("Missing ')'")
 
 def tokenize(input):
     for line in input:
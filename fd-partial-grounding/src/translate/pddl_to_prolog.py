@@ -1,6 +1,7 @@
 #! /usr/bin/env python3
 
 
+from collections import defaultdict
 import itertools
 
 import normalize
@@ -12,10 +13,9 @@ class PrologProgram:
         self.facts = []
         self.rules = []
         self.objects = set()
-        def predicate_name_generator():
-            for count in itertools.count():
-                yield "p$%d" % count
-        self.new_name = predicate_name_generator()
+        # Unlike a generator function, a map object can be pickled (which
+        # is needed for the task cache).
+        self.new_name = map("p$%d".__mod__, itertools.count())
     def add_fact(self, atom):
         self.facts.append(Fact(atom))
         self.objects |= set(atom.args)
@@ -35,15 +35,80 @@ class PrologProgram:
         self.remove_free_effect_variables()
         self.split_duplicate_arguments()
         self.convert_trivial_rules()
-    def split_rules(self):
+    def restrict_static_domains(self):
+        """Replace the unary static conditions (whose predicate is not the
+        effect of any rule) on a variable of a rule by a single condition
+        on a new static predicate dom@N. Its facts are the objects that
+        satisfy all static conditions of the rule in which the variable
+        occurs, including the projections of the static conditions with
+        more than one argument. For example, in
+        p(X, Y) :- q(X), r(X), s(X, Y), t(Y), q(X) and r(X) are replaced
+        by dom@0(X), where dom@0 holds for all objects o with q(o), r(o)
+        and s(o, y) for some y.
+        This does not change the model (apart from the dom@N facts), but
+        saves the joins of the unary conditions and restricts the other
+        joins of the rule earlier."""
+        fluent_predicates = {rule.effect.predicate for rule in self.rules}
+        static_facts = defaultdict(list)
+        for fact in self.facts:
+            if fact.atom.predicate not in fluent_predicates:
+                static_facts[fact.atom.predicate].append(fact.atom.args)
+        domain_predicates = {}
+        num_replaced_conditions = 0
+        for rule in self.rules:
+            if len(rule.conditions) < 2:
+                continue
+            domains = {}
+            unary_conditions = defaultdict(list)
+            for index, cond in enumerate(rule.conditions):
+                if cond.predicate in fluent_predicates:
+                    continue
+                facts = [args for args in static_facts[cond.predicate]
+                         if all(arg[0] == "?" or arg == fact_arg
+                                for arg, fact_arg in zip(cond.args, args))]
+                for position, arg in enumerate(cond.args):
+                    if arg[0] == "?":
+                        values = {args[position] for args in facts}
+                        domains[arg] = domains.get(arg, values) & values
+                if len(cond.args) == 1 and cond.args[0][0] == "?":
+                    unary_conditions[cond.args[0]].append(index)
+            replacements = {}
+            for var, indices in unary_conditions.items():
+                domain = frozenset(domains[var])
+                if len(indices) == 1:
+                    predicate = rule.conditions[indices[0]].predicate
+                    if len(domain) == len({args[0] for args in static_facts[predicate]}):
+                        # The condition is as tight as it gets.
+                        continue
+                if domain not in domain_predicates:
+                    predicate = "dom@%d" % len(domain_predicates)
+                    domain_predicates[domain] = predicate
+                    for obj in sorted(domain):
+                        self.add_fact(pddl.Atom(predicate, [obj]))
+                replacements[indices[0]] = pddl.Atom(domain_predicates[domain], [var])
+                for index in indices[1:]:
+                    replacements[index] = None
+                num_replaced_conditions += len(indices)
+            if replacements:
+                new_conditions = []
+                for index, cond in enumerate(rule.conditions):
+                    cond = replacements.get(index, cond)
+                    if cond is not None:
+                        new_conditions.append(cond)
+                rule.conditions = new_conditions
+        if num_replaced_conditions:
+            print("Static domains: Replaced %d conditions by %d domain predicates." % (
+                num_replaced_conditions, len(domain_predicates)))
+    def split_rules(self, statistics=None):
         import split_rules
         # Splits rules whose conditions can be partitioned in such a way that
         # the parts have disjoint variable sets, then split n-ary joins into
         # a number of binary joins, introducing new pseudo-predicates for the
-        # intermediate values.
+        # intermediate values. With statistics (see join_order.py), the
+        # joins are ordered by their estimated sizes.
         new_rules = []
         for rule in self.rules:
-            new_rules += split_rules.split_rule(rule, self.new_name)
+            new_rules += split_rules.split_rule(rule, self.new_name, statistics)
         self.rules = new_rules
     def remove_free_effect_variables(self):
         """Remove free effect variables like the variable Y in the rule
@@ -156,7 +221,7 @@ def translate_facts(prog, task):
         if isinstance(fact, pddl.Atom):
             prog.add_fact(fact)
 
-def translate(task):
+def translate(task, join_ordering="greedy", restrict_static_domains=False):
     # Note: The function requires that the task has been normalized.
     with timers.timing("Generating Datalog program"):
         prog = PrologProgram()
@@ -167,7 +232,13 @@ def translate(task):
         # Using block=True because normalization can output some messages
         # in rare cases.
         prog.normalize()
-        prog.split_rules()
+        if restrict_static_domains:
+            prog.restrict_static_domains()
+        statistics = None
+        if join_ordering == "cost":
+            import join_order
+            statistics = join_order.RelationStatistics(prog, task)
+        prog.split_rules(statistics)
     return prog
 
 
@@ -0,0 +1,266 @@
+"""Optional statistics about where the translator spends its time.
+
+With --profile, the translator records
+
+- the CPU time, wall-clock time and resident set size (current and
+  peak) after every timers.timing block,
+- for every rule of the Datalog program, how often it fired, how many
+  atoms it pushed, how many of them were new, and the time spent firing it,
+- for every action schema, the number of pushes to and pops from the
+  action queue and the time spent in them (which includes evaluating
+  models and rules),
+- the number of calls and the time of the functions and blocks marked
+  with timed and timing, e.g. RulesEvaluator.evaluate and predict_proba,
+- the counters printed at the end of compute_model,
+
+and writes them as JSON to <sas-file without extension>.profile.json.
+
+Without --profile, nothing is instrumented: timed returns the function
+unchanged and timing returns a shared no-op context manager.
+"""
+
+from collections import defaultdict
+import contextlib
+import json
+import os
+import time
+
+import options
+import timers
+import tools
+
+
+PROFILE_VERSION = 2
+
+
+def _format_atom(atom):
+    # Effects of action rules have the action as predicate.
+    predicate = getattr(atom.predicate, "name", atom.predicate)
+    return "%s(%s)" % (predicate, ", ".join(map(str, atom.args)))
+
+
+class RuleStatistics:
+    def __init__(self, rule):
+        self.rule = rule
+        self.fires = 0
+        self.pushes = 0
+        self.new_atoms = 0
+        self.time = 0.0
+
+    def to_json(self):
+        # Rules of the interned backend wrap the original rule.
+        rule = getattr(self.rule, "rule", self.rule)
+        return {
+            "rule": "%s :- %s" % (_format_atom(rule.effect), ", ".join(
+                map(_format_atom, rule.conditions))),
+            "type": type(rule).__name__,
+            "fires": self.fires,
+            "pushes": self.pushes,
+            "new_atoms": self.new_atoms,
+            "duplicate_pushes": self.pushes - self.new_atoms,
+            "time": self.time,
+        }
+
+
+class SchemaStatistics:
+    def __init__(self):
+        self.pushes = 0
+        self.pops = 0
+        self.push_time = 0.0
+        self.pop_time = 0.0
+
+    def to_json(self):
+        return {
+            "pushes": self.pushes,
+            "pops": self.pops,
+            "push_time": self.push_time,
+            "pop_time": self.pop_time,
+        }
+
+
+class FunctionStatistics:
+    def __init__(self):
+        self.calls = 0
+        self.time = 0.0
+
+    def to_json(self):
+        return {"calls": self.calls, "time": self.time}
+
+
+class Profile:
+    def __init__(self):
+        self.phases = []
+        # Statistics of the rules of all compute_model runs, by rule.
+        self.rules = {}
+        self.schemas = defaultdict(SchemaStatistics)
+        self.functions = defaultdict(FunctionStatistics)
+        self.counters = {}
+
+    def record_phase(self, name, timer):
+        cpu_time, wall_clock_time = timer.get_elapsed_times()
+        phase = {"name": name, "cpu_time": cpu_time,
+                 "wall_clock_time": wall_clock_time}
+        try:
+            phase["rss_kb"] = tools.get_rss_in_kb()
+            phase["peak_rss_kb"] = tools.get_peak_rss_in_kb()
+        except Warning:
+            pass
+        self.phases.append(phase)
+
+    def to_json(self):
+        return {
+            "version": PROFILE_VERSION,
+            "phases": self.phases,
+            "rules": [stats.to_json() for stats in self.rules.values()],
+            "action_schemas": {schema: stats.to_json()
+                               for schema, stats in sorted(self.schemas.items())},
+            "functions": {name: stats.to_json()
+                          for name, stats in sorted(self.functions.items())},
+            "counters": self.counters,
+        }
+
+
+_profile = None
+if options.profile:
+    _profile = Profile()
+    timers.timing_listeners.append(_profile.record_phase)
+
+
+def timed(name):
+    """Decorator that records the calls of the function under the given
+    name. Without profiling, the function is returned unchanged."""
+    def decorator(function):
+        if _profile is None:
+            return function
+        stats = _profile.functions[name]
+        perf_counter = time.perf_counter
+
+        def profiled_function(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.time += perf_counter() - start
+                stats.calls += 1
+        profiled_function.__name__ = function.__name__
+        profiled_function.__doc__ = function.__doc__
+        return profiled_function
+    return decorator
+
+
+class _NoTiming:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_TIMING = _NoTiming()
+
+
+@contextlib.contextmanager
+def _timing(stats):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.time += time.perf_counter() - start
+        stats.calls += 1
+
+
+def timing(name):
+    """Return a context manager that records the time of its block under
+    the given name."""
+    if _profile is None:
+        return _NO_TIMING
+    return _timing(_profile.functions[name])
+
+
+def _instrument_rule(rule, method_name, queue, stats):
+    method = getattr(rule, method_name)
+    enqueued = queue.enqueued
+    perf_counter = time.perf_counter
+
+    def profiled_method(args, cond_index, push):
+        num_pushes = queue.num_pushes
+        num_enqueued = len(enqueued)
+        start = perf_counter()
+        method(args, cond_index, push)
+        stats.time += perf_counter() - start
+        stats.fires += 1
+        stats.pushes += queue.num_pushes - num_pushes
+        stats.new_atoms += len(enqueued) - num_enqueued
+    setattr(rule, method_name, profiled_method)
+
+
+def _instrument_action_queue(action_queue, schemas):
+    push = action_queue.push
+    pop = action_queue.pop
+    perf_counter = time.perf_counter
+
+    def profiled_push(action):
+        start = perf_counter()
+        push(action)
+        stats = schemas[action.predicate.name]
+        stats.push_time += perf_counter() - start
+        stats.pushes += 1
+
+    def profiled_pop():
+        start = perf_counter()
+        action = pop()
+        stats = schemas[action.predicate.name]
+        stats.pop_time += perf_counter() - start
+        stats.pops += 1
+        return action
+    action_queue.push = profiled_push
+    action_queue.pop = profiled_pop
+
+
+@contextlib.contextmanager
+def profile_grounding(state):
+    """Instrument the rules and the action queue of a grounding state
+    (see build_model.GroundingState) while the block is executed. The
+    instrumentation is removed afterwards, so the state can be pickled."""
+    if _profile is None:
+        yield
+        return
+    instrumented_rules = []
+    for rule in state.rules:
+        # The rules of the default backend fire, the compiled rules of the
+        # interned backend process atoms. The semi-naive backend evaluates
+        # all rules at once and is not instrumented.
+        for method_name in ["fire", "process"]:
+            if hasattr(rule, method_name):
+                stats = _profile.rules.setdefault(id(rule), RuleStatistics(rule))
+                _instrument_rule(rule, method_name, state.queue, stats)
+                instrumented_rules.append((rule, method_name))
+                break
+    action_queue = state.queue.action_queue
+    _instrument_action_queue(action_queue, _profile.schemas)
+    try:
+        yield
+    finally:
+        for rule, method_name in instrumented_rules:
+            delattr(rule, method_name)
+        del action_queue.push
+        del action_queue.pop
+
+
+def record_counters(**counters):
+    if _profile is not None:
+        _profile.counters.update(counters)
+
+
+def get_filename():
+    return os.path.splitext(options.sas_file)[0] + ".profile.json"
+
+
+def write():
+    """Write the profile to the profile file if profiling is enabled."""
+    if _profile is None:
+        return
+    filename = get_filename()
+    with open(filename, "w") as profile_file:
+        json.dump(_profile.to_json(), profile_file, indent=2)
+    print("Wrote profile to %s" % filename)
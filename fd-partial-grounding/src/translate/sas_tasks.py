@@ -1,8 +1,64 @@
+from array import array
+
 SAS_FILE_VERSION = 3
+# First bytes of a file in the binary SAS format. A text SAS file cannot
+# start with a null byte.
+SAS_BINARY_MAGIC = b"\0sasbin\n"
 
 DEBUG = False
 
 
+class SASTextWriter:
+    """Write the lines of a SAS task as text. The components of the task
+    append their lines to self.lines, either as strings or as tuples of
+    numbers (written separated by spaces). The lines are written to the
+    stream in large chunks."""
+    CHUNK_SIZE = 100000
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lines = []
+
+    def flush_if_full(self):
+        if len(self.lines) >= self.CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            self.stream.write("\n".join(
+                line if type(line) is str else " ".join(map(str, line))
+                for line in self.lines))
+            self.stream.write("\n")
+            self.lines.clear()
+
+
+class SASBinaryWriter(SASTextWriter):
+    """Write the lines of a SAS task in the binary SAS format: after
+    SAS_BINARY_MAGIC, every number is a 32 bit integer (in the byte order
+    of the machine) and every string line is its length followed by its
+    UTF-8 bytes. The reader expects numbers and strings in the same order
+    as in the text format. The stream must be opened in binary mode."""
+    def __init__(self, stream):
+        super().__init__(stream)
+        stream.write(SAS_BINARY_MAGIC)
+
+    def flush(self):
+        numbers = array("i")
+        chunks = []
+        for line in self.lines:
+            if type(line) is str:
+                encoded = line.encode("utf-8")
+                numbers.append(len(encoded))
+                chunks.append(numbers.tobytes())
+                chunks.append(encoded)
+                numbers = array("i")
+            else:
+                numbers.extend(line)
+        chunks.append(numbers.tobytes())
+        self.stream.write(b"".join(chunks))
+        self.lines.clear()
+
+
 class SASTask:
     """Planning task in finite-domain representation.
 
@@ -75,25 +131,31 @@ class SASTask:
             axiom.dump()
         print("metric: %s" % self.metric)
 
-    def output(self, stream):
-        print("begin_version", file=stream)
-        print(SAS_FILE_VERSION, file=stream)
-        print("end_version", file=stream)
-        print("begin_metric", file=stream)
-        print(int(self.metric), file=stream)
-        print("end_metric", file=stream)
-        self.variables.output(stream)
-        print(len(self.mutexes), file=stream)
+    def output(self, stream, binary=False):
+        """Write the task to the stream in the text SAS format or, if
+        binary is set, in the binary SAS format (see SASBinaryWriter)."""
+        if binary:
+            writer = SASBinaryWriter(stream)
+        else:
+            writer = SASTextWriter(stream)
+        lines = writer.lines
+        lines += ["begin_version", (SAS_FILE_VERSION,), "end_version",
+                  "begin_metric", (int(self.metric),), "end_metric"]
+        self.variables.output_lines(lines)
+        lines.append((len(self.mutexes),))
         for mutex in self.mutexes:
-            mutex.output(stream)
-        self.init.output(stream)
-        self.goal.output(stream)
-        print(len(self.operators), file=stream)
+            mutex.output_lines(lines)
+        self.init.output_lines(lines)
+        self.goal.output_lines(lines)
+        lines.append((len(self.operators),))
         for op in self.operators:
-            op.output(stream)
-        print(len(self.axioms), file=stream)
+            op.output_lines(lines)
+            writer.flush_if_full()
+        lines.append((len(self.axioms),))
         for axiom in self.axioms:
-            axiom.output(stream)
+            axiom.output_lines(lines)
+            writer.flush_if_full()
+        writer.flush()
 
     def get_encoding_size(self):
         task_size = 0
@@ -156,17 +218,18 @@ class SASVariables:
             print("v%d in {%s}%s" % (var, list(range(rang)), axiom_str))
 
     def output(self, stream):
-        print(len(self.ranges), file=stream)
+        writer = SASTextWriter(stream)
+        self.output_lines(writer.lines)
+        writer.flush()
+
+    def output_lines(self, lines):
+        lines.append((len(self.ranges),))
         for var, (rang, axiom_layer, values) in enumerate(zip(
                 self.ranges, self.axiom_layers, self.value_names)):
-            print("begin_variable", file=stream)
-            print("var%d" % var, file=stream)
-            print(axiom_layer, file=stream)
-            print(rang, file=stream)
+            lines += ["begin_variable", "var%d" % var, (axiom_layer,), (rang,)]
             assert rang == len(values), (rang, values)
-            for value in values:
-                print(value, file=stream)
-            print("end_variable", file=stream)
+            lines += map(str, values)
+            lines.append("end_variable")
 
     def get_encoding_size(self):
         # A variable with range k has encoding size k + 1 to also give the
@@ -190,11 +253,14 @@ class SASMutexGroup:
             print("v%d: %d" % (var, val))
 
     def output(self, stream):
-        print("begin_mutex_group", file=stream)
-        print(len(self.facts), file=stream)
-        for var, val in self.facts:
-            print(var, val, file=stream)
-        print("end_mutex_group", file=stream)
+        writer = SASTextWriter(stream)
+        self.output_lines(writer.lines)
+        writer.flush()
+
+    def output_lines(self, lines):
+        lines += ["begin_mutex_group", (len(self.facts),)]
+        lines += self.facts
+        lines.append("end_mutex_group")
 
     def get_encoding_size(self):
         return len(self.facts)
@@ -220,10 +286,14 @@ class SASInit:
             print("v%d: %d" % (var, val))
 
     def output(self, stream):
-        print("begin_state", file=stream)
-        for val in self.values:
-            print(val, file=stream)
-        print("end_state", file=stream)
+        writer = SASTextWriter(stream)
+        self.output_lines(writer.lines)
+        writer.flush()
+
+    def output_lines(self, lines):
+        lines.append("begin_state")
+        lines += [(val,) for val in self.values]
+        lines.append("end_state")
 
 
 class SASGoal:
@@ -240,11 +310,14 @@ class SASGoal:
             print("v%d: %d" % (var, val))
 
     def output(self, stream):
-        print("begin_goal", file=stream)
-        print(len(self.pairs), file=stream)
-        for var, val in self.pairs:
-            print(var, val, file=stream)
-        print("end_goal", file=stream)
+        writer = SASTextWriter(stream)
+        self.output_lines(writer.lines)
+        writer.flush()
+
+    def output_lines(self, lines):
+        lines += ["begin_goal", (len(self.pairs),)]
+        lines += self.pairs
+        lines.append("end_goal")
 
     def get_encoding_size(self):
         return len(self.pairs)
@@ -267,9 +340,13 @@ class SASOperator:
         def listify(entry):
             var, pre, post, cond = entry
             return var, pre, post, list(cond)
-        pre_post = map(tuplify, pre_post)
-        pre_post = sorted(set(pre_post))
         pre_post = list(map(listify, pre_post))
+        # Usually, pre_post is already sorted and unique.
+        if any(entry >= next_entry
+               for entry, next_entry in zip(pre_post, pre_post[1:])):
+            pre_post = map(tuplify, pre_post)
+            pre_post = sorted(set(pre_post))
+            pre_post = list(map(listify, pre_post))
         return pre_post
 
     def validate(self, variables):
@@ -357,19 +434,20 @@ class SASOperator:
             print("  v%d: %d -> %d%s" % (var, pre, post, cond_str))
 
     def output(self, stream):
-        print("begin_operator", file=stream)
-        print(self.name[1:-1], file=stream)
-        print(len(self.prevail), file=stream)
-        for var, val in self.prevail:
-            print(var, val, file=stream)
-        print(len(self.pre_post), file=stream)
+        writer = SASTextWriter(stream)
+        self.output_lines(writer.lines)
+        writer.flush()
+
+    def output_lines(self, lines):
+        lines += ["begin_operator", self.name[1:-1], (len(self.prevail),)]
+        lines += self.prevail
+        lines.append((len(self.pre_post),))
         for var, pre, post, cond in self.pre_post:
-            print(len(cond), end=' ', file=stream)
-            for cvar, cval in cond:
-                print(cvar, cval, end=' ', file=stream)
-            print(var, pre, post, file=stream)
-        print(self.cost, file=stream)
-        print("end_operator", file=stream)
+            if cond:
+                lines.append((len(cond),) + sum(map(tuple, cond), ()) + (var, pre, post))
+            else:
+                lines.append((0, var, pre, post))
+        lines += [(self.cost,), "end_operator"]
 
     def get_encoding_size(self):
         size = 1 + len(self.prevail)
@@ -465,13 +543,15 @@ class SASAxiom:
         print("  v%d: %d" % (var, val))
 
     def output(self, stream):
-        print("begin_rule", file=stream)
-        print(len(self.condition), file=stream)
-        for var, val in self.condition:
-            print(var, val, file=stream)
+        writer = SASTextWriter(stream)
+        self.output_lines(writer.lines)
+        writer.flush()
+
+    def output_lines(self, lines):
+        lines += ["begin_rule", (len(self.condition),)]
+        lines += self.condition
         var, val = self.effect
-        print(var, 1 - val, val, file=stream)
-        print("end_rule", file=stream)
+        lines += [(var, 1 - val, val), "end_rule"]
 
     def get_encoding_size(self):
         return 1 + len(self.condition)
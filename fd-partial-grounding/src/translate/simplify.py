@@ -27,6 +27,7 @@ from collections import defaultdict
 from itertools import count
 
 import sas_tasks
+import tools
 
 DEBUG = False
 
@@ -43,7 +44,10 @@ class DomainTransitionGraph:
     Attributes:
     - init (int): the initial state value of the DTG variable
     - size (int): the number of values in the domain
-    - arcs (defaultdict: int -> set(int)): the DTG arcs (unlabeled)
+    - arcs (defaultdict: int -> int): the DTG arcs (unlabeled), as a
+      bitset of the target values for every source value
+    - arcs_from_all (int): bitset of the values that have an arc from
+      every other value
 
     There are no transition labels or goal values.
 
@@ -59,23 +63,30 @@ class DomainTransitionGraph:
         """Create a DTG with no arcs."""
         self.init = init
         self.size = size
-        self.arcs = defaultdict(set)
+        self.arcs = defaultdict(int)
+        self.arcs_from_all = 0
 
     def add_arc(self, u, v):
         """Add an arc from u to v."""
-        self.arcs[u].add(v)
+        self.arcs[u] |= 1 << v
+
+    def add_arcs_from_all(self, v):
+        """Add arcs from all other values to v."""
+        self.arcs_from_all |= 1 << v
 
     def reachable(self):
         """Return the values reachable from the initial value.
         Represented as a set(int)."""
-        queue = [self.init]
-        reachable = set(queue)
+        # The initial value is reachable, so every value with arcs
+        # from all other values is reachable, too.
+        reachable = (1 << self.init) | self.arcs_from_all
+        queue = list(_get_bits(reachable))
         while queue:
-            node = queue.pop()
-            new_neighbors = self.arcs.get(node, set()) - reachable
-            reachable |= new_neighbors
-            queue.extend(new_neighbors)
-        return reachable
+            new_neighbors = self.arcs.get(queue.pop(), 0) & ~reachable
+            if new_neighbors:
+                reachable |= new_neighbors
+                queue.extend(_get_bits(new_neighbors))
+        return set(_get_bits(reachable))
 
     def dump(self):
         """Dump the DTG."""
@@ -83,8 +94,18 @@ class DomainTransitionGraph:
         print("DTG init value:", self.init)
         print("DTG arcs:")
         for source, destinations in sorted(self.arcs.items()):
-            for destination in sorted(destinations):
+            for destination in _get_bits(destinations):
                 print("  %d => %d" % (source, destination))
+        for destination in _get_bits(self.arcs_from_all):
+            print("  * => %d" % destination)
+
+
+def _get_bits(bitset):
+    """Return the positions of the set bits in increasing order."""
+    while bitset:
+        lowest_bit = bitset & -bitset
+        yield lowest_bit.bit_length() - 1
+        bitset ^= lowest_bit
 
 
 def build_dtgs(task):
@@ -109,11 +130,9 @@ def build_dtgs(task):
         pre_spec may be -1, in which case arcs from every value
         other than post are added."""
         if pre_spec == -1:
-            pre_values = set(range(sizes[var_no])).difference([post])
+            dtgs[var_no].add_arcs_from_all(post)
         else:
-            pre_values = [pre_spec]
-        for pre in pre_values:
-            dtgs[var_no].add_arc(pre, post)
+            dtgs[var_no].add_arc(pre_spec, post)
 
     def get_effective_pre(var_no, conditions, effect_conditions):
         """Return combined information on the conditions on `var_no`
@@ -141,9 +160,17 @@ def build_dtgs(task):
         return result
 
     for op in task.operators:
-        conditions = dict(op.get_applicability_conditions())
+        # Same as dict(op.get_applicability_conditions()), without
+        # sorting and checking the conditions.
+        conditions = dict(op.prevail)
+        for var_no, pre, _, _ in op.pre_post:
+            if pre != -1:
+                conditions[var_no] = pre
         for var_no, _, post, cond in op.pre_post:
-            effective_pre = get_effective_pre(var_no, conditions, cond)
+            if cond:
+                effective_pre = get_effective_pre(var_no, conditions, cond)
+            else:
+                effective_pre = conditions.get(var_no, -1)
             if effective_pre is not None:
                 add_arc(var_no, effective_pre, post)
     for axiom in task.axioms:
@@ -351,13 +378,26 @@ class VarValueRenaming:
         # entries for the same variable. We solve this by computing
         # the sorting into prevail vs. preconditions from scratch, too.
 
-        applicability_conditions = op.get_applicability_conditions()
-        try:
-            self.convert_pairs(applicability_conditions)
-        except Impossible:
-            # The operator is never applicable.
-            return None
-        conditions_dict = dict(applicability_conditions)
+        # Same as converting op.get_applicability_conditions(), but
+        # without sorting and checking the conditions, which is
+        # noticeable for tasks with millions of operators.
+        new_var_nos = self.new_var_nos
+        new_values = self.new_values
+        conditions_dict = {}
+        for var, value in op.prevail:
+            new_value = new_values[var][value]
+            if new_value is always_false:
+                # The operator is never applicable.
+                return None
+            if new_value is not always_true:
+                conditions_dict[new_var_nos[var]] = new_value
+        for var, pre, _, _ in op.pre_post:
+            if pre != -1:
+                new_value = new_values[var][pre]
+                if new_value is always_false:
+                    return None
+                if new_value is not always_true:
+                    conditions_dict[new_var_nos[var]] = new_value
         new_prevail_vars = set(conditions_dict)
 
         new_pre_post = []
@@ -417,7 +457,8 @@ class VarValueRenaming:
         """
 
         var_no, pre, post, cond = pre_post_entry
-        new_var_no, new_post = self.translate_pair((var_no, post))
+        new_values_for_var = self.new_values[var_no]
+        new_post = new_values_for_var[post]
 
         if new_post is always_true:
             return None
@@ -425,7 +466,7 @@ class VarValueRenaming:
         if pre == -1:
             new_pre = -1
         else:
-            _, new_pre = self.translate_pair((var_no, pre))
+            new_pre = new_values_for_var[pre]
         assert new_pre is not always_false, (
             "This function should only be called for operators "
             "whose applicability conditions are deemed possible.")
@@ -434,11 +475,12 @@ class VarValueRenaming:
             return None
 
         new_cond = list(cond)
-        try:
-            self.convert_pairs(new_cond)
-        except Impossible:
-            # The effect conditions can never be satisfied.
-            return None
+        if new_cond:
+            try:
+                self.convert_pairs(new_cond)
+            except Impossible:
+                # The effect conditions can never be satisfied.
+                return None
 
         for cond_var, cond_value in new_cond:
             if (cond_var in conditions_dict and
@@ -456,7 +498,7 @@ class VarValueRenaming:
             "if this pre_post changes the value and can fire, "
             "new_pre cannot be always_true")
 
-        return new_var_no, new_pre, new_post, new_cond
+        return self.new_var_nos[var_no], new_pre, new_post, new_cond
 
     def translate_pair(self, fact_pair):
         (var_no, value) = fact_pair
@@ -509,12 +551,13 @@ def filter_unreachable_propositions(sas_task):
 
     if DEBUG:
         sas_task.validate()
-    dtgs = build_dtgs(sas_task)
-    renaming = build_renaming(dtgs)
-    # apply_to_task may raise Impossible if the goal is detected as
-    # unreachable or TriviallySolvable if it has no goal. We let the
-    # exceptions propagate to the caller.
-    renaming.apply_to_task(sas_task)
+    with tools.garbage_collection_disabled():
+        dtgs = build_dtgs(sas_task)
+        renaming = build_renaming(dtgs)
+        # apply_to_task may raise Impossible if the goal is detected as
+        # unreachable or TriviallySolvable if it has no goal. We let the
+        # exceptions propagate to the caller.
+        renaming.apply_to_task(sas_task)
     print("%d propositions removed" % renaming.num_removed_values)
     if DEBUG:
         sas_task.validate()
@@ -5,6 +5,7 @@
 from pddl_to_prolog import Rule, get_variables
 import graph
 import greedy_join
+import join_order
 import pddl
 
 def get_connected_conditions(conditions):
@@ -28,7 +29,7 @@ def project_rule(rule, conditions, name_generator):
     projected_rule = Rule(conditions, effect)
     return projected_rule
 
-def split_rule(rule, name_generator):
+def split_rule(rule, name_generator, statistics=None):
     important_conditions, trivial_conditions = [], []
     for cond in rule.conditions:
         for arg in cond.args:
@@ -43,13 +44,13 @@ def split_rule(rule, name_generator):
 
     components = get_connected_conditions(important_conditions)
     if len(components) == 1 and not trivial_conditions:
-        return split_into_binary_rules(rule, name_generator)
+        return split_into_binary_rules(rule, name_generator, statistics)
 
     projected_rules = [project_rule(rule, conditions, name_generator)
                        for conditions in components]
     result = []
     for proj_rule in projected_rules:
-        result += split_into_binary_rules(proj_rule, name_generator)
+        result += split_into_binary_rules(proj_rule, name_generator, statistics)
 
     conditions = ([proj_rule.effect for proj_rule in projected_rules] +
                   trivial_conditions)
@@ -61,8 +62,10 @@ def split_rule(rule, name_generator):
     result.append(combining_rule)
     return result
 
-def split_into_binary_rules(rule, name_generator):
+def split_into_binary_rules(rule, name_generator, statistics=None):
     if len(rule.conditions) <= 1:
         rule.type = "project"
         return [rule]
+    if statistics is not None:
+        return join_order.cost_based_join(rule, name_generator, statistics)
     return greedy_join.greedy_join(rule, name_generator)
@@ -1,6 +1,7 @@
 from .queue_factory import PriorityQueue
 from .priority_queue import FIFOQueue, SortedHeapQueue
 import options
+import profiler
 
 from collections import defaultdict
 import fasttext
@@ -292,7 +293,8 @@ class FastTextEvaluator:
         X_test_arr = np.hstack([np.vstack(X_test[feature])
                                 for feature in X_test.columns])
 
-        y_prob = classifier.predict_proba(X_test_arr)[:, 1]
+        with profiler.timing("predict_proba"):
+            y_prob = classifier.predict_proba(X_test_arr)[:, 1]
 
         # These probabilities correspond to a pair (windowed facts, query_action). For
         # each query action, we agreggate all its corresponding window probabilities
@@ -316,7 +318,8 @@ class FastTextEvaluatorOptimized:
     def get_estimates(self, actions, classifier):
         X_emb = self.windowizer.fit_transform([f"({a.predicate.name} {' '.join(a.args)})" for a in actions])
 
-        y_prob = classifier.predict_proba(X_emb)[:, 1]
+        with profiler.timing("predict_proba"):
+            y_prob = classifier.predict_proba(X_emb)[:, 1]
 
         num_windows = int(len(y_prob) / len(actions))
 
@@ -108,6 +108,7 @@ class IPC23RoundRobinQueue(PriorityQueue):
     def __init__(self, task, args):
         self.model = get_hybrid_model(task, args)
         self.schemas = list(self.model.get_trained_schemas())
+        self.schema_ids = {schema: i for i, schema in enumerate(self.schemas)}
         self.num_trained_schemas = len(self.schemas)
         self.current = 0
         self.queues = [SortedHeapQueue(False) for _ in self.schemas]
@@ -120,10 +121,8 @@ class IPC23RoundRobinQueue(PriorityQueue):
 
         self.good_bad_rule_evaluator = GodBadRuleEvaluator(task, args)
         for schema in self.good_bad_rule_evaluator.get_action_schemas():
-            if schema not in self.schemas:
-                self.schemas.append(schema)
-                self.num_grounded_actions.append(0)
-                self.queues.append(FIFOQueue())
+            if schema not in self.schema_ids:
+                self._add_untrained_schema(schema)
         self.good_actions = []
         self.bad_actions = []
         self.num_grounded_bad_actions = defaultdict(int)
@@ -160,6 +159,12 @@ class IPC23RoundRobinQueue(PriorityQueue):
     def has_good_actions(self):
         return bool(self.good_actions)
 
+    def _add_untrained_schema(self, schema):
+        self.schema_ids[schema] = len(self.schemas)
+        self.schemas.append(schema)
+        self.num_grounded_actions.append(0)
+        self.queues.append(FIFOQueue())
+
     def push(self, action):
         self.has_actions = True
         if self.good_bad_rule_evaluator.is_good_action(action):
@@ -169,16 +174,12 @@ class IPC23RoundRobinQueue(PriorityQueue):
                 self.bad_actions.append(action)
         else:
             schema = action.predicate.name
-            if schema not in self.schemas:
+            index = self.schema_ids.get(schema)
+            if index is None:
                 # first time we see this action schema; init datastructures
-                # TODO think of a more efficient way to implement this;
-                # can we obtain all schemas from the task initially?
-                self.schemas.append(schema)
-                self.num_grounded_actions.append(0)
-                self.queues.append(FIFOQueue())
+                self._add_untrained_schema(schema)
                 self.queues[-1].push(action)
             else:
-                index = self.schemas.index(schema)
                 if index < self.num_trained_schemas:
                     # we have a model
                     if self.batch_eval:
@@ -206,7 +207,7 @@ class IPC23RoundRobinQueue(PriorityQueue):
         if self.good_actions:
             action = self.good_actions.pop()
             self.closed.append(action)
-            self.num_grounded_actions[self.schemas.index(action.predicate.name)] += 1
+            self.num_grounded_actions[self.schema_ids[action.predicate.name]] += 1
             if not self.good_actions:
                 self._check_has_action()
             return action
@@ -250,6 +251,7 @@ class IPC23RatioQueue(PriorityQueue):
             self.target_ratios = []
             self.ratios = []
             self.schemas = []
+            self.schema_ids = {}
             self.queues = []
             self.num_grounded_actions = []
             self.num_actions = []
@@ -257,12 +259,15 @@ class IPC23RatioQueue(PriorityQueue):
                 schema, ratio = line.split(":")
                 self.target_ratios.append(float(ratio.strip()))
                 self.ratios.append(0.0)
+                self.schema_ids.setdefault(schema.strip(), len(self.schemas))
                 self.schemas.append(schema.strip())
                 if schema in self.trained_schemas:
                     self.queues.append(SortedHeapQueue(False))
                 else:
                     self.queues.append(FIFOQueue())
                 self.num_grounded_actions.append(0)
+        # Sum of num_grounded_actions.
+        self.total_num_grounded = 0
 
         self.closed = []
         self.skipped_action_schemas = set()
@@ -321,10 +326,10 @@ class IPC23RatioQueue(PriorityQueue):
                 self.bad_actions.append(action)
         else:
             schema = action.predicate.name
-            if schema not in self.schemas:
+            index = self.schema_ids.get(schema)
+            if index is None:
                 self.skipped_action_schemas.add(schema)
                 return
-            index = self.schemas.index(schema)
             if schema not in self.trained_schemas:
                 self.queues[index].push(action)
             else:
@@ -333,27 +338,44 @@ class IPC23RatioQueue(PriorityQueue):
                 else:
                     self.queues[index].push(action, self.model.get_estimate(action))
 
+    def _count_grounded_action(self, schema):
+        index = self.schema_ids.get(schema)
+        if index is not None:
+            self.num_grounded_actions[index] += 1
+            self.total_num_grounded += 1
+
+    def _get_next_index(self):
+        # The schema with a non-empty queue whose ratio is farthest below its
+        # target ratio; the first one on ties. None if all queues are empty.
+        next_index = None
+        max_prio = -inf
+        target_ratios = self.target_ratios
+        ratios = self.ratios
+        non_evaluated_actions = self.non_evaluated_actions if self.batch_eval else None
+        for i, queue in enumerate(self.queues):
+            if queue or (non_evaluated_actions and non_evaluated_actions[i]):
+                prio = target_ratios[i] - ratios[i]
+                if prio > max_prio:
+                    max_prio = prio
+                    next_index = i
+        return next_index
+
     def pop(self):
         if self.good_actions:
             action = self.good_actions.pop()
             self.closed.append(action)
-            schema = action.predicate.name
-            if schema in self.schemas:
-                self.num_grounded_actions[self.schemas.index(schema)] += 1
+            self._count_grounded_action(action.predicate.name)
             return action
 
-        prio, next_index = max([(self.target_ratios[i] - self.ratios[i], i)
-                                if self.queues[i] or (self.batch_eval and self.non_evaluated_actions[i]) else (-inf, i)
-                                for i in range(len(self.ratios))], key=lambda item: item[0])
+        next_index = self._get_next_index()
 
-        if prio == -inf:
+        if next_index is None:
             # only bad actions left to ground
             action = self.bad_actions.pop()
             self.closed.append(action)
             schema = action.predicate.name
             self.num_grounded_bad_actions[schema] += 1
-            if schema in self.schemas:
-                self.num_grounded_actions[self.schemas.index(schema)] += 1
+            self._count_grounded_action(schema)
             return action
 
         if self.batch_eval and self.non_evaluated_actions[next_index]:
@@ -368,8 +390,8 @@ class IPC23RatioQueue(PriorityQueue):
             self.closed.append(action)
 
         self.num_grounded_actions[next_index] += 1
-        total_num_grounded = sum(self.num_grounded_actions)
-        for i in range(len(self.ratios)):
-            self.ratios[i] = self.num_grounded_actions[i] / total_num_grounded
+        self.total_num_grounded += 1
+        total_num_grounded = self.total_num_grounded
+        self.ratios = [num / total_num_grounded for num in self.num_grounded_actions]
 
         return action
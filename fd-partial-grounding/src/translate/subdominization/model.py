@@ -6,6 +6,7 @@ import os.path
 import pickle
 from sys import exit
 
+import profiler
 from subdominization.rule_evaluator import RulesEvaluator
 from subdominization.rule_evaluator_aleph import RuleEvaluatorAleph
 
@@ -56,7 +57,9 @@ class TrainedModel:
         if self.model[schema].is_classifier:
             # the returned list has only one entry (estimates for the input action), 
             # of which the second entry is the probability that the action is in the plan (class 1)
-            prob_estimation = self.model[schema].model.predict_proba([self.ruleEvaluator.evaluate(action)])[0]
+            features = [self.ruleEvaluator.evaluate(action)]
+            with profiler.timing("predict_proba"):
+                prob_estimation = self.model[schema].model.predict_proba(features)[0]
 
             if len(prob_estimation) > 1:
                 assert len(prob_estimation) == 2
@@ -98,14 +101,16 @@ class TrainedModel:
         if self.model[schema].is_classifier:
             # the returned list has only one entry (estimates for the input action), 
             # of which the second entry is the probability that the action is in the plan (class 1)
-            prob_estimates = [p for p in self.model[schema].model.predict_proba([self.ruleEvaluator.evaluate(a) for a in actions])]
+            features = self.ruleEvaluator.evaluate_batch(actions)
+            with profiler.timing("predict_proba"):
+                prob_estimates = [p for p in self.model[schema].model.predict_proba(features)]
             if len(prob_estimates[0]) > 1:
                 estimates = [p[1] for p in prob_estimates]
             else:
                 value = self.model[schema].model.predict([self.ruleEvaluator.evaluate(actions[0])])[0]
                 estimates = [value for _ in actions]
         else:
-            estimates = self.model[schema].model.predict([self.ruleEvaluator.evaluate(a) for a in actions])        
+            estimates = self.model[schema].model.predict(self.ruleEvaluator.evaluate_batch(actions))
           
         if any(e < 0 or e > 1 for e in estimates):
             self.values_off_for_schema.add(schema)
@@ -14,53 +14,118 @@ import random
 
         
 class SortedHeapQueue:
+    """Heap of (estimate, count, action) entries, where the count breaks ties
+    in FIFO order. Batches added with push_list are only merged into the heap
+    when the next element is needed, with a single heapify if the batch is
+    large compared to the heap. Entries are removed lazily: remove marks the
+    handle (the count) of an entry and pop skips marked entries.
+
+    After a lookup of hard actions found none, only actions pushed afterwards
+    are checked by the next lookups, until notify_new_hard_actions is
+    called."""
     def __init__(self, min_wins=True):
         self.queue = []
+        self.pending = []
+        self.removed = set()
+        # Maps the handles of the entries pushed since the last lookup that
+        # checked all entries to their actions. None if the next lookup has
+        # to check all entries.
+        self.unchecked = None
         self.count = 0  # this speeds up the queue significantly
         self.min_wins = min_wins  # if true, return minimal element, if false return maximal
 
     def __bool__(self):
-        return bool(self.queue)
+        return len(self.queue) + len(self.pending) > len(self.removed)
     __nonzero__ = __bool__
 
+    def __len__(self):
+        return len(self.queue) + len(self.pending) - len(self.removed)
+
     def get_hard_action_if_exists(self, is_hard_action):
 #         return [action for estimate, action in self.queue if is_hard_action(action)] 
 # did not help too much + can even have negative impact on runtime
 # probably try this as a parameter n; where each call returns up to n hard actions
-        for i in range(len(self.queue)):
-            action = self.queue[i][1]
-            if is_hard_action(action):
-                del self.queue[i]
-                heapq.heapify(self.queue)
-                return [action]
+        removed = self.removed
+        if self.unchecked is None:
+            for entries in (self.queue, self.pending):
+                for _, handle, action in entries:
+                    if handle not in removed and is_hard_action(action):
+                        removed.add(handle)
+                        return [action]
+        else:
+            unchecked = self.unchecked
+            for handle, action in list(unchecked.items()):
+                del unchecked[handle]
+                if is_hard_action(action):
+                    removed.add(handle)
+                    return [action]
+        self.unchecked = {}
         return []
 
-    def notify_new_hard_actions(self):
-        pass
+    def notify_new_hard_actions(self, schemas=None):
+        self.unchecked = None
 
     def push(self, action, estimate):
+        """Add *action* and return a handle that can be passed to remove."""
+        handle = self.count
         if self.min_wins:
-            heapq.heappush(self.queue, (estimate, self.count, action))
+            entry = (estimate, handle, action)
         else:
-            heapq.heappush(self.queue, (-estimate, self.count, action))
+            entry = (-estimate, handle, action)
+        heapq.heappush(self.queue, entry)
+        if self.unchecked is not None:
+            self.unchecked[handle] = action
         self.count += 1
+        return handle
 
     def push_list(self, actions, estimates):
         assert(len(actions) == len(estimates))
-        # TODO can this be done more efficient when making actions a heapq itself 
-        # and then merging the two?
-        for i in range(len(actions)):
-            if self.min_wins:
-                heapq.heappush(self.queue, (estimates[i], self.count, actions[i]))
-            else:
-                heapq.heappush(self.queue, (-estimates[i], self.count, actions[i]))
-            self.count += 1
+        count = self.count
+        if self.min_wins:
+            self.pending += zip(estimates, range(count, count + len(actions)), actions)
+        else:
+            self.pending += zip([-estimate for estimate in estimates],
+                                range(count, count + len(actions)), actions)
+        if self.unchecked is not None:
+            self.unchecked.update(zip(range(count, count + len(actions)), actions))
+        self.count += len(actions)
+
+    def remove(self, handle):
+        """Remove the entry with the given handle, which must not have been
+        popped or removed before."""
+        self.removed.add(handle)
+        if self.unchecked:
+            self.unchecked.pop(handle, None)
+
+    def _merge_pending(self):
+        pending = self.pending
+        queue = self.queue
+        if len(pending) * 4 >= len(queue):
+            # Rebuilding the heap is linear in its size.
+            queue += pending
+            heapq.heapify(queue)
+        else:
+            for entry in pending:
+                heapq.heappush(queue, entry)
+        self.pending = []
+
+    def _pop(self):
+        if self.pending:
+            self._merge_pending()
+        entry = heapq.heappop(self.queue)
+        removed = self.removed
+        while removed and entry[1] in removed:
+            removed.remove(entry[1])
+            entry = heapq.heappop(self.queue)
+        if self.unchecked:
+            self.unchecked.pop(entry[1], None)
+        return entry
 
     def pop(self):
-        return heapq.heappop(self.queue)[2]
+        return self._pop()[2]
 
     def pop_entry(self):
-        entry = heapq.heappop(self.queue)
+        entry = self._pop()
         if self.min_wins:
             return entry[0], entry[2]
         else:
@@ -73,8 +138,15 @@ class RandomEvaluator():
         if options.random_seed:
             random_seed = options.random_seed
         random.seed(random_seed)
+    def __getstate__(self):
+        # Keep the random sequence when grounding continues from a checkpoint.
+        return {"random_state": random.getstate()}
+    def __setstate__(self, state):
+        random.setstate(state["random_state"])
     def get_estimate(self, _):
         return random.randint(0, 10)
+    def get_estimates(self, actions):
+        return [random.randint(0, 10) for _ in actions]
     def print_stats(self):
         pass
      
@@ -289,6 +361,7 @@ class EvaluatorQueue(PriorityQueue):
 class RoundRobinQueue(PriorityQueue):
     def __init__(self):
         self.schemas = []
+        self.schema_ids = {}
         self.current = 0
         self.queues = []
         self.num_grounded_actions = []
@@ -317,14 +390,16 @@ class RoundRobinQueue(PriorityQueue):
         return []
     def notify_new_hard_actions(self, schemas):
         for schema in schemas:
-            if (schema in self.schemas):
-                self.queues[self.queues.index(schema)].notify_new_hard_actions(schemas)
+            if (schema in self.schema_ids):
+                self.queues[self.schema_ids[schema]].notify_new_hard_actions(schemas)
     def push(self, action):
-        if (not action.predicate.name in self.schemas):
+        index = self.schema_ids.get(action.predicate.name)
+        if (index is None):
+            index = self.schema_ids[action.predicate.name] = len(self.schemas)
             self.schemas.append(action.predicate.name)
             self.queues.append(FIFOQueue())
             self.num_grounded_actions.append(0)
-        self.queues[self.schemas.index(action.predicate.name)].push(action)
+        self.queues[index].push(action)
     def pop(self):
         while True:
             self.current = (self.current + 1) % len(self.schemas)
@@ -340,11 +415,13 @@ class RatioQueue(PriorityQueue):
             self.target_ratios = []
             self.ratios = []
             self.schemas = []
+            self.schema_ids = {}
             self.queues = []
             for line in ratios:
                 schema, ratio = line.split(":")
                 self.target_ratios.append(float(ratio.strip()))
                 self.ratios.append(0.0)
+                self.schema_ids.setdefault(schema.strip(), len(self.schemas))
                 self.schemas.append(schema.strip())
                 self.queues.append(FIFOQueue())
         self.skipped_action_schemas = set()
@@ -369,13 +446,13 @@ class RatioQueue(PriorityQueue):
         return []
     def notify_new_hard_actions(self, schemas):
         for schema in schemas:
-            if (schema in self.schemas):
-                self.queues[self.queues.index(schema)].notify_new_hard_actions(schemas)
+            if (schema in self.schema_ids):
+                self.queues[self.schema_ids[schema]].notify_new_hard_actions(schemas)
     def push(self, action):
-        if (not action.predicate.name in self.schemas):
+        index = self.schema_ids.get(action.predicate.name)
+        if (index is None):
             self.skipped_action_schemas.add(action.predicate.name)
         else:
-            index = self.schemas.index(action.predicate.name)
             self.queues[index].push(action)
             if (not options.plan_ratios):
                 # ratio is the number of grounded actions of schema X over the total number of actions of X in the queue (grounded or not)
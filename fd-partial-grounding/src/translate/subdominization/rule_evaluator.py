@@ -2,8 +2,12 @@
 # -*- coding: utf-8 -*-
 
 from collections import defaultdict
+import functools
 import itertools
+import operator
+import numpy as np
 import pddl
+import profiler
 
 
 def valid_values(variables, values, variable_domains):
@@ -90,37 +94,72 @@ class Constraint:
         return values in self.compliant_values
                 
         
-def evaluate_inigoal_rule(rule, fact_list):
-    def eval_constants(fact, constants):
-        for (i, val) in constants:
-            if fact.args[i] != val:
-                return False
-        return True
-    compliant_values = set()
-
+class FactIndex:
+    """The arguments of a list of facts, by predicate and by (predicate,
+    argument position, object). The positional indexes are built when they
+    are first needed."""
+    def __init__(self, fact_list):
+        self.by_predicate = defaultdict(list)
+        for fact in fact_list:
+            if type(fact) != pddl.Assign:
+                self.by_predicate[fact.predicate].append(fact.args)
+        self.by_position = {}
+
+    def get_facts(self, predicate, constants):
+        """Return the arguments of all facts of *predicate* that have the
+        object val at position i for all (i, val) in *constants*."""
+        if not constants:
+            return self.by_predicate.get(predicate, [])
+        pos, val = constants[0]
+        key = (predicate, pos)
+        index = self.by_position.get(key)
+        if index is None:
+            index = self.by_position[key] = defaultdict(list)
+            for args in self.by_predicate.get(predicate, []):
+                index[args[pos]].append(args)
+        facts = index.get(val, [])
+        if len(constants) > 1:
+            facts = [args for args in facts
+                     if all(args[i] == val for (i, val) in constants[1:])]
+        return facts
+
+
+@functools.lru_cache(maxsize=None)
+def parse_inigoal_rule(rule):
+    """Return the predicate, the variables, the (position, object) pairs of
+    the constants and the positions of each variable of a body atom."""
     predicate_name, arguments = rule.split("(")
     arguments = arguments.replace(")", "").replace("\n", "").replace(".", "").replace(" ", "").split(",")
     if arguments == ['']:
          # e.g. for predicates without argument like "handempty()"
          arguments = []
     valid_arguments = tuple(set([a for a in arguments if a.startswith("?")]))
-    constants = [(i, val) for (i, val) in enumerate(arguments) if val != "_" and not val.startswith("?")]
-    positions_argument = {}
+    constants = tuple((i, val) for (i, val) in enumerate(arguments) if val != "_" and not val.startswith("?"))
+    positions_argument = tuple(tuple(i for (i, v) in enumerate(arguments) if v == a)
+                               for a in valid_arguments)
+    return predicate_name, valid_arguments, constants, positions_argument
 
-    for a in valid_arguments:
-        positions_argument[a] = [i for (i, v) in enumerate(arguments) if v == a]
 
-    arguments = valid_arguments
-    for fact in fact_list:
-        if type(fact) != pddl.Assign and fact.predicate == predicate_name and eval_constants(fact, constants):
-            values = []
-            for a in arguments:
-                if len(set([fact.args[p] for p in positions_argument[a]])) > 1:
-                    break
-                values.append(fact.args[positions_argument[a][0]])
-
-            if len(values) == len(arguments):
-                compliant_values.add(tuple(values))
+def evaluate_inigoal_rule(rule, fact_list):
+    """*fact_list* is a list of facts or a FactIndex. Pass a FactIndex when
+    evaluating many rules on the same facts."""
+    if not isinstance(fact_list, FactIndex):
+        fact_list = FactIndex(fact_list)
+    predicate_name, arguments, constants, positions_argument = parse_inigoal_rule(rule)
+    compliant_values = set()
+    facts = fact_list.get_facts(predicate_name, constants)
+    if any(len(positions) > 1 for positions in positions_argument):
+        # A variable occurs more than once in the atom.
+        facts = [args for args in facts
+                 if all(args[p] == args[positions[0]]
+                        for positions in positions_argument for p in positions[1:])]
+    if len(positions_argument) == 1:
+        pos = positions_argument[0][0]
+        compliant_values = set((args[pos],) for args in facts)
+    elif positions_argument:
+        compliant_values = set(map(operator.itemgetter(*[positions[0] for positions in positions_argument]), facts))
+    elif facts:
+        compliant_values.add(())
 
     return arguments, compliant_values
 
@@ -137,8 +176,79 @@ def get_free_variable_domains(constraints):
     return free_variable_domains
 
 
+class RuleIndex:
+    """Data shared by all RulesEvaluators of a task (e.g. the good, bad and
+    relevant rules): the facts matching each distinct body atom, the distinct
+    constraints, and the constraint results of the last evaluated action.
+    Evaluating the good rules, the bad rules and the features of an action
+    one after the other evaluates every distinct constraint at most once."""
+    def __init__(self, task):
+        self.task = task
+        self.fact_indexes = {}
+        self.inigoal_results = {}
+        # Maps (schema, action arguments, compliant values) to an index in
+        # self.constraints.
+        self.constraint_ids = {}
+        self.constraints = []
+        self.last_action = None
+        self.last_results = {}
+        # Used by RulesEvaluator.evaluate_batch.
+        self.object_ids = {}
+        self.compiled_constraints = {}
+
+    def evaluate_inigoal_rule(self, source, rule):
+        key = (source, "".join(rule.split()).rstrip("."))
+        result = self.inigoal_results.get(key)
+        if result is None:
+            result = self.inigoal_results[key] = evaluate_inigoal_rule(
+                rule, self.get_fact_index(source))
+        # The set of compliant values is shared by all rules with this atom;
+        # Constraint.update replaces it instead of modifying it.
+        return result
+
+    def get_fact_index(self, source):
+        fact_index = self.fact_indexes.get(source)
+        if fact_index is None:
+            if source == "ini":
+                facts = self.task.init
+            elif source == "goal":
+                facts = self.task.goal.parts
+            else:
+                facts = self.task.split_relaxed_plan_facts
+            fact_index = self.fact_indexes[source] = FactIndex(facts)
+        return fact_index
+
+    def get_constraint_id(self, schema, constraint):
+        key = (schema, tuple(constraint.action_arguments),
+               frozenset(constraint.compliant_values))
+        constraint_id = self.constraint_ids.get(key)
+        if constraint_id is None:
+            constraint_id = self.constraint_ids[key] = len(self.constraints)
+            self.constraints.append(constraint)
+        return constraint_id
+
+    def get_results(self, action):
+        """Cached constraint results of *action*, by constraint id."""
+        if action is not self.last_action:
+            self.last_action = action
+            self.last_results = {}
+        return self.last_results
+
+
+# The translator handles one task per process, so the indexes are kept
+# for the lifetime of the process.
+_rule_indexes = {}
+
+
+def get_rule_index(task):
+    index = _rule_indexes.get(task)
+    if index is None:
+        index = _rule_indexes[task] = RuleIndex(task)
+    return index
+
+
 class RuleEval:
-    def __init__(self, rule_text, task):
+    def __init__(self, rule_text, task, index=None):
         # print("Loading: " + rule_text)
         self.text = rule_text.replace('\n', '')
         head, body = rule_text.split(":-")
@@ -151,7 +261,10 @@ class RuleEval:
             rule_type, rule = rule.split(":")
             rule_type = rule_type.strip()
 
-            if rule_type == "ini":
+            if rule_type in ["ini", "goal", "split", "relaxed_fact"] and index:
+                source = "split" if rule_type == "relaxed_fact" else rule_type
+                arguments, compliant_values = index.evaluate_inigoal_rule(source, rule)
+            elif rule_type == "ini":
                 arguments, compliant_values = evaluate_inigoal_rule(rule, task.init)
             elif rule_type == "goal":
                 arguments, compliant_values = evaluate_inigoal_rule(rule, task.goal.parts)
@@ -285,18 +398,135 @@ class RuleEval:
             return 1
 
 
+class CompiledConstraint:
+    """A Constraint on integer-encoded action arguments. Every tuple of
+    compliant values is encoded as one number (the object ids are the
+    digits), so that the membership test of a whole column of actions is a
+    binary search in the sorted array of encoded compliant values."""
+    def __init__(self, constraint, object_ids):
+        self.positions = list(constraint.action_arguments)
+        for values in constraint.compliant_values:
+            for obj in values:
+                if obj not in object_ids:
+                    object_ids[obj] = len(object_ids) + 1
+        # Objects that are added to object_ids later, e.g. by constraints of
+        # other rules, do not occur in compliant_values and are mapped to 0.
+        self.base = len(object_ids) + 1
+        self.constant = None
+        if not self.positions:
+            self.constant = () in constraint.compliant_values
+        keys = [self._encode_tuple(values, object_ids)
+                for values in constraint.compliant_values]
+        self.keys = np.unique(np.array(keys, dtype=np.int64))
+
+    def _encode_tuple(self, values, object_ids):
+        key = 0
+        for obj in reversed(values):
+            key = key * self.base + object_ids[obj]
+        return key
+
+    def evaluate(self, arg_ids):
+        """Return a boolean array that says for every row of arg_ids (the
+        encoded arguments of one action) if it satisfies the constraint."""
+        if self.constant is not None:
+            return np.full(len(arg_ids), self.constant)
+        keys = np.zeros(len(arg_ids), dtype=np.int64)
+        for pos in reversed(self.positions):
+            column = arg_ids[:, pos]
+            keys = keys * self.base + np.where(column < self.base, column, 0)
+        if not len(self.keys):
+            return np.zeros(len(arg_ids), dtype=bool)
+        indices = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return self.keys[indices] == keys
+
+
 class RulesEvaluator:
     def __init__(self, rule_text, task):
+        self.index = get_rule_index(task)
         self.rules = defaultdict(list)
+        # For every rule, the ids of its constraints in self.index, or None
+        # if the rule has free variables (and always evaluates to 0).
+        self.rule_constraint_ids = defaultdict(list)
         for l in rule_text:
-            re = RuleEval(l, task)
+            re = RuleEval(l, task, self.index)
             self.rules[re.action_schema].append(re)
+            if re.free_variable_domains:
+                constraint_ids = None
+            else:
+                constraint_ids = [self.index.get_constraint_id(re.action_schema, c)
+                                  for c in re.constraints]
+            self.rule_constraint_ids[re.action_schema].append(constraint_ids)
+        # Used by evaluate_batch; filled for each schema on first use.
+        self.object_ids = self.index.object_ids
+        self.compiled_rules = {}
 
     def get_action_schemas(self):
         return list(self.rules.keys())
              
+    @profiler.timed("RulesEvaluator.evaluate")
     def evaluate(self, action):
-        return [rule.evaluate(action) for rule in self.rules[action.predicate.name]]
+        constraints = self.index.constraints
+        results = self.index.get_results(action)
+        evaluation = []
+        for constraint_ids in self.rule_constraint_ids[action.predicate.name]:
+            value = 0
+            if constraint_ids is not None:
+                value = 1
+                for constraint_id in constraint_ids:
+                    result = results.get(constraint_id)
+                    if result is None:
+                        result = results[constraint_id] = constraints[constraint_id].evaluate(action.args)
+                    if not result:
+                        value = 0
+                        break
+            evaluation.append(value)
+        return evaluation
+
+    def _compile_rules(self, schema):
+        # A compiled rule is the list of its compiled constraints, or None
+        # if it has to be evaluated with RuleEval.evaluate.
+        compiled_constraints = self.index.compiled_constraints
+        compiled_rules = []
+        for rule, constraint_ids in zip(self.rules[schema], self.rule_constraint_ids[schema]):
+            # Upper bound on the number of objects after compiling the rule;
+            # the encoded tuples must fit into 64 bit integers.
+            num_objects = len(self.object_ids) + sum(
+                len(values) for c in rule.constraints for values in c.compliant_values)
+            if rule.free_variable_domains or not all(
+                    isinstance(c, Constraint) and
+                    (num_objects + 1) ** len(c.action_arguments) < 2 ** 62
+                    for c in rule.constraints):
+                compiled_rules.append(None)
+            else:
+                for constraint_id, c in zip(constraint_ids, rule.constraints):
+                    if constraint_id not in compiled_constraints:
+                        compiled_constraints[constraint_id] = CompiledConstraint(c, self.object_ids)
+                compiled_rules.append([compiled_constraints[constraint_id]
+                                       for constraint_id in constraint_ids])
+        return compiled_rules
+
+    @profiler.timed("RulesEvaluator.evaluate_batch")
+    def evaluate_batch(self, actions):
+        """Evaluate the rules on a list of actions of the same schema. Row i
+        of the returned matrix is evaluate(actions[i])."""
+        schema = actions[0].predicate.name
+        compiled_rules = self.compiled_rules.get(schema)
+        if compiled_rules is None:
+            compiled_rules = self.compiled_rules[schema] = self._compile_rules(schema)
+        object_ids = self.object_ids
+        arg_ids = np.array([[object_ids.get(arg, 0) for arg in action.args]
+                            for action in actions], dtype=np.int64)
+        arg_ids = arg_ids.reshape(len(actions), len(actions[0].args))
+        features = np.zeros((len(actions), len(compiled_rules)), dtype=np.int64)
+        for i, (rule, constraints) in enumerate(zip(self.rules[schema], compiled_rules)):
+            if constraints is None:
+                features[:, i] = [rule.evaluate(action) for action in actions]
+            else:
+                satisfied = np.ones(len(actions), dtype=bool)
+                for constraint in constraints:
+                    satisfied &= constraint.evaluate(arg_ids)
+                features[:, i] = satisfied
+        return features
 
     def get_all_rules(self):
         return [rule.text for schema, rules in self.rules.items() for rule in rules]
@@ -0,0 +1,44 @@
+import os.path
+import sys
+
+import pytest
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+TRANSLATE = os.path.join(os.path.dirname(DIR), "translate.py")
+REPO = os.path.abspath(os.path.join(DIR, "..", "..", ".."))
+BENCHMARKS = os.path.join(REPO, "misc", "tests", "benchmarks")
+
+
+def get_task_files(domain_name, problem=None):
+    """Return the domain and problem file of a benchmark. Without a problem
+    name, the alphabetically first problem of the domain is used."""
+    directory = os.path.join(BENCHMARKS, domain_name)
+    if problem is None:
+        problem = sorted(name for name in os.listdir(directory) if name != "domain.pddl")[0]
+    return os.path.join(directory, "domain.pddl"), os.path.join(directory, problem)
+
+
+@pytest.fixture(scope="session")
+def options():
+    """The translator options are parsed when the options module is first
+    imported, so they are parsed only once for all tests. Tests that need
+    other options have to monkeypatch the attributes of this module."""
+    argv = sys.argv
+    sys.argv = ["translate.py", *get_task_files("gripper", "prob01.pddl")]
+    try:
+        import options
+    finally:
+        sys.argv = argv
+    return options
+
+
+@pytest.fixture
+def task(request, options):
+    """Parse a benchmark task, by default gripper/prob01.pddl. Use indirect
+    parametrization with a domain name or a (domain name, problem) pair to
+    parse another one."""
+    import pddl_parser
+    param = getattr(request, "param", ("gripper", "prob01.pddl"))
+    if isinstance(param, str):
+        param = (param,)
+    return pddl_parser.open(*get_task_files(*param))
@@ -0,0 +1,71 @@
+import os.path
+import re
+import subprocess
+import sys
+
+import pytest
+
+from .conftest import DIR, TRANSLATE, get_task_files
+
+BUILD_MODEL = os.path.join(os.path.dirname(DIR), "build_model.py")
+
+TASKS = [
+    ("gripper", "prob01.pddl"),
+    ("miconic-simpleadl", "s1-0.pddl"),
+    ("philosophers", "p01-phil2.pddl"),
+]
+
+
+def translate(tmp_path, domain, problem, backend, *options):
+    sas_file = backend + ".sas"
+    cmd = [sys.executable, TRANSLATE, *get_task_files(domain, problem),
+           "--sas-file", sas_file,
+           "--compute-model-backend", backend] + list(options)
+    subprocess.check_call(cmd, cwd=tmp_path, stdout=subprocess.DEVNULL)
+    with open(os.path.join(tmp_path, sas_file)) as sas:
+        return sas.read()
+
+
+@pytest.mark.parametrize("domain, problem", TASKS)
+def test_interned_backend_matches_default(tmp_path, domain, problem):
+    assert (translate(tmp_path, domain, problem, "interned") ==
+            translate(tmp_path, domain, problem, "default"))
+
+
+def test_interned_backend_with_partial_grounding(tmp_path):
+    options = ["--grounding-action-queue-ordering", "roundrobin",
+               "--termination-condition", "goal-relaxed-reachable",
+               "min-number", "20"]
+    assert (translate(tmp_path, "gripper", "prob01.pddl", "interned", *options) ==
+            translate(tmp_path, "gripper", "prob01.pddl", "default", *options))
+
+
+def compute_model(domain, problem, backend):
+    cmd = [sys.executable, BUILD_MODEL, *get_task_files(domain, problem),
+           "--compute-model-backend", backend]
+    output = subprocess.check_output(cmd, encoding="utf-8")
+    # Actions are printed with their address.
+    return sorted(re.sub(r" at 0x[0-9a-f]+", "", line)
+                  for line in output.splitlines() if line.startswith("Atom "))
+
+
+@pytest.mark.parametrize("domain, problem", TASKS)
+def test_seminaive_backend_computes_same_atoms(domain, problem):
+    assert (compute_model(domain, problem, "seminaive") ==
+            compute_model(domain, problem, "default"))
+
+
+def test_compacted_rule_indexes_match_default(tmp_path):
+    def set_memory_limit():
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (4 * 1024 ** 3, 4 * 1024 ** 3))
+
+    domain, problem = "satellite", "p25-HC-pfile5.pddl"
+    cmd = [sys.executable, TRANSLATE, *get_task_files(domain, problem),
+           "--sas-file", "compacted.sas",
+           "--grounding-memory-threshold", "0"]
+    output = subprocess.check_output(
+        cmd, cwd=tmp_path, encoding="utf-8", preexec_fn=set_memory_limit)
+    assert "Compacting rule indexes" in output
+    with open(os.path.join(tmp_path, "compacted.sas")) as sas:
+        assert sas.read() == translate(tmp_path, domain, problem, "default")
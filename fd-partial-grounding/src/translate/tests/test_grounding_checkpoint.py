@@ -0,0 +1,37 @@
+import os.path
+import subprocess
+import sys
+
+from .conftest import TRANSLATE, get_task_files
+
+DOMAIN, PROBLEM = get_task_files("gripper", "prob01.pddl")
+
+
+def translate(tmp_path, sas_file, min_number, *options):
+    cmd = [sys.executable, TRANSLATE, DOMAIN, PROBLEM,
+           "--sas-file", sas_file,
+           "--grounding-action-queue-ordering", "roundrobin",
+           "--termination-condition", "goal-relaxed-reachable",
+           "min-number", str(min_number)] + list(options)
+    subprocess.check_call(cmd, cwd=tmp_path, stdout=subprocess.DEVNULL)
+    with open(os.path.join(tmp_path, sas_file)) as sas:
+        return sas.read()
+
+
+def test_resumed_grounding_matches_fresh_grounding(tmp_path):
+    checkpoint = ["--grounding-checkpoint", "checkpoint"]
+    translate(tmp_path, "first.sas", 10, *checkpoint)
+    assert os.path.exists(os.path.join(tmp_path, "checkpoint"))
+    resumed = translate(tmp_path, "resumed.sas", 30, *checkpoint)
+    fresh = translate(tmp_path, "fresh.sas", 30)
+    assert resumed == fresh
+
+
+def test_read_only_checkpoint(tmp_path):
+    checkpoint = ["--grounding-checkpoint", "checkpoint"]
+    translate(tmp_path, "first.sas", 10, *checkpoint)
+    stored = {name: os.path.getmtime(os.path.join(tmp_path, name))
+              for name in ["checkpoint", "checkpoint.translation"]}
+    resumed = translate(tmp_path, "resumed.sas", 30, *checkpoint, "--grounding-checkpoint-read-only")
+    assert stored == {name: os.path.getmtime(os.path.join(tmp_path, name)) for name in stored}
+    assert resumed == translate(tmp_path, "fresh.sas", 30)
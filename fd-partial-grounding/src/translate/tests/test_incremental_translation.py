@@ -0,0 +1,39 @@
+import io
+
+
+def translate(task):
+    import translate
+    output = io.StringIO()
+    translate.pddl_to_sas(task).output(output)
+    return output.getvalue()
+
+
+def test_reuse_translation(monkeypatch, tmp_path, options, task):
+    import incremental_translation
+    import instantiate
+    import normalize
+
+    normalize.normalize(task)
+    expected = translate(task)
+
+    monkeypatch.setattr(options, "grounding_checkpoint", str(tmp_path / "checkpoint"))
+    assert translate(task) == expected
+    state = incremental_translation.load()
+    assert state.invariants and state.groups and state.operators
+    # Make sure that the stored operators are used in the next run.
+    for sas_ops in state.operators.values():
+        for op in sas_ops:
+            op.cost += 1
+    incremental_translation.save(state)
+    assert translate(task) != expected
+
+    # Fewer reachable atoms invalidate the groups and operators, but not
+    # the invariants.
+    _, atoms, _, _, _, reachable_action_params = instantiate.explore(task)
+    state = incremental_translation.load()
+    invariants = state.invariants
+    state.update(task, atoms, reachable_action_params)
+    assert state.groups and state.operators
+    state.update(task, sorted(atoms)[1:], reachable_action_params)
+    assert state.invariants is invariants
+    assert state.groups is None and not state.operators
@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.mark.parametrize("task", ["gripper", "philosophers", "satellite"], indirect=True)
+@pytest.mark.parametrize("max_candidates", [100000, 12])
+def test_parallel_invariants(monkeypatch, options, task, max_candidates):
+    import instantiate
+    import invariant_finder
+    import normalize
+
+    normalize.normalize(task)
+    _, _, _, _, _, reachable_action_params = instantiate.explore(task)
+    monkeypatch.setattr(options, "invariant_generation_max_candidates", max_candidates)
+    serial = list(invariant_finder.find_invariants(task, reachable_action_params))
+    monkeypatch.setattr(options, "invariant_workers", 2)
+    parallel = list(invariant_finder.find_invariants(task, reachable_action_params))
+    assert serial and parallel == serial
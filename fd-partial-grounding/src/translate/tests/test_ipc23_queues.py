@@ -0,0 +1,135 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+# The expected pop orders were recorded with the implementation of the
+# queues that looked up schemas with list.index and recomputed all ratios
+# on every pop.
+EXPECTED_POP_ORDERS = {
+    "round-robin": (
+        "d0 c4 e5 b7 c3 d2 e15 c20 a13 c23 b27 e29 d12 e16 a33 b34 d42 "
+        "c38 d24 e19 a11 d37 e44 a32 d41 a36 c57 e62 a61 b60 c67 a69 c56 "
+        "e85 d73 d88 e77 a76 e97 b81 c83 d80 e94 a75 c96 d82 e108 b118 "
+        "a89 b115 c74 d90 a101 b127 c131 d104 a79 b135 c138 d106 e137 "
+        "a143 b119 c145 d110 e140 a93 c116 d111 a50 c129 d120 a64 c100 "
+        "d139 a78 c84 a99 a14 a21 a63 a105 a147 d141 c132 c122 c54 c48"),
+    "ratio": (
+        "d0 c4 b7 d2 c3 a13 a11 c20 a14 a21 b27 e29 d12 a33 a32 a36 d42 "
+        "b34 d24 c38 d37 a50 d41 c23 c54 c57 c56 a61 a64 a63 a69 b60 c67 "
+        "e85 a76 d88 a75 a89 e97 b81 a101 a79 a93 a78 a99 a105 b115 b118 "
+        "b119 d73 d80 d82 b127 d90 d104 d106 b135 d110 a143 c83 a147 d111 "
+        "c96 d120 d139 c131 c138 c145 c74 c116 c129 c100 c84 d141 c132 "
+        "c122 c48"),
+}
+
+TRAINED_SCHEMAS = ["a", "b", "c"]
+SCHEMA_RATIOS = {"a": 0.5, "b": 0.2, "c": 0.1, "d": 0.2}
+
+
+class FakeModel:
+    def get_trained_schemas(self):
+        return TRAINED_SCHEMAS
+
+    def get_estimate(self, action):
+        return action.args[1] % 7 / 6
+
+    def get_estimates(self, actions):
+        return [self.get_estimate(action) for action in actions]
+
+    def print_stats(self):
+        pass
+
+
+class FakeGoodBadRuleEvaluator:
+    def __init__(self, task, args):
+        pass
+
+    def get_action_schemas(self):
+        return {"d"}
+
+    def is_good_action(self, action):
+        return action.args[0] == "good"
+
+    def is_bad_action(self, action):
+        return action.args[0] == "bad"
+
+    def print_stats(self):
+        pass
+
+
+def get_trace(seed):
+    """Return a list of actions to push, with None for pops."""
+    rng = random.Random(seed)
+    trace = []
+    num_queued = 0
+    for i in range(150):
+        if num_queued and rng.random() < 0.45:
+            trace.append(None)
+            num_queued -= 1
+        else:
+            schema = rng.choice("abcde")
+            kind = rng.choices(["normal", "good", "bad"], [8, 1, 1])[0]
+            trace.append(SimpleNamespace(
+                predicate=SimpleNamespace(name=schema), args=(kind, i)))
+            num_queued += 1
+    return trace
+
+
+def run_trace(queue, trace):
+    popped = []
+    for action in trace:
+        if action is None:
+            if queue or queue.has_good_actions():
+                action = queue.pop()
+                popped.append(f"{action.predicate.name}{action.args[1]}")
+        else:
+            queue.push(action)
+    while queue or queue.has_good_actions():
+        action = queue.pop()
+        popped.append(f"{action.predicate.name}{action.args[1]}")
+    return " ".join(popped)
+
+
+def get_queue(monkeypatch, tmp_path, kind, batch_eval):
+    from subdominization import ipc23_queue
+    monkeypatch.setattr(ipc23_queue, "get_hybrid_model", lambda task, args: FakeModel())
+    monkeypatch.setattr(ipc23_queue, "GodBadRuleEvaluator", FakeGoodBadRuleEvaluator)
+    with open(tmp_path / "schema_ratios", "w") as ratios:
+        for schema, ratio in SCHEMA_RATIOS.items():
+            ratios.write(f"{schema}:{ratio}\n")
+    args = SimpleNamespace(trained_model_folder=str(tmp_path), batch_evaluation=batch_eval,
+                           ignore_bad_actions=False)
+    if kind == "round-robin":
+        return ipc23_queue.IPC23RoundRobinQueue(None, args)
+    else:
+        return ipc23_queue.IPC23RatioQueue(None, args)
+
+
+@pytest.mark.parametrize("kind", sorted(EXPECTED_POP_ORDERS))
+@pytest.mark.parametrize("batch_eval", [False, True])
+def test_pop_order(monkeypatch, tmp_path, options, kind, batch_eval):
+    queue = get_queue(monkeypatch, tmp_path, kind, batch_eval)
+    popped = run_trace(queue, get_trace(2023))
+    assert popped == EXPECTED_POP_ORDERS[kind]
+
+
+def test_ratio_queue_notify_new_hard_actions(monkeypatch, tmp_path, options):
+    from subdominization import priority_queue
+    with open(tmp_path / "schema_ratios", "w") as ratios:
+        for schema, ratio in SCHEMA_RATIOS.items():
+            ratios.write(f"{schema}:{ratio}\n")
+    monkeypatch.setattr(options, "action_schema_ratios", str(tmp_path / "schema_ratios"))
+    queue = priority_queue.RatioQueue()
+    for action in get_trace(2023):
+        if action is not None:
+            queue.push(action)
+    assert queue.skipped_action_schemas == {"e"}
+    is_good = lambda action: action.args[0] == "good"
+    while queue.get_hard_action_if_exists(is_good):
+        pass
+    assert all(fifo.last_hard_index == len(fifo.queue) for fifo in queue.queues)
+    # The queues of the given schemas are scanned for hard actions again.
+    queue.notify_new_hard_actions(["a", "e"])
+    assert queue.queues[queue.schema_ids["a"]].last_hard_index == 0
+    assert queue.queues[queue.schema_ids["b"]].last_hard_index > 0
@@ -0,0 +1,42 @@
+import itertools
+
+import pytest
+
+
+def get_relevant_atoms(model):
+    # Atoms of the auxiliary predicates introduced by splitting the rules
+    # depend on the join order.
+    return {str(atom) for atom in model
+            if not str(getattr(atom.predicate, "name", atom.predicate)).startswith("p$")}
+
+
+@pytest.mark.parametrize(
+    "task", ["gripper", "miconic", "philosophers", "satellite"], indirect=True)
+def test_join_order(task):
+    import build_model
+    import greedy_join
+    import join_order
+    import normalize
+    import pddl_to_prolog
+
+    normalize.normalize(task)
+
+    # The simulation of greedy_join used for the cost comparison makes the
+    # same choices as greedy_join.
+    prog = pddl_to_prolog.PrologProgram()
+    pddl_to_prolog.translate_facts(prog, task)
+    for conditions, effect in normalize.build_exploration_rules(task):
+        prog.add_rule(pddl_to_prolog.Rule(conditions, effect))
+    prog.normalize()
+    statistics = join_order.RelationStatistics(prog, task)
+    for rule in prog.rules:
+        if len(rule.conditions) >= 2:
+            estimator = join_order.JoinEstimator(rule, statistics)
+            plan = join_order._get_greedy_plan(estimator)
+            expected = greedy_join.greedy_join(rule, map(str, itertools.count()))
+            rules = join_order.join_rules(rule, map(str, itertools.count()), plan)
+            assert list(map(str, rules)) == list(map(str, expected))
+
+    greedy_model = build_model.compute_model(pddl_to_prolog.translate(task, "greedy"))
+    cost_model = build_model.compute_model(pddl_to_prolog.translate(task, "cost"))
+    assert get_relevant_atoms(cost_model) == get_relevant_atoms(greedy_model)
@@ -0,0 +1,48 @@
+import glob
+import io
+import os.path
+
+import pytest
+
+from .conftest import BENCHMARKS
+
+
+@pytest.fixture
+def lisp_parser(options):
+    from pddl_parser import lisp_parser
+    return lisp_parser
+
+
+def parse_line_by_line(lisp_parser, lines):
+    tokens = lisp_parser.tokenize(lines)
+    assert next(tokens) == "("
+    return list(lisp_parser.parse_list_aux(tokens))
+
+
+@pytest.mark.parametrize("filename", sorted(glob.glob(os.path.join(BENCHMARKS, "*", "*.pddl"))))
+def test_parse_benchmarks(lisp_parser, filename):
+    with open(filename, encoding="ISO-8859-1") as input_file:
+        expected = parse_line_by_line(lisp_parser, input_file)
+    with open(filename, encoding="ISO-8859-1") as input_file:
+        assert lisp_parser.parse_nested_list(input_file) == expected
+
+
+def test_parse_tokens(lisp_parser):
+    text = "(Define ; comment (\n(at ?X?y)(not(p ?))\n; more (\n() a?b)\n"
+    assert lisp_parser.parse_nested_list(io.StringIO(text)) == [
+        "define", ["at", "?x", "?y"], ["not", ["p", "?"]], [], "a", "?b"]
+    assert lisp_parser.parse_nested_list(text.splitlines()) == parse_line_by_line(
+        lisp_parser, text.splitlines())
+
+
+@pytest.mark.parametrize("text, message", [
+    ("", "Expected '(', got None."),
+    ("a (b)", "Expected '(', got a."),
+    ("(a (b)", "Missing ')'"),
+    ("(a) b", "Unexpected token: b."),
+    ("(a)\n(b é) ; é", "Non-ASCII character outside comment: (b é) "),
+])
+def test_parse_errors(lisp_parser, text, message):
+    with pytest.raises(lisp_parser.ParseError) as error:
+        lisp_parser.parse_nested_list(io.StringIO(text))
+    assert str(error.value) == message
@@ -35,3 +35,28 @@ none Atom at(?X, ?X@0) :- Atom truck(?X), Atom location(?Y), Atom =(?X, ?X@0).
 none Atom at(?X, ?Y) :- Atom truck(?X), Atom @object(?Y).
 none Atom at(?X, ?Y) :- Atom truck(X), Atom location(?Y), Atom @object(?X).
 none Atom q(?Y, ?Y@0) :- Atom p(?Y, ?Z, ?Y, ?Z), Atom =(?Y, ?Y@0), Atom =(?Y, ?Y@1), Atom =(?Z, ?Z@2)."""
+
+def test_restrict_static_domains():
+    prog = PrologProgram()
+    for obj in ["a", "b", "c"]:
+        prog.add_fact(pddl.Atom("q", [obj]))
+    prog.add_fact(pddl.Atom("r", ["a"]))
+    prog.add_fact(pddl.Atom("r", ["b"]))
+    prog.add_fact(pddl.Atom("s", ["b", "c"]))
+    prog.add_fact(pddl.Atom("s", ["c", "a"]))
+    prog.add_rule(Rule([pddl.Atom("q", ["?X"]), pddl.Atom("f", ["?X", "?Y"]),
+                        pddl.Atom("r", ["?X"]), pddl.Atom("s", ["?X", "?Y"]),
+                        pddl.Atom("q", ["?Y"])],
+                       pddl.Atom("f", ["?Y", "?X"])))
+    prog.add_rule(Rule([pddl.Atom("q", ["?X"]), pddl.Atom("f", ["?X", "?Y"])],
+                       pddl.Atom("g", ["?X"])))
+    prog.normalize()
+    prog.restrict_static_domains()
+    output = StringIO()
+    prog.dump(file=output)
+    lines = output.getvalue().splitlines()
+    assert "Atom dom@0(b)." in lines
+    assert "none Atom f(?Y, ?X) :- Atom dom@0(?X), Atom f(?X, ?Y), Atom s(?X, ?Y), " \
+           "Atom dom@1(?Y)." in lines
+    assert "none Atom g(?X) :- Atom q(?X), Atom f(?X, ?Y)." in lines
+    assert len([line for line in lines if line.startswith("Atom dom@")]) == 3
@@ -0,0 +1,35 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from .conftest import TRANSLATE, get_task_files
+
+
+@pytest.mark.parametrize("backend", ["default", "interned"])
+def test_profile(tmp_path, backend):
+    domain, problem = get_task_files("gripper", "prob01.pddl")
+    # Profiling is enabled when the options are parsed on import, so the
+    # translator runs in its own process.
+    subprocess.check_call(
+        [sys.executable, TRANSLATE, domain, problem, "--profile",
+         "--compute-model-backend", backend,
+         "--sas-file", str(tmp_path / "output.sas")],
+        stdout=subprocess.DEVNULL)
+    with open(tmp_path / "output.profile.json") as profile_file:
+        profile = json.load(profile_file)
+
+    assert "Computing model" in [phase["name"] for phase in profile["phases"]]
+    if sys.platform.startswith("linux"):
+        assert all(0 < phase["rss_kb"] <= phase["peak_rss_kb"] for phase in profile["phases"])
+    counters = profile["counters"]
+    rules = profile["rules"]
+    assert all(rule["fires"] for rule in rules)
+    # All pushes and new atoms except those of the initial facts come from rules.
+    num_facts = counters["total_queue_pushes"] - sum(rule["pushes"] for rule in rules)
+    assert num_facts > 0
+    assert counters["final_queue_length"] - sum(rule["new_atoms"] for rule in rules) == num_facts
+    schemas = profile["action_schemas"]
+    assert sorted(schemas) == ["drop", "move", "pick"]
+    assert sum(schema["pops"] for schema in schemas.values()) == counters["actions_instantiated"]
@@ -0,0 +1,68 @@
+import itertools
+from types import SimpleNamespace
+
+RULES = [
+    "pick (?obj, ?room, ?gripper) :- ini:at(?obj, ?room).\n",
+    "pick (?obj, ?room, ?gripper) :- ini:at(?obj, ?room); ini:free(?gripper).\n",
+    "pick (?obj, ?room, ?gripper) :- goal:at(?obj, ?room).\n",
+    "pick (?obj, ?room, ?gripper) :- goal:at(?obj, ?x); ini:at(?obj, ?y); ini:room(?room).\n",
+    "pick (?obj, ?room, ?gripper) :- ini:at-robby(?room); ini:at(_, ?room).\n",
+    "pick (?obj, ?room, ?gripper) :- ini:at(ball1, ?room).\n",
+    "pick (?obj, ?room, ?gripper) :- ini:carry(?obj, ?gripper).\n",
+    "pick (?obj, ?room, ?gripper) :- true:.\n",
+    "move (?from, ?to) :- ini:at-robby(?from); goal:at(?x, ?to).\n",
+]
+
+
+def test_evaluate_batch_matches_evaluate(task):
+    from subdominization.rule_evaluator import RulesEvaluator
+
+    evaluator = RulesEvaluator(RULES, task)
+    objects = [obj.name for obj in task.objects] + ["unknown"]
+    for schema, arity in [("pick", 3), ("move", 2)]:
+        actions = [SimpleNamespace(predicate=SimpleNamespace(name=schema), args=args)
+                   for args in itertools.product(objects, repeat=arity)]
+        features = evaluator.evaluate_batch(actions)
+        assert features.tolist() == [evaluator.evaluate(action) for action in actions]
+        assert features.any()
+
+
+def test_shared_rule_index(task):
+    from subdominization.rule_evaluator import RulesEvaluator
+
+    good = RulesEvaluator(RULES[:5], task)
+    bad = RulesEvaluator(RULES[3:], task)
+    assert good.index is bad.index
+    # Rules 3 and 4 are in both files; ini:at(?obj, ?room) is in rules 0 and 1.
+    assert len(good.index.constraints) < sum(
+        len(rule.constraints) for evaluator in [good, bad]
+        for rules in evaluator.rules.values() for rule in rules)
+    objects = [obj.name for obj in task.objects]
+    for schema, arity in [("pick", 3), ("move", 2)]:
+        for args in itertools.product(objects, repeat=arity):
+            action = SimpleNamespace(predicate=SimpleNamespace(name=schema), args=args)
+            for evaluator in [good, bad]:
+                assert evaluator.evaluate(action) == [
+                    rule.evaluate(action) for rule in evaluator.rules[schema]]
+
+
+def test_evaluate_inigoal_rule(task):
+    import pddl
+    from subdominization.rule_evaluator import FactIndex, evaluate_inigoal_rule
+
+    facts = task.init + [pddl.Atom("connected", ("rooma", "rooma")),
+                         pddl.Atom("connected", ("rooma", "roomb"))]
+    fact_index = FactIndex(facts)
+    for rule, expected in [
+            ("at(?obj, ?room)", {(f"ball{i}", "rooma") for i in range(1, 5)}),
+            ("at(ball2, ?room)", {("rooma",)}),
+            ("at(_, ?room).\n", {("rooma",)}),
+            ("at(ball2, rooma)", {()}),
+            ("at(ball2, roomb)", set()),
+            ("connected(?x, ?x)", {("rooma",)}),
+            ("carry(?obj, ?gripper)", set())]:
+        arguments, values = evaluate_inigoal_rule(rule, fact_index)
+        assert evaluate_inigoal_rule(rule, facts) == (arguments, values)
+        if len(arguments) == 2 and arguments[0] == "?room":
+            values = {(obj, room) for (room, obj) in values}
+        assert values == expected
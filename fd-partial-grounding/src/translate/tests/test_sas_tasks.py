@@ -0,0 +1,85 @@
+import io
+import struct
+
+import pytest
+
+
+@pytest.fixture
+def sas_task(task):
+    import translate
+    return translate.pddl_to_sas(task)
+
+
+def output_with_print(task, stream):
+    """The text SAS writer before the lines were written in chunks."""
+    print("begin_version", 3, "end_version", sep="\n", file=stream)
+    print("begin_metric", int(task.metric), "end_metric", sep="\n", file=stream)
+    print(len(task.variables.ranges), file=stream)
+    for var, (rang, axiom_layer, values) in enumerate(zip(
+            task.variables.ranges, task.variables.axiom_layers,
+            task.variables.value_names)):
+        print("begin_variable", "var%d" % var, axiom_layer, rang, *values,
+              "end_variable", sep="\n", file=stream)
+    print(len(task.mutexes), file=stream)
+    for mutex in task.mutexes:
+        print("begin_mutex_group", len(mutex.facts), file=stream, sep="\n")
+        for var, val in mutex.facts:
+            print(var, val, file=stream)
+        print("end_mutex_group", file=stream)
+    print("begin_state", *task.init.values, "end_state", sep="\n", file=stream)
+    print("begin_goal", len(task.goal.pairs), file=stream, sep="\n")
+    for var, val in task.goal.pairs:
+        print(var, val, file=stream)
+    print("end_goal", file=stream)
+    print(len(task.operators), file=stream)
+    for op in task.operators:
+        print("begin_operator", op.name[1:-1], len(op.prevail), sep="\n", file=stream)
+        for var, val in op.prevail:
+            print(var, val, file=stream)
+        print(len(op.pre_post), file=stream)
+        for var, pre, post, cond in op.pre_post:
+            print(len(cond), end=" ", file=stream)
+            for cvar, cval in cond:
+                print(cvar, cval, end=" ", file=stream)
+            print(var, pre, post, file=stream)
+        print(op.cost, "end_operator", sep="\n", file=stream)
+    print(len(task.axioms), file=stream)
+    assert not task.axioms
+
+
+def decode_binary(data, text):
+    """Decode the binary SAS format, using the text format to decide where
+    strings (words and whole lines) are expected."""
+    import sas_tasks
+    assert data.startswith(sas_tasks.SAS_BINARY_MAGIC)
+    pos = len(sas_tasks.SAS_BINARY_MAGIC)
+    lines = []
+    for line in text.splitlines():
+        words = line.split()
+        if words and all(word.lstrip("-").isdigit() for word in words):
+            numbers = struct.unpack_from("%di" % len(words), data, pos)
+            pos += 4 * len(words)
+            lines.append(" ".join(map(str, numbers)))
+        else:
+            length, = struct.unpack_from("i", data, pos)
+            pos += 4
+            lines.append(data[pos:pos + length].decode("utf-8"))
+            pos += length
+    assert pos == len(data)
+    return lines
+
+
+def test_text_output(sas_task):
+    expected = io.StringIO()
+    output_with_print(sas_task, expected)
+    output = io.StringIO()
+    sas_task.output(output)
+    assert output.getvalue() == expected.getvalue()
+
+
+def test_binary_output(sas_task):
+    text = io.StringIO()
+    sas_task.output(text)
+    binary = io.BytesIO()
+    sas_task.output(binary, binary=True)
+    assert decode_binary(binary.getvalue(), text.getvalue()) == text.getvalue().splitlines()
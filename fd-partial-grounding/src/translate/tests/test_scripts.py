@@ -2,12 +2,10 @@ import os.path
 import subprocess
 import sys
 
-DIR = os.path.dirname(os.path.abspath(__file__))
+from .conftest import DIR, get_task_files
+
 TRANSLATE_DIR = os.path.dirname(DIR)
-REPO = os.path.abspath(os.path.join(DIR, "..", "..", ".."))
-BENCHMARKS = os.path.join(REPO, "misc", "tests", "benchmarks")
-DOMAIN = os.path.join(BENCHMARKS, "gripper", "domain.pddl")
-PROBLEM = os.path.join(BENCHMARKS, "gripper", "prob01.pddl")
+DOMAIN, PROBLEM = get_task_files("gripper", "prob01.pddl")
 SCRIPTS = [
     "build_model.py",
     "graph.py",
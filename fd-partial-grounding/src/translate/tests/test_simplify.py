@@ -0,0 +1,31 @@
+import random
+
+import simplify
+
+
+def get_reachable_values(init, size, arcs):
+    reachable = {init}
+    queue = [init]
+    while queue:
+        node = queue.pop()
+        for pre, post in arcs:
+            if pre in (node, -1) and post not in reachable:
+                reachable.add(post)
+                queue.append(post)
+    return reachable
+
+
+def test_dtg_reachability():
+    rng = random.Random(2024)
+    for _ in range(200):
+        size = rng.randint(1, 70)
+        init = rng.randrange(size)
+        arcs = [(rng.choice([-1] + list(range(size))), rng.randrange(size))
+                for _ in range(rng.randint(0, 2 * size))]
+        dtg = simplify.DomainTransitionGraph(init, size)
+        for pre, post in arcs:
+            if pre == -1:
+                dtg.add_arcs_from_all(post)
+            else:
+                dtg.add_arc(pre, post)
+        assert dtg.reachable() == get_reachable_values(init, size, arcs)
@@ -0,0 +1,59 @@
+import os
+import shutil
+import subprocess
+import sys
+
+from .conftest import REPO, TRANSLATE, get_task_files
+
+
+def translate(tmp_path, domain, problem, *options):
+    cmd = [sys.executable, TRANSLATE, domain, problem, "--sas-file", "output.sas"] + list(options)
+    output = subprocess.check_output(cmd, cwd=tmp_path, encoding="utf-8")
+    with open(os.path.join(tmp_path, "output.sas")) as sas:
+        return output, sas.read()
+
+
+def test_task_cache(tmp_path):
+    # A copy of the task in another directory has the same cache entry.
+    tasks = [get_task_files("miconic-simpleadl", "s1-0.pddl"),
+             (str(tmp_path / "domain.pddl"), str(tmp_path / "s1-0.pddl"))]
+    for source, target in zip(*tasks):
+        shutil.copy(source, target)
+    cache = str(tmp_path / "cache")
+    _, expected = translate(tmp_path, *tasks[0])
+    output, sas = translate(tmp_path, *tasks[0], "--task-cache", cache)
+    assert "Parsing" in output and sas == expected
+    assert len(os.listdir(cache)) == 1
+    output, sas = translate(tmp_path, *tasks[1], "--task-cache", cache)
+    assert "Parsing" not in output and sas == expected
+    output, sas = translate(tmp_path, *tasks[1], "--task-cache", cache, "--relaxed")
+    assert "Parsing" in output
+    assert len(os.listdir(cache)) == 2
+
+
+LEARNING_TRANSLATE = os.path.join(os.path.dirname(REPO), "learning", "translate")
+# Compares the atoms of a cached task with freshly built ones.
+COMPARE_CACHED_ATOMS = """
+import sys
+sys.path.insert(0, sys.argv[1])
+import pddl
+import task_cache
+task = task_cache.open_task(sys.argv[2], sys.argv[3], sys.argv[4])
+atoms = [atom for atom in task.init if isinstance(atom, pddl.Atom)]
+assert atoms
+assert all(atom == pddl.Atom(atom.predicate, atom.args) for atom in atoms)
+assert set(atoms) == {pddl.Atom(atom.predicate, atom.args) for atom in atoms}
+"""
+
+
+def test_learning_task_cache_in_new_process(tmp_path):
+    # The hashes of pddl objects differ between processes, so the cache
+    # entry is loaded with a different hash seed than it was written with.
+    domain, problem = get_task_files("gripper", "prob01.pddl")
+    cache = str(tmp_path / "cache")
+    for seed in ["1", "2"]:
+        subprocess.check_call(
+            [sys.executable, "-c", COMPARE_CACHED_ATOMS, LEARNING_TRANSLATE,
+             domain, problem, cache],
+            env=dict(os.environ, PYTHONHASHSEED=seed))
+        assert len(os.listdir(cache)) == 1
@@ -4,6 +4,11 @@ import sys
 import time
 
 
+# Functions that are called with the text and the timer of every finished
+# timing block (see profiler.py).
+timing_listeners = []
+
+
 class Timer:
     def __init__(self):
         self.start_time = time.time()
@@ -13,10 +18,13 @@ class Timer:
         times = os.times()
         return times[0] + times[1]
 
+    def get_elapsed_times(self):
+        """Return the elapsed CPU and wall-clock time in seconds."""
+        return (self._clock() - self.start_clock,
+                time.time() - self.start_time)
+
     def __str__(self):
-        return "[%.3fs CPU, %.3fs wall-clock]" % (
-            self._clock() - self.start_clock,
-            time.time() - self.start_time)
+        return "[%.3fs CPU, %.3fs wall-clock]" % self.get_elapsed_times()
 
 
 @contextlib.contextmanager
@@ -33,3 +41,5 @@ def timing(text, block=False):
     else:
         print(timer)
     sys.stdout.flush()
+    for listener in timing_listeners:
+        listener(text, timer)
@@ -1,3 +1,7 @@
+import contextlib
+import gc
+
+
 def cartesian_product(sequences):
     # TODO: Rename this. It's not good that we have two functions
     # called "product" and "cartesian_product", of which "product"
@@ -17,14 +21,61 @@ def cartesian_product(sequences):
                 yield item + sequence
 
 
-def get_peak_memory_in_kb():
+def _get_memory_status_in_kb(key, description):
     try:
         # This will only work on Linux systems.
         with open("/proc/self/status") as status_file:
             for line in status_file:
                 parts = line.split()
-                if parts[0] == "VmPeak:":
+                if parts[0] == key:
                     return int(parts[1])
     except OSError:
         pass
-    raise Warning("warning: could not determine peak memory")
+    raise Warning("warning: could not determine %s" % description)
+
+
+def get_peak_memory_in_kb():
+    return _get_memory_status_in_kb("VmPeak:", "peak memory")
+
+
+def get_memory_in_kb():
+    """Current size of the address space, which is what the memory limit
+    set by the driver (RLIMIT_AS) restricts."""
+    return _get_memory_status_in_kb("VmSize:", "memory usage")
+
+
+def get_rss_in_kb():
+    """Current resident set size, i.e. the physical memory in use."""
+    return _get_memory_status_in_kb("VmRSS:", "resident set size")
+
+
+def get_peak_rss_in_kb():
+    return _get_memory_status_in_kb("VmHWM:", "peak resident set size")
+
+
+def get_memory_limit_in_kb():
+    """Return the address space limit of this process or None if there
+    is no limit or it cannot be determined."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_AS)
+    if soft_limit == resource.RLIM_INFINITY:
+        return None
+    return soft_limit // 1024
+
+
+@contextlib.contextmanager
+def garbage_collection_disabled():
+    """Disable the cyclic garbage collector in the block. Passes that
+    create many small objects without reference cycles spend much of
+    their time in collections that scan the whole heap, which is large
+    after grounding."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
@@ -18,14 +18,19 @@ from itertools import product
 
 import axiom_rules
 import fact_groups
+import grounding_checkpoint
+import incremental_translation
 import instantiate
 import normalize
 import options
 import pddl
 import pddl_parser
+import pddl_to_prolog
+import profiler
 import sas_tasks
 import signal
 import simplify
+import task_cache
 import timers
 import tools
 import variable_order
@@ -385,12 +390,23 @@ def translate_strips_axiom(axiom, dictionary, ranges, mutex_dict, mutex_ranges):
 
 
 def translate_strips_operators(actions, strips_to_sas, ranges, mutex_dict,
-                               mutex_ranges, implied_facts):
+                               mutex_ranges, implied_facts, translation_state=None):
+    # With a translation state (see incremental_translation.py), reuse
+    # the SAS operators of actions translated in an earlier iteration.
     result = []
     for action in actions:
-        sas_ops = translate_strips_operator(action, strips_to_sas, ranges,
-                                            mutex_dict, mutex_ranges,
-                                            implied_facts)
+        if translation_state is None:
+            sas_ops = translate_strips_operator(action, strips_to_sas, ranges,
+                                                mutex_dict, mutex_ranges,
+                                                implied_facts)
+        else:
+            key = translation_state.get_operator_key(action)
+            sas_ops = translation_state.operators.get(key)
+            if sas_ops is None:
+                sas_ops = translate_strips_operator(action, strips_to_sas, ranges,
+                                                    mutex_dict, mutex_ranges,
+                                                    implied_facts)
+                translation_state.operators[key] = sas_ops
         result.extend(sas_ops)
     return result
 
@@ -434,7 +450,7 @@ def dump_task(init, goals, actions, axioms, axiom_layer_dict):
 def translate_task(strips_to_sas, ranges, translation_key,
                    mutex_dict, mutex_ranges, mutex_key,
                    init, goals,
-                   actions, axioms, metric, implied_facts):
+                   actions, axioms, metric, implied_facts, translation_state=None):
     with timers.timing("Processing axioms", block=True):
         axioms, axiom_layer_dict = axiom_rules.handle_axioms(actions, axioms, goals,
                                                              options.layer_strategy)
@@ -476,7 +492,7 @@ def translate_task(strips_to_sas, ranges, translation_key,
 
     operators = translate_strips_operators(actions, strips_to_sas, ranges,
                                            mutex_dict, mutex_ranges,
-                                           implied_facts)
+                                           implied_facts, translation_state)
     axioms = translate_strips_axioms(axioms, strips_to_sas, ranges, mutex_dict,
                                      mutex_ranges)
 
@@ -519,10 +535,10 @@ def unsolvable_sas_task(msg):
     print("%s! Generating unsolvable task..." % msg)
     return trivial_task(solvable=False)
 
-def pddl_to_sas(task):
+def pddl_to_sas(task, grounding_state=None, prog=None):
     with timers.timing("Instantiating", block=True):
         (relaxed_reachable, atoms, actions, goal_list, axioms,
-         reachable_action_params) = instantiate.explore(task)
+         reachable_action_params) = instantiate.explore(task, grounding_state, prog)
 
     if not relaxed_reachable:
         return unsolvable_sas_task("No relaxed solution")
@@ -532,9 +548,15 @@ def pddl_to_sas(task):
     for item in goal_list:
         assert isinstance(item, pddl.Literal)
 
+    translation_state = None
+    if options.grounding_checkpoint:
+        with timers.timing("Loading translation state"):
+            translation_state = incremental_translation.load()
+            translation_state.update(task, atoms, reachable_action_params)
+
     with timers.timing("Computing fact groups", block=True):
         groups, mutex_groups, translation_key = fact_groups.compute_groups(
-            task, atoms, reachable_action_params)
+            task, atoms, reachable_action_params, translation_state)
 
     with timers.timing("Building STRIPS to SAS dictionary"):
         ranges, strips_to_sas = strips_to_sas_dictionary(
@@ -567,7 +589,12 @@ def pddl_to_sas(task):
             strips_to_sas, ranges, translation_key,
             mutex_dict, mutex_ranges, mutex_key,
             task.init, goal_list, actions, axioms, task.use_min_cost_metric,
-            implied_facts)
+            implied_facts, translation_state)
+
+    if translation_state is not None and grounding_checkpoint.is_written():
+        # Save before the operators are modified by the steps below.
+        with timers.timing("Writing translation state"):
+            incremental_translation.save(translation_state)
 
     print("%d effect conditions simplified" %
           simplified_effect_condition_counter)
@@ -683,8 +710,7 @@ def get_relaxed_plan_facts(relaxed_plan_file):
                 fact_list.append(pddl.Atom(tokens[0],tokens[1:]))
     return fact_list
 
-def main():
-    timer = timers.Timer()
+def parse_and_normalize_task():
     with timers.timing("Parsing", True):
         task = pddl_parser.open(
             domain_filename=options.domain, task_filename=options.task)
@@ -701,12 +727,54 @@ def main():
                 if effect.literal.negated:
                     del action.effects[index]
 
-    sas_task = pddl_to_sas(task)
+    return task
+
+
+def load_task_and_program():
+    """Return the normalized task and its Datalog program, from the task
+    cache if possible. Without a cache, the program is computed later by
+    instantiate.explore."""
+    cache_dir = task_cache.get_cache_dir(options.task_cache)
+    if not cache_dir:
+        return parse_and_normalize_task(), None
+    key = task_cache.get_key(
+        [options.domain, options.task, options.relaxed_plan_file],
+        ("translate", options.generate_relaxed_task, options.join_ordering,
+         options.restrict_static_domains))
+    with timers.timing("Loading task from cache", True):
+        entry = task_cache.load(cache_dir, key)
+    if entry is not None:
+        return entry
+    task = parse_and_normalize_task()
+    prog = pddl_to_prolog.translate(
+        task, options.join_ordering, options.restrict_static_domains)
+    with timers.timing("Writing task cache"):
+        task_cache.save(cache_dir, key, (task, prog))
+    return task, prog
+
+
+def main():
+    timer = timers.Timer()
+    checkpoint = None
+    prog = None
+    if options.grounding_checkpoint:
+        with timers.timing("Loading grounding checkpoint", True):
+            checkpoint = grounding_checkpoint.load(options.grounding_checkpoint)
+    if checkpoint:
+        task = checkpoint.task
+        grounding_state = checkpoint.state
+    else:
+        task, prog = load_task_and_program()
+        grounding_state = None
+
+    sas_task = pddl_to_sas(task, grounding_state, prog)
     dump_statistics(sas_task)
 
     with timers.timing("Writing output"):
-        with open(options.sas_file, "w") as output_file:
-            sas_task.output(output_file)
+        binary = options.sas_file_format == "binary"
+        with open(options.sas_file, "wb" if binary else "w") as output_file:
+            sas_task.output(output_file, binary)
+    profiler.write()
     print("Done! %s" % timer)
 
 
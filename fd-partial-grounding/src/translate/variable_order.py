@@ -1,8 +1,8 @@
-from collections import defaultdict, deque
-from itertools import chain
+from collections import Counter, defaultdict, deque
 import heapq
 
 import sccs
+import tools
 
 DEBUG = False
 
@@ -29,10 +29,10 @@ class CausalGraph:
         self.predecessor_graph = defaultdict(set)
         self.ordering = []
 
+        self.num_variables = len(sas_task.variables.ranges)
         self.weight_graph_from_ops(sas_task.operators)
         self.weight_graph_from_axioms(sas_task.axioms)
 
-        self.num_variables = len(sas_task.variables.ranges)
         self.goal_map = dict(sas_task.goal.pairs)
 
     def get_ordering(self):
@@ -47,6 +47,12 @@ class CausalGraph:
         ### issue26) it performed better than the (clearer) weighting
         ### described in the Fast Downward paper (which would require
         ### a more complicated implementation).
+        # With millions of operators, counting the edges in nested
+        # dictionaries is slow. We collect them as integers
+        # source * num_variables + target and count them at once.
+        num_variables = self.num_variables
+        edges = []
+        add_edges = edges.extend
         for op in operators:
             source_vars = [var for (var, value) in op.prevail]
             for var, pre, _, _ in op.pre_post:
@@ -54,10 +60,15 @@ class CausalGraph:
                     source_vars.append(var)
 
             for target, _, _, cond in op.pre_post:
-                for source in chain(source_vars, (var for var, _ in cond)):
-                    if source != target:
-                        self.weighted_graph[source][target] += 1
-                        self.predecessor_graph[target].add(source)
+                add_edges([source * num_variables + target
+                           for source in source_vars if source != target])
+                if cond:
+                    add_edges([var * num_variables + target
+                               for var, _ in cond if var != target])
+        for edge, weight in Counter(edges).items():
+            source, target = divmod(edge, num_variables)
+            self.weighted_graph[source][target] += weight
+            self.predecessor_graph[target].add(source)
 
     def weight_graph_from_axioms(self, axioms):
         for ax in axioms:
@@ -233,21 +244,23 @@ class VariableOrder:
         mutexes[:] = new_mutexes
 
     def _apply_to_operators(self, operators):
+        new_var = self.new_var
         new_ops = []
         for op in operators:
             pre_post = []
             for eff_var, pre, post, cond in op.pre_post:
-                if eff_var in self.new_var:
-                    new_cond = list((self.new_var[var], val)
-                                    for var, val in cond
-                                    if var in self.new_var)
-                    pre_post.append(
-                        (self.new_var[eff_var], pre, post, new_cond))
+                if eff_var in new_var:
+                    if cond:
+                        cond = [(new_var[var], val) for var, val in cond
+                                if var in new_var]
+                    else:
+                        cond = []
+                    pre_post.append((new_var[eff_var], pre, post, cond))
             if pre_post:
                 op.pre_post = pre_post
-                op.prevail = [(self.new_var[var], val)
+                op.prevail = [(new_var[var], val)
                               for var, val in op.prevail
-                              if var in self.new_var]
+                              if var in new_var]
                 new_ops.append(op)
         print("%s of %s operators necessary." % (len(new_ops),
                                                  len(operators)))
@@ -271,14 +284,15 @@ class VariableOrder:
 def find_and_apply_variable_order(sas_task, reorder_vars=True,
                                   filter_unimportant_vars=True):
     if reorder_vars or filter_unimportant_vars:
-        cg = CausalGraph(sas_task)
-        if reorder_vars:
-            order = cg.get_ordering()
-        else:
-            order = list(range(len(sas_task.variables.ranges)))
-        if filter_unimportant_vars:
-            necessary = cg.calculate_important_vars(sas_task.goal)
-            print("%s of %s variables necessary." % (len(necessary),
-                                                     len(order)))
-            order = [var for var in order if necessary[var]]
-        VariableOrder(order).apply_to_task(sas_task)
+        with tools.garbage_collection_disabled():
+            cg = CausalGraph(sas_task)
+            if reorder_vars:
+                order = cg.get_ordering()
+            else:
+                order = list(range(len(sas_task.variables.ranges)))
+            if filter_unimportant_vars:
+                necessary = cg.calculate_important_vars(sas_task.goal)
+                print("%s of %s variables necessary." % (len(necessary),
+                                                         len(order)))
+                order = [var for var in order if necessary[var]]
+            VariableOrder(order).apply_to_task(sas_task)
@@ -145,6 +145,10 @@ def main():
             for problem in args.problem:
                 shutil.copy(problem, BENCHMARKS_DIR)
 
+    # Parsed tasks are cached on disk and shared by all translator runs and
+    # learning scripts started from here.
+    os.environ.setdefault("PARTIAL_GROUNDING_TASK_CACHE", os.path.abspath(f"{TRAINING_DIR}/task-cache"))
+
     ENV = LocalEnvironment(processes=args.cpus)
     SUITE_ALL = suites.build_suite(TRAINING_DIR, ['instances'])
 
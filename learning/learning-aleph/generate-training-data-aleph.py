@@ -18,6 +18,7 @@ import sys
 sys.path.append(f'{os.path.dirname(__file__)}/../translate')
 from pddl_parser import lisp_parser
 from pddl_parser import parsing_functions
+import task_cache
 import instantiate
 
 from aleph_background import *
@@ -111,11 +112,7 @@ def generate_training_data_aleph(RUNS_DIR, store_training_data, background_file_
         task_filename = os.path.join(RUNS_DIR, task_run, "problem.pddl")
         plan_filename = os.path.join(RUNS_DIR, task_run, positive_examples_filename)
 
-        domain_pddl = parse_pddl_file("domain", domain_filename)
-        task_pddl = parse_pddl_file("task", task_filename)
-
-
-        task = parsing_functions.parse_task(domain_pddl, task_pddl)
+        task = task_cache.open_task(domain_filename, task_filename)
 
         bg_file.read_instance(task_run, task)
 
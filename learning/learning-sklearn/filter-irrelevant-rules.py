@@ -13,37 +13,11 @@ from rule_evaluator.rule_evaluator import *
 from rule_evaluator.rule_training_evaluator import *
 
 sys.path.append(f'{os.path.dirname(__file__)}/../translate')
-import pddl_parser.lisp_parser as lisp_parser
-import pddl_parser.parsing_functions as parsing_functions
+import task_cache
 import instantiate
 
-try:
-    # Python 3.x
-    from builtins import open as file_open
-except ImportError:
-    # Python 2.x
-    from codecs import open as file_open
-
 import time
 
-def parse_pddl_file(type, filename):
-    try:
-        # The builtin open function is shadowed by this module's open function.
-        # We use the Latin-1 encoding (which allows a superset of ASCII, of the
-        # Latin-* encodings and of UTF-8) to allow special characters in
-        # comments. In all other parts, we later validate that only ASCII is
-        # used.
-        return lisp_parser.parse_nested_list(file_open(filename,
-                                                       encoding='ISO-8859-1'))
-    except IOError as e:
-        raise SystemExit("Error: Could not read file: %s\nReason: %s." %
-                         (e.filename, e))
-    except lisp_parser.ParseError as e:
-        raise SystemExit("Error: Could not parse %s file: %s\nReason: %s." %
-                         (type, filename, e))
-
-
-
 if __name__ == "__main__":
     import argparse
     import os
@@ -79,9 +53,7 @@ if __name__ == "__main__":
 
         domain_filename = '{}/{}/{}'.format(options.runs_folder, task_run, "domain.pddl")
         task_filename = '{}/{}/{}'.format(options.runs_folder, task_run, "problem.pddl")
-        domain_pddl = parse_pddl_file("domain", domain_filename)
-        task_pddl = parse_pddl_file("task", task_filename)
-        task = parsing_functions.parse_task(domain_pddl, task_pddl)
+        task = task_cache.open_task(domain_filename, task_filename)
 
         training_re.init_task(task, options.max_training_examples)
 
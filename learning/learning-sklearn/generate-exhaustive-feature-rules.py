@@ -12,6 +12,7 @@ from collections import defaultdict
 import itertools
 
 from pddl_parser import parsing_functions
+import task_cache
 from pddl_parser import lisp_parser
 import argparse
 import copy
@@ -20,30 +21,6 @@ import pddl
 
 import time
 
-try:
-    # Python 3.x
-    from builtins import open as file_open
-except ImportError:
-    # Python 2.x
-    from codecs import open as file_open
-
-def parse_pddl_file(type, filename):
-    try:
-        # The builtin open function is shadowed by this module's open function.
-        # We use the Latin-1 encoding (which allows a superset of ASCII, of the
-        # Latin-* encodings and of UTF-8) to allow special characters in
-        # comments. In all other parts, we later validate that only ASCII is
-        # used.
-        return lisp_parser.parse_nested_list(file_open(filename,
-                                                       encoding='ISO-8859-1'))
-    except IOError as e:
-        raise SystemExit("Error: Could not read file: %s\nReason: %s." %
-                         (e.filename, e))
-    except lisp_parser.ParseError as e:
-        raise SystemExit("Error: Could not parse %s file: %s\nReason: %s." %
-                         (type, filename, e))
-
-
 class Rule:
      def __init__ (self, action_schema, rule):
          self.action_schema = action_schema
@@ -119,9 +96,7 @@ def read_runs_folder(runs_folder):
           domain_filename = '{}/{}/{}'.format(runs_folder, task_run, "domain.pddl")
           task_filename = '{}/{}/{}'.format(runs_folder, task_run, "problem.pddl")
 
-          domain_pddl = parse_pddl_file("domain", domain_filename)
-          task_pddl = parse_pddl_file("task", task_filename)
-          task = parsing_functions.parse_task(domain_pddl, task_pddl)
+          task = task_cache.open_task(domain_filename, task_filename)
 
 
           ini_predicates.update([p.predicate for p in task.init if type(p) != pddl.Assign])
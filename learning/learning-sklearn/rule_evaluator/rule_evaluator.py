@@ -1,5 +1,8 @@
 from collections import defaultdict
+import functools
 import itertools
+import operator
+import weakref
 
 import sys
 import os
@@ -150,37 +153,80 @@ class Constraint:
                 return values in self.compliant_values
 
 
-def evaluate_inigoal_rule(rule, fact_list):
-        def eval_constants(fact, constants):
-            for (i, val) in constants:
-                if fact.args[i] != val:
-                    return False
-            return True
-        compliant_values = set()
-
+class FactIndex:
+        """The arguments of a list of facts, by predicate and by (predicate,
+        argument position, object). The positional indexes are built when
+        they are first needed."""
+        def __init__(self, fact_list):
+                self.by_predicate = defaultdict(list)
+                for fact in fact_list:
+                        if type(fact) != pddl.Assign:
+                                self.by_predicate[fact.predicate].append(fact.args)
+                self.by_position = {}
+
+        def get_facts(self, predicate, constants):
+                if not constants:
+                        return self.by_predicate.get(predicate, [])
+                pos, val = constants[0]
+                key = (predicate, pos)
+                index = self.by_position.get(key)
+                if index is None:
+                        index = self.by_position[key] = defaultdict(list)
+                        for args in self.by_predicate.get(predicate, []):
+                                index[args[pos]].append(args)
+                facts = index.get(val, [])
+                if len(constants) > 1:
+                        facts = [args for args in facts
+                                 if all(args[i] == val for (i, val) in constants[1:])]
+                return facts
+
+
+# Fact indexes of the initial state and the goal of every loaded task, shared
+# by all rules of all RulesEvaluators and TrainingRules.
+_fact_indexes = weakref.WeakKeyDictionary()
+
+def get_fact_index(task, source):
+        fact_indexes = _fact_indexes.get(task)
+        if fact_indexes is None:
+                fact_indexes = _fact_indexes[task] = {}
+        if source not in fact_indexes:
+                facts = task.init if source == "ini" else task.goal.parts
+                fact_indexes[source] = FactIndex(facts)
+        return fact_indexes[source]
+
+
+@functools.lru_cache(maxsize=None)
+def parse_inigoal_rule(rule):
         predicate_name, arguments  = rule.split("(")
         arguments = arguments.replace(")", "").replace("\n", "").replace(".", "").replace(" ", "").split(",")
         if arguments == ['']:
             # e.g. for predicates without argument like "handempty()"
             arguments = []
         valid_arguments = tuple(set([a for a in arguments if a.startswith("?")]))
-        constants = [(i, val) for (i, val) in enumerate(arguments) if val != "_" and not val.startswith("?")]
-        positions_argument = {}
+        constants = tuple((i, val) for (i, val) in enumerate(arguments) if val != "_" and not val.startswith("?"))
+        positions_argument = tuple(tuple(i for (i, v) in enumerate(arguments) if v == a)
+                                   for a in valid_arguments)
+        return predicate_name, valid_arguments, constants, positions_argument
 
-        for a in valid_arguments:
-            positions_argument[a] = [i for (i, v) in enumerate(arguments) if v == a]
 
-        arguments = valid_arguments
-        for fact in fact_list:
-            if type(fact) != pddl.Assign and fact.predicate == predicate_name and eval_constants(fact, constants):
-                values = []
-                for a in arguments:
-                    if len(set([fact.args[p] for p in positions_argument[a]])) > 1:
-                        break
-                    values.append(fact.args[positions_argument[a][0]])
-
-                if len(values) == len(arguments):
-                    compliant_values.add(tuple(values))
+def evaluate_inigoal_rule(rule, fact_list):
+        if not isinstance(fact_list, FactIndex):
+            fact_list = FactIndex(fact_list)
+        predicate_name, arguments, constants, positions_argument = parse_inigoal_rule(rule)
+        compliant_values = set()
+        facts = fact_list.get_facts(predicate_name, constants)
+        if any(len(positions) > 1 for positions in positions_argument):
+            # A variable occurs more than once in the atom.
+            facts = [args for args in facts
+                     if all(args[p] == args[positions[0]]
+                            for positions in positions_argument for p in positions[1:])]
+        if len(positions_argument) == 1:
+            pos = positions_argument[0][0]
+            compliant_values = set((args[pos],) for args in facts)
+        elif positions_argument:
+            compliant_values = set(map(operator.itemgetter(*[positions[0] for positions in positions_argument]), facts))
+        elif facts:
+            compliant_values.add(())
 
         return arguments, compliant_values
 
@@ -213,9 +259,9 @@ class RuleEval:
             rule_type = rule_type.strip()
 
             if rule_type == "ini":
-                arguments, compliant_values = evaluate_inigoal_rule (rule, task.init)
+                arguments, compliant_values = evaluate_inigoal_rule (rule, get_fact_index(task, "ini"))
             elif rule_type == "goal":
-                arguments, compliant_values = evaluate_inigoal_rule (rule, task.goal.parts)
+                arguments, compliant_values = evaluate_inigoal_rule (rule, get_fact_index(task, "goal"))
             elif rule_type == "equal":
                 arguments = tuple(rule[1:rule.find(')')].split(", "))
                 compliant_values = set()
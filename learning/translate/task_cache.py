@@ -0,0 +1,126 @@
+"""On-disk cache for the results of parsing (and normalizing) a task.
+
+The same domain and problem files are parsed many times while learning:
+by the translator in every LAMA run, SMAC trial and incremental grounding
+iteration, and by the scripts that generate the training data. The cache
+stores the parsed objects in a directory, with file names derived from a
+hash of the contents of the input files, the settings that influence the
+result and the source code of the parser. Files are written to a temporary
+file first and then renamed, so several processes (e.g. parallel SMAC
+workers) can use the same directory at the same time.
+
+The directory is given by the caller or by the environment variable
+PARTIAL_GROUNDING_TASK_CACHE.
+"""
+
+import glob
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+import pddl_parser
+
+
+CACHE_VERSION = 1
+ENVIRONMENT_VARIABLE = "PARTIAL_GROUNDING_TASK_CACHE"
+
+# Source files (relative to this directory) that determine the parsed and
+# normalized task.
+SOURCE_PATTERNS = ["pddl/*.py", "pddl_parser/*.py", "normalize.py", "pddl_to_prolog.py"]
+
+_source_hash = None
+
+
+def get_cache_dir(cache_dir=None):
+    return cache_dir or os.environ.get(ENVIRONMENT_VARIABLE) or None
+
+
+def _get_source_hash():
+    global _source_hash
+    if _source_hash is None:
+        directory = os.path.dirname(os.path.abspath(__file__))
+        source_hash = hashlib.sha256()
+        for pattern in SOURCE_PATTERNS:
+            for filename in sorted(glob.glob(os.path.join(directory, pattern))):
+                with open(filename, "rb") as source_file:
+                    source_hash.update(os.path.relpath(filename, directory).encode())
+                    source_hash.update(source_file.read())
+        _source_hash = source_hash.hexdigest()
+    return _source_hash
+
+
+def get_key(filenames, settings):
+    """Return a key that identifies the contents of the given files (None
+    stands for a missing optional file) and the given settings."""
+    key = hashlib.sha256()
+    key.update(repr((CACHE_VERSION, sys.version_info[:2], _get_source_hash(),
+                     settings)).encode())
+    for filename in filenames:
+        if filename is None:
+            key.update(b"-")
+            continue
+        with open(filename, "rb") as input_file:
+            content = input_file.read()
+        key.update(b"%d:" % len(content))
+        key.update(content)
+    return key.hexdigest()
+
+
+def _get_filename(cache_dir, key):
+    return os.path.join(cache_dir, key + ".pickle")
+
+
+def load(cache_dir, key):
+    """Return the object stored under the given key or None."""
+    try:
+        with open(_get_filename(cache_dir, key), "rb") as cache_file:
+            return pickle.load(cache_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as err:
+        print("Could not read task cache entry %s: %s" % (key, err))
+        return None
+
+
+def save(cache_dir, key, value):
+    os.makedirs(cache_dir, exist_ok=True)
+    # Deeply nested conditions can exceed the default recursion limit of
+    # pickle.
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(old_limit, 10000))
+    fd, tmp_filename = tempfile.mkstemp(dir=cache_dir, prefix=key, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as cache_file:
+            pickle.dump(value, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filename, _get_filename(cache_dir, key))
+    except (OSError, pickle.PicklingError, TypeError, AttributeError, RecursionError) as err:
+        print("Could not write task cache entry %s: %s" % (key, err))
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        return False
+    finally:
+        sys.setrecursionlimit(old_limit)
+    return True
+
+
+def cached(cache_dir, filenames, settings, compute):
+    """Return compute(), or the value that an earlier call with the same
+    file contents and settings stored in cache_dir. Without a cache
+    directory, compute() is always called."""
+    if not cache_dir:
+        return compute()
+    key = get_key(filenames, settings)
+    value = load(cache_dir, key)
+    if value is None:
+        value = compute()
+        save(cache_dir, key, value)
+    return value
+
+
+def open_task(domain_filename, task_filename, cache_dir=None):
+    """Parse the task like pddl_parser.open, using the task cache in
+    cache_dir or the directory set in the environment."""
+    return cached(get_cache_dir(cache_dir), [domain_filename, task_filename], "parse_task",
+                  lambda: pddl_parser.open(domain_filename, task_filename))
@@ -16,6 +16,12 @@ def parse_args():
     parser.add_argument("domain", help="path to domain file")
     parser.add_argument("problem", help="path to problem file")
     parser.add_argument("--plan", default=None, help="path to output plan file")
+    parser.add_argument("--keep-sas-file", action="store_true",
+                        help="keep the (preprocessed) translator output output.sas")
+    parser.add_argument("--search-input", default=None,
+                        help="run only the search on this translator output of an earlier run "
+                             "instead of translating the task; the translator and preprocessor "
+                             "options are ignored")
     parser.add_argument("--alias", default="lama-first", type=str,
                         help="alias for the search config")
 
@@ -42,6 +48,22 @@ def parse_args():
                         help="relative increment in number of actions grounded per iteration,"
                              "e.g. 10 for 10% additional actions. If provided in combination with "
                              "--incremental-grounding-increment, the maximum of the two is taken.")
+    parser.add_argument("--incremental-grounding-adaptive", action="store_true",
+                        help="adapt the increment and the search time limit of every iteration "
+                             "to how the last search went")
+    parser.add_argument("--incremental-grounding-resume", action="store_true",
+                        help="continue grounding from the state of the previous iteration "
+                             "instead of re-translating the task from scratch")
+    parser.add_argument("--keep-grounding-checkpoint", action="store_true",
+                        help="keep the grounding state of the last iteration of "
+                             "--incremental-grounding-resume in output.sas.grounding")
+    parser.add_argument("--grounding-checkpoint", default=None,
+                        help="continue grounding from the grounding state in this file, which "
+                             "must have been written with the same task and grounding options. "
+                             "With --termination-condition full, the file is not written back, "
+                             "since the full grounding cannot be continued.")
+    parser.add_argument("--translate-only", action="store_true",
+                        help="only translate (and preprocess) the task, keeping output.sas")
 
     parser.add_argument("--grounding-queue", type=str, default="ipc23-single-queue",
                         help="Options are ipc23-single-queue/ipc23-round-robin/ipc23-ratio (some learned model),"
@@ -57,6 +79,11 @@ def parse_args():
                         help="If provided, an IPC23 queue is used, and a bad_rules.rules file is given,"
                              "all actions evaluated as bad according to the rules will not be grounded.")
 
+    parser.add_argument("--compute-model-backend", type=str, default="default",
+                        choices=["default", "interned", "seminaive"],
+                        help="implementation of the translator's model computation; seminaive is only "
+                             "used for full grounding.")
+
     return parser.parse_args()
 
 
@@ -66,6 +93,18 @@ def main():
 
     if args.plan:
         driver_options += ["--plan-file", args.plan]
+    if args.keep_sas_file:
+        driver_options += ["--keep-sas-file"]
+    if args.search_input:
+        # The search only needs the overall limits.
+        driver_options += ["--overall-time-limit", str(args.overall_time_limit),
+                           "--overall-memory-limit", str(args.overall_memory_limit)]
+        result = subprocess.run([sys.executable, os.path.join(FD_PARTIAL_GROUNDING, "fast-downward.py")] +
+                                driver_options + [args.search_input])
+        sys.exit(result.returncode)
+
+    if args.translate_only:
+        driver_options += ["--translate"]
     if args.h2_preprocessor:
         driver_options += ["--transform-task", f"{ROOT}/fd-partial-grounding/builds/release/bin/preprocess-h2",
                            "--transform-task-options", f"h2_time_limit,{args.h2_time_limit}"]
@@ -79,6 +118,9 @@ def main():
     translate_options += ["--grounding-action-queue-ordering",
                           args.grounding_queue]
 
+    if args.compute_model_backend != "default":
+        translate_options += ["--compute-model-backend", args.compute_model_backend]
+
     if "ipc23" in args.grounding_queue:
         translate_options += ["--batch-evaluation", "--trained-model-folder", args.domain_knowledge]
         if args.ignore_bad_actions:
@@ -95,6 +137,16 @@ def main():
         if args.incremental_grounding_increment_percentage:
             driver_options += ["--incremental-grounding-increment-percentage",
                                str(args.incremental_grounding_increment_percentage)]
+        if args.incremental_grounding_adaptive:
+            driver_options += ["--incremental-grounding-adaptive"]
+        if args.incremental_grounding_resume:
+            driver_options += ["--incremental-grounding-resume"]
+            if args.keep_grounding_checkpoint:
+                driver_options += ["--incremental-grounding-keep-checkpoint"]
+    if args.grounding_checkpoint:
+        translate_options += ["--grounding-checkpoint", os.path.abspath(args.grounding_checkpoint)]
+        if args.termination_condition == "full":
+            translate_options += ["--grounding-checkpoint-read-only"]
 
     tc = args.termination_condition
     if tc != "full":
@@ -102,10 +154,13 @@ def main():
         if tc.startswith("relaxed") and len(args.termination_condition) > len("relaxed"):
             translate_options += ["percentage", tc[len("relaxed"):]]
 
-    subprocess.run([sys.executable, os.path.join(FD_PARTIAL_GROUNDING, "fast-downward.py")] +
-                   driver_options +
-                   [args.domain, args.problem] +
-                   translate_options)
+    # Pass on the exit code of the planner, so that plan.py can tell why
+    # a model did not produce a plan.
+    result = subprocess.run([sys.executable, os.path.join(FD_PARTIAL_GROUNDING, "fast-downward.py")] +
+                            driver_options +
+                            [args.domain, args.problem] +
+                            translate_options)
+    sys.exit(result.returncode)
 
 
 if __name__ == "__main__":
@@ -3,18 +3,43 @@
 from __future__ import print_function
 
 import argparse
+import hashlib
+import itertools
 import json
+import math
 import os.path
 import re
 import shutil
+import signal
 import subprocess
 import tarfile
+import tempfile
+import time
 import sys
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
 PLAN_PARTIAL_GROUNDING = os.path.join(ROOT, "plan-partial-grounding.py")
 FD_PARTIAL_GROUNDING = os.path.join(ROOT, "fd-partial-grounding", "fast-downward.py")
 
+# Time for the partial grounding runs of all models; the remaining 5
+# minutes are reserved for the final LAMA config.
+PARTIAL_GROUNDING_TIME_LIMIT = 25 * 60
+# Memory limit in MiB, shared by the partial grounding runs that run in
+# parallel.
+MEMORY_LIMIT = 8000
+# Exit codes of the planner after the search read the translator output
+# (see fd-partial-grounding/driver/returncodes.py).
+SEARCH_PLAN_FOUND_EXIT_CODES = [0, 1, 2, 3]
+SEARCH_FAILED_EXIT_CODES = [11, 12]
+SEARCH_OUT_OF_RESOURCES_EXIT_CODES = [22, 23, 24]
+# Key of the fully grounded task in the GroundedTaskCache.
+FULL_GROUNDING = "full"
+# Default directory for the extracted domain knowledge.
+KNOWLEDGE_CACHE_VARIABLE = "PARTIAL_GROUNDING_KNOWLEDGE_CACHE"
+# Directory of the translator's cache of parsed and normalized tasks (see
+# fd-partial-grounding/src/translate/task_cache.py).
+TASK_CACHE_VARIABLE = "PARTIAL_GROUNDING_TASK_CACHE"
+
 
 def parse_args():
     parser = argparse.ArgumentParser(description=__doc__)
@@ -22,7 +47,19 @@ def parse_args():
     parser.add_argument("domain", help="path to domain file")
     parser.add_argument("problem", help="path to problem file")
     parser.add_argument("plan", help="path to output plan file")
-    return parser.parse_args()
+    parser.add_argument("--knowledge-cache", default=os.environ.get(KNOWLEDGE_CACHE_VARIABLE, "."),
+                        help="directory in which the domain knowledge is extracted, once for "
+                             "every content of the domain knowledge file, so that later calls "
+                             "with the same file reuse it (default: the environment variable "
+                             f"{KNOWLEDGE_CACHE_VARIABLE} or the working directory)")
+    parser.add_argument("--cpus", type=int, default=1,
+                        help="number of models that are run in parallel (default: %(default)s). "
+                             "The runs share the memory limit, and all runs are stopped as soon "
+                             "as one of them finds a plan.")
+    args = parser.parse_args()
+    if args.cpus < 1:
+        parser.error("--cpus must be positive")
+    return args
 
 
 def get_lama(bound):
@@ -60,41 +97,426 @@ def get_lama(bound):
         "--always"]
 
 
-def get_options(config_file):
+def load_config(config_file):
     with open(config_file, "r") as cfile:
-        config_dict = json.load(cfile)
+        return json.load(cfile)
+
+
+def ignores_bad_actions(config_dict):
+    return ("ignore-bad-actions" in config_dict and
+            config_dict["ignore-bad-actions"].lower().strip() == "true")
 
-    config = ["--alias", config_dict["alias"], "--h2-preprocessor"]
 
+def drops_bad_actions(config_dict):
+    """Return whether the grounding queue of the config never grounds the
+    actions rejected by its rules, so that even its full grounding is
+    incomplete."""
+    return (ignores_bad_actions(config_dict) and
+            "ipc23" in config_dict.get("queue_type", "ipc23-single-queue"))
+
+
+def get_grounding_options(config_dict):
+    """Return the options of plan-partial-grounding.py that decide in
+    which order the actions are grounded."""
+    config = []
     if "queue_type" in config_dict:
         config += ["--grounding-queue", config_dict["queue_type"],
                    ]
 
-    if "ignore-bad-actions" in config_dict and config_dict["ignore-bad-actions"].lower().strip() == "true":
+    if ignores_bad_actions(config_dict):
         config += ["--ignore-bad-actions"]
+    return config
+
+
+def get_options(config_file):
+    config_dict = load_config(config_file)
+
+    config = ["--alias", config_dict["alias"], "--h2-preprocessor"]
+    config += get_grounding_options(config_dict)
 
     if "termination-condition" in config_dict:
         config += ["--termination-condition", config_dict["termination-condition"]]
 
     if "termination-condition" not in config_dict or config_dict["termination-condition"] != "full":
         # TODO add incremental grounding options to config file and include them here
-        config += ["--incremental-grounding"]
+        config += ["--incremental-grounding", "--incremental-grounding-resume"]
+        if not drops_bad_actions(config_dict):
+            # Keep the grounding state of the last iteration, so that the
+            # final LAMA run can continue grounding it (see ground_fully).
+            config += ["--keep-grounding-checkpoint"]
 
     return config
 
 
+def get_grounded_task_key(config_file):
+    """Return the key of the task that the config grounds in the
+    GroundedTaskCache, or None if the task cannot be shared.
+
+    Only fully grounded tasks are shared: they contain all reachable
+    actions, no matter in which order the grounding queue of the model
+    grounds them. Models that ignore the actions rejected by their rules
+    ground a task of their own."""
+    config_dict = load_config(config_file)
+    if config_dict.get("termination-condition") != "full":
+        return None
+    if drops_bad_actions(config_dict):
+        return os.path.abspath(config_file)
+    return FULL_GROUNDING
+
+
+class GroundedTaskCache:
+    """Translated and h2-preprocessed tasks of the runs of this planner
+    call, so that every task is grounded once and then searched by all
+    models (and the final LAMA config) that use it."""
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix="grounded-tasks-", dir=".")
+        self.sas_files = {}
+        # The largest partially grounded task as (SAS file, grounding
+        # checkpoint, model folder) triple.
+        self.partial_task = None
+
+    def get(self, key):
+        return self.sas_files.get(key)
+
+    def add(self, key, sas_file):
+        path = os.path.join(self.directory, f"{len(self.sas_files)}.sas")
+        os.replace(sas_file, path)
+        self.sas_files[key] = os.path.abspath(path)
+        print(f"Reusing the grounded task of key {key} for later runs", flush=True)
+
+    def add_partial(self, sas_file, checkpoint, model_folder):
+        """Keep the partial task and the grounding checkpoint of the last
+        iteration of an incremental grounding run if the task is larger
+        than the one kept so far."""
+        if (self.partial_task is not None and
+                os.path.getsize(sas_file) <= os.path.getsize(self.partial_task[0])):
+            return
+        path = os.path.join(self.directory, "partial")
+        os.replace(sas_file, path + ".sas")
+        os.replace(checkpoint, path + ".grounding")
+        # The translator stores the reusable translation results next to
+        # the checkpoint.
+        translation_state = checkpoint + ".translation"
+        if os.path.exists(translation_state):
+            os.replace(translation_state, path + ".grounding.translation")
+        elif os.path.exists(path + ".grounding.translation"):
+            os.remove(path + ".grounding.translation")
+        path = os.path.abspath(path)
+        self.partial_task = (path + ".sas", path + ".grounding", model_folder)
+
+    def remove(self):
+        shutil.rmtree(self.directory)
+
+
+def stop_process_group(process):
+    """Stop the process and the processes it started (in the session
+    started with start_new_session)."""
+    if process.poll() is None:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+
+class ModelRun:
+    """A run of plan-partial-grounding.py for one model in its own working
+    directory and process group, so that it can be stopped with all the
+    planner components it started."""
+    def __init__(self, model_folder, args, time_limit, memory_limit, log_output, cache):
+        self.model_folder = model_folder
+        config_file = os.path.join(model_folder, "config")
+        self.task_key = get_grounded_task_key(config_file)
+        self.alias = load_config(config_file)["alias"]
+        # The full grounding of the fallback (see ground_fully) must not
+        # continue from a task that lacks the rejected actions.
+        self.drops_bad_actions = drops_bad_actions(load_config(config_file))
+        self.working_dir = tempfile.mkdtemp(prefix="partial-grounding-", dir=".")
+        self.plan_file = os.path.join(self.working_dir, "sas_plan")
+        self.log_file = None
+        if log_output:
+            self.log_file = open(os.path.join(self.working_dir, "run.log"), "w")
+        config = get_options(config_file)
+        if self.task_key is not None:
+            cached_task = cache.get(self.task_key)
+            if cached_task:
+                config += ["--search-input", cached_task]
+            else:
+                config += ["--keep-sas-file"]
+        print(f"Running model {model_folder} with time limit {time_limit}s "
+              f"and memory limit {memory_limit}MiB", flush=True)
+        self.process = subprocess.Popen(
+            [sys.executable, PLAN_PARTIAL_GROUNDING] +
+            [os.path.abspath(model_folder), os.path.abspath(args.domain),
+             os.path.abspath(args.problem), "--plan", os.path.abspath(self.plan_file),
+             "--overall-time-limit", str(time_limit),
+             "--overall-memory-limit", str(memory_limit)] +
+            config,
+            cwd=self.working_dir, stdout=self.log_file, stderr=subprocess.STDOUT,
+            start_new_session=True)
+
+    def has_plan(self):
+        return os.path.isfile(self.plan_file)
+
+    def stop(self):
+        stop_process_group(self.process)
+
+    def finish(self, cache):
+        """Print the output of the run, add its task to the cache if the
+        search could read it, and remove its working directory."""
+        if self.log_file is not None:
+            self.log_file.close()
+            with open(self.log_file.name) as log_file:
+                shutil.copyfileobj(log_file, sys.stdout)
+        print(f"Model {self.model_folder} finished with exit code {self.process.returncode}",
+              flush=True)
+        sas_file = os.path.join(self.working_dir, "output.sas")
+        if (self.task_key is not None and cache.get(self.task_key) is None and
+                self.process.returncode in (SEARCH_PLAN_FOUND_EXIT_CODES +
+                                            SEARCH_FAILED_EXIT_CODES +
+                                            SEARCH_OUT_OF_RESOURCES_EXIT_CODES) and
+                os.path.isfile(sas_file)):
+            cache.add(self.task_key, sas_file)
+        checkpoint = sas_file + ".grounding"
+        # Runs that were stopped may have been writing the task.
+        if (self.task_key is None and not self.drops_bad_actions and
+                self.process.returncode >= 0 and
+                os.path.isfile(sas_file) and os.path.isfile(checkpoint)):
+            cache.add_partial(sas_file, checkpoint, self.model_folder)
+        shutil.rmtree(self.working_dir)
+
+
+def run_models(model_folders, args, plan_file, cache):
+    """Run the models in parallel on args.cpus cores until one of them
+    finds a plan, which is moved to plan_file.
+
+    Models that cannot be started yet wait for a free core. Whenever a
+    model is started, it gets an equal share of the remaining time of
+    the models that still have to run on its core, so the time of
+    models that fail early (e.g. because their partial task is
+    unsolvable) goes to the models that run after them.
+
+    A model whose task can be shared (see get_grounded_task_key) waits
+    while another model grounds the same task and then only runs its
+    search on the cached task. It is skipped if a model with the same
+    search alias already failed on the task."""
+    deadline = time.monotonic() + PARTIAL_GROUNDING_TIME_LIMIT
+    memory_limit = MEMORY_LIMIT // min(args.cpus, len(model_folders))
+    log_output = args.cpus > 1
+    waiting = list(model_folders)
+    running = []
+    failed_searches = set()
+    found_plan = False
+
+    def get_next_model():
+        grounding_keys = {run.task_key for run in running}
+        for model_folder in waiting:
+            config_file = os.path.join(model_folder, "config")
+            task_key = get_grounded_task_key(config_file)
+            if task_key is None:
+                return model_folder
+            if (task_key, load_config(config_file)["alias"]) in failed_searches:
+                print(f"Skipping model {model_folder}: its search already failed "
+                      f"on the same task", flush=True)
+                waiting.remove(model_folder)
+                return get_next_model()
+            if cache.get(task_key) is not None or task_key not in grounding_keys:
+                return model_folder
+        return None
+
+    try:
+        while (waiting or running) and not found_plan:
+            while waiting and len(running) < args.cpus:
+                remaining_time = deadline - time.monotonic()
+                if remaining_time < 1:
+                    waiting.clear()
+                    break
+                model_folder = get_next_model()
+                if model_folder is None:
+                    break
+                time_limit = int(remaining_time / math.ceil(len(waiting) / args.cpus))
+                waiting.remove(model_folder)
+                running.append(ModelRun(
+                    model_folder, args, time_limit, memory_limit, log_output, cache))
+            time.sleep(0.1)
+            for run in list(running):
+                if run.process.poll() is not None:
+                    running.remove(run)
+                    if run.has_plan():
+                        os.replace(run.plan_file, plan_file)
+                        found_plan = True
+                    elif run.process.returncode in SEARCH_FAILED_EXIT_CODES:
+                        failed_searches.add((run.task_key, run.alias))
+                    run.finish(cache)
+                    if found_plan:
+                        break
+    finally:
+        for run in running:
+            run.stop()
+            run.finish(cache)
+
+
+def get_plan_cost(plan_file):
+    """Return the cost of the plan or None if the plan is incomplete."""
+    with open(plan_file) as p_file:
+        lines = p_file.readlines()
+    match = re.match(r'^; cost = (\d+)', lines[-1]) if lines else None
+    return int(match.group(1)) if match else None
+
+
+def keep_best_plan(plan_file):
+    """Move the cheapest of the plans plan_file, plan_file.1, plan_file.2,
+    ... to plan_file.1, remove the others and return its cost, or None if
+    there is no complete plan."""
+    plans = [plan_file]
+    for counter in itertools.count(1):
+        plans.append(f"{plan_file}.{counter}")
+        if not os.path.isfile(plans[-1]):
+            break
+    costs = {}
+    for plan in plans:
+        if os.path.isfile(plan):
+            cost = get_plan_cost(plan)
+            if cost is None:
+                os.remove(plan)
+            else:
+                costs[plan] = cost
+    if not costs:
+        return None
+    best_plan = min(costs, key=costs.get)
+    for plan in costs:
+        if plan != best_plan:
+            os.remove(plan)
+    os.replace(best_plan, plan_file + ".1")
+    return costs[best_plan]
+
+
+def get_lama_config(plan_file, task_inputs, memory_limit):
+    """Return the options of LAMA on the given task, bounded by the
+    cost of the best plan found so far (see keep_best_plan)."""
+    lama_config = ["--plan", plan_file] + task_inputs
+    bound = keep_best_plan(plan_file)
+    if bound is not None:
+        lama_config += get_lama(bound)
+        lama_config += ["--internal-previous-portfolio-plans", "1"]
+        lama_config = ["--keep-first-plan-file"] + lama_config
+    else:
+        lama_config = ["--alias", "lama"] + lama_config
+
+    return ["--overall-memory-limit", f"{memory_limit}M"] + lama_config
+
+
+def ground_fully(args, plan_file, cache):
+    """Ground the largest partial task of the model runs fully, continuing
+    from its grounding checkpoint, and return the full task or None if
+    grounding fails.
+
+    With more than one CPU, LAMA meanwhile searches the partial task. Its
+    plans are plans of the full task, too. The search is stopped when the
+    full task is ready, so that LAMA continues on the full task with the
+    cost of the best plan as bound. If grounding fails, the search on the
+    partial task continues until it ends."""
+    partial_task, checkpoint, model_folder = cache.partial_task
+    config_dict = load_config(os.path.join(model_folder, "config"))
+    working_dir = tempfile.mkdtemp(prefix="full-grounding-", dir=".")
+    memory_limit = MEMORY_LIMIT // min(args.cpus, 2)
+    grounding = None
+    partial_search = None
+    try:
+        print(f"Grounding the task fully, starting from the partial task of {model_folder}",
+              flush=True)
+        grounding = subprocess.Popen(
+            [sys.executable, PLAN_PARTIAL_GROUNDING,
+             os.path.abspath(model_folder), os.path.abspath(args.domain),
+             os.path.abspath(args.problem), "--translate-only", "--h2-preprocessor",
+             "--termination-condition", "full", "--grounding-checkpoint", checkpoint,
+             "--overall-memory-limit", str(memory_limit)] +
+            get_grounding_options(config_dict),
+            cwd=working_dir, start_new_session=True)
+        if args.cpus > 1:
+            print(f"Running LAMA on the partial task of {model_folder}", flush=True)
+            partial_search = subprocess.Popen(
+                [sys.executable, FD_PARTIAL_GROUNDING] +
+                get_lama_config(plan_file, [partial_task], memory_limit),
+                start_new_session=True)
+        grounding.wait()
+        sas_file = os.path.join(working_dir, "output.sas")
+        if grounding.returncode == 0 and os.path.isfile(sas_file):
+            cache.add(FULL_GROUNDING, sas_file)
+            if partial_search is not None:
+                stop_process_group(partial_search)
+            return cache.get(FULL_GROUNDING)
+        print(f"Full grounding finished with exit code {grounding.returncode}", flush=True)
+        if partial_search is not None:
+            partial_search.wait()
+        return None
+    finally:
+        if grounding is not None:
+            stop_process_group(grounding)
+        if partial_search is not None:
+            stop_process_group(partial_search)
+        shutil.rmtree(working_dir)
+
+
+def run_lama(args, plan_file, cache):
+    """Run standard LAMA as fallback or to improve the found solution,
+    on the fully grounded task of an earlier run if there is one.
+    Otherwise, the task is grounded fully from the largest partial task
+    of the model runs and only grounded from scratch if that fails."""
+    full_task = cache.get(FULL_GROUNDING)
+    if full_task is None and cache.partial_task is not None:
+        full_task = ground_fully(args, plan_file, cache)
+    if full_task:
+        # The task is already preprocessed with h2 mutexes.
+        task_inputs = [full_task]
+    else:
+        task_inputs = ["--transform-task", f"{ROOT}/fd-partial-grounding/builds/release/bin/preprocess-h2",
+                       "--transform-task-options", "h2_time_limit,300",
+                       args.domain, args.problem]
+
+    subprocess.run([sys.executable, FD_PARTIAL_GROUNDING] +
+                   get_lama_config(plan_file, task_inputs, MEMORY_LIMIT))
+
+
+def extract_domain_knowledge(domain_knowledge, cache_dir):
+    """Extract the domain knowledge file into cache_dir and return the
+    folder. The folder name contains a hash of the file contents, and
+    an existing folder is reused. Extraction goes to a temporary folder
+    that is renamed at the end, so concurrent calls with the same file
+    never see a partially extracted folder."""
+    digest = hashlib.sha256()
+    with open(domain_knowledge, "rb") as dk_file:
+        for chunk in iter(lambda: dk_file.read(1 << 20), b""):
+            digest.update(chunk)
+    dk_folder = os.path.join(
+        cache_dir, f"{os.path.basename(domain_knowledge)}-{digest.hexdigest()[:16]}-extracted")
+    if os.path.isdir(dk_folder):
+        print(f"Using the extracted domain knowledge in {dk_folder}")
+        return dk_folder
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_folder = tempfile.mkdtemp(prefix=os.path.basename(dk_folder) + ".", dir=cache_dir)
+    try:
+        with tarfile.open(domain_knowledge, "r:gz") as tar:
+            tar.extractall(tmp_folder)
+        os.rename(tmp_folder, dk_folder)
+    except OSError:
+        # Another call extracted the same file in the meantime.
+        if not os.path.isdir(dk_folder):
+            raise
+    finally:
+        if os.path.isdir(tmp_folder):
+            shutil.rmtree(tmp_folder)
+    return dk_folder
+
+
 def main():
     args = parse_args()
 
-    dk_folder = f"{os.path.basename(args.domain_knowledge)}-extracted"
-
     plan_file = os.path.abspath(args.plan)
 
-    # uncompress domain knowledge file
-    with tarfile.open(args.domain_knowledge, "r:gz") as tar:
-        if os.path.exists(dk_folder):
-            shutil.rmtree(dk_folder)
-        tar.extractall(dk_folder)
+    dk_folder = extract_domain_knowledge(args.domain_knowledge, args.knowledge_cache)
 
     model_folders = []
     for direc in os.listdir(dk_folder):
@@ -106,40 +528,16 @@ def main():
         # if there are no appropriate sub-folders, assume that the model is on the top level
         model_folders.append(dk_folder)
 
-    for model_folder in model_folders:
-        config = get_options(os.path.join(model_folder, "config"))
-
+    cache = GroundedTaskCache()
+    # All translator runs of this call parse and normalize the same task.
+    os.environ.setdefault(TASK_CACHE_VARIABLE,
+                          os.path.abspath(os.path.join(cache.directory, "task-cache")))
+    try:
         # TODO maybe limit time for partial grounding translator?
-        # split 25min evenly across all models, reserve 5min for final LAMA config
-        subprocess.run([sys.executable, PLAN_PARTIAL_GROUNDING] +
-                       [model_folder, args.domain, args.problem, "--plan", plan_file,
-                        "--overall-time-limit", str(int(25 * 60 / len(model_folders)))] +
-                       config)
-
-        if os.path.isfile(plan_file):
-            break
-
-    # run standard LAMA as fallback or to improve found solution
-    lama_config = ["--transform-task", f"{ROOT}/fd-partial-grounding/builds/release/bin/preprocess-h2",
-                   "--transform-task-options", "h2_time_limit,300",
-                   "--plan", plan_file, args.domain, args.problem]
-    if os.path.isfile(plan_file):
-        with open(plan_file) as p_file:
-            cost_line = p_file.readlines()[-1]
-            cost_re = re.compile(r'^; cost = (\d+)')
-            bound = cost_re.match(cost_line).group(1)
-
-        os.rename(plan_file, plan_file + ".1")
-
-        lama_config += get_lama(bound)
-        lama_config += ["--internal-previous-portfolio-plans", "1"]
-        lama_config = ["--keep-first-plan-file"] + lama_config
-    else:
-        lama_config = ["--alias", "lama"] + lama_config
-
-    lama_config = ["--overall-memory-limit", "8000M"] + lama_config
-
-    subprocess.run([sys.executable, FD_PARTIAL_GROUNDING] + lama_config)
+        run_models(model_folders, args, plan_file, cache)
+        run_lama(args, plan_file, cache)
+    finally:
+        cache.remove()
 
 
 if __name__ == "__main__":
@@ -63,8 +63,13 @@ class Eval:
             self.candidate_models.copy_model_to_folder(config, model_path, symlink=True)
 
         extra_parameters = ['--h2-preprocessor', '--alias', config['alias'], '--grounding-queue', config['queue_type'],
-                            '--incremental-grounding', '--incremental-grounding-increment-percentage', '20',
                             '--termination-condition', config['termination-condition']]
+        if config['termination-condition'] == 'full':
+            # Incremental grounding would stop grounding as soon as the goal is
+            # relaxed reachable, so full grounding runs once (as in plan.py).
+            extra_parameters += ['--compute-model-backend', 'seminaive']
+        else:
+            extra_parameters += ['--incremental-grounding', '--incremental-grounding-increment-percentage', '20']
 
         if "ignore-bad-actions" in config and config["ignore-bad-actions"].lower().strip() == "true":
             extra_parameters += ["--ignore-bad-actions"]
@@ -156,6 +161,8 @@ class Eval:
 
         extra_parameters = ['--h2-preprocessor', '--alias', config['alias'], '--grounding-queue', config['queue_type'],
                             '--termination-condition', config['termination-condition']]
+        if config['termination-condition'] == 'full':
+            extra_parameters += ['--compute-model-backend', 'seminaive']
 
         if "ignore-bad-actions" in config and config["ignore-bad-actions"].lower().strip() == "true":
             extra_parameters += ["--ignore-bad-actions"]